@@ -5,44 +5,109 @@ Created on Sat Aug 12 00:15:10 2017
 
 @author: edward
 """
+import numpy as np
+from DD_basic_models.time_transforms import param_column, result_buffer, sqrt_time, lag_time
 
-def C_Higuchi (k_H,t):
+def C_Higuchi (k_H,t, out=None, sqrt_t=None):
     """
     t - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
-    k_H - parameter of the model
+    k_H - parameter of the model, a scalar or an array of P values
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+    sqrt_t - an optional precomputed sqrt_time(t), shared between evaluations on the same time grid
     
     Higuchi T. Rate of release of medicaments from ointment bases containing drugs in suspension. J Pharm Sci. 1961;50:874–5.
     
     bibtexkey: higuchi1961
     """
-    C_theor_Higuchi= k_H*(t**0.5)
+    k_H = param_column(k_H)
+    if sqrt_t is None:
+        sqrt_t = sqrt_time(t)
+    C_theor_Higuchi= result_buffer(out, k_H, sqrt_t)
+    np.multiply(k_H, sqrt_t, out=C_theor_Higuchi)
     
     return C_theor_Higuchi
 
-def C_Higuchi_T_lag (k_H, T_lag, t):
+def C_Higuchi_T_lag (k_H, T_lag, t, out=None):
     """
     t - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
-    k_H, T_lag - parameters of the model
+    k_H, T_lag - parameters of the model, scalars or arrays of P values
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+    
+    No drug is released before T_lag.
     
     Tarvainen M, Peltonen S, Mikkonen H, Elovaara M, Tuunainen  M, Paronen P et al. Aqueous starch acetate dispersion as a novel coating material for controlled release products. J Control
     Release. 2004;96:179–91.
     
     bibtexkey: tarvainen2004
     """
-    C_theor_Higuchi_T_lag= k_H*((t-T_lag)**0.5)
+    k_H, T_lag = param_column(k_H), param_column(T_lag)
+    C_theor_Higuchi_T_lag= lag_time(t, T_lag, out=result_buffer(out, k_H, T_lag, t))
+    np.sqrt(C_theor_Higuchi_T_lag, out=C_theor_Higuchi_T_lag)
+    np.multiply(k_H, C_theor_Higuchi_T_lag, out=C_theor_Higuchi_T_lag)
     
     return C_theor_Higuchi_T_lag
 
-def C_Higuchi_F0 (k_H, F0, t):
+def C_Higuchi_F0 (k_H, F0, t, out=None, sqrt_t=None):
     """
     t - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
-    k_H, F0 - parameters of the model
+    k_H, F0 - parameters of the model, scalars or arrays of P values
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+    sqrt_t - an optional precomputed sqrt_time(t), shared between evaluations on the same time grid
     
     Ford JL, Mitchell K, Rowe P, Armstrong DJ, Elliott PNC,Rostron C et al. Mathematical modelling of drug release from hydroxypropylmethylcellulose matrices: effect of temperature.
     Int J Pharm. 1991;71:95–104
     
     bibtexkey: ford1991
     """
-    C_theor_Higuchi_F0= F0+ k_H*(t**0.5)
+    k_H, F0 = param_column(k_H), param_column(F0)
+    if sqrt_t is None:
+        sqrt_t = sqrt_time(t)
+    C_theor_Higuchi_F0= result_buffer(out, k_H, F0, sqrt_t)
+    np.multiply(k_H, sqrt_t, out=C_theor_Higuchi_F0)
+    np.add(C_theor_Higuchi_F0, F0, out=C_theor_Higuchi_F0)
     
     return C_theor_Higuchi_F0
+
+
+def Jac_C_Higuchi (k_H, t, sqrt_t=None):
+    """
+    t - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    k_H - parameter of the model, a scalar or an array of P values
+    sqrt_t - an optional precomputed sqrt_time(t)
+    
+    Returns the analytic partial derivatives of C_Higuchi, stacked as [dC/dk_H], of shape (1, T) or (1, P, T).
+    """
+    k_H = param_column(k_H)
+    if sqrt_t is None:
+        sqrt_t = sqrt_time(t)
+    shape = np.broadcast_shapes(np.shape(k_H), np.shape(sqrt_t))
+    return np.array([np.broadcast_to(sqrt_t, shape)])
+
+
+def Jac_C_Higuchi_T_lag (k_H, T_lag, t):
+    """
+    t - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    k_H, T_lag - parameters of the model, scalars or arrays of P values
+    
+    Returns the analytic partial derivatives of C_Higuchi_T_lag, stacked as [dC/dk_H, dC/dT_lag],
+    of shape (2, T) or (2, P, T). Before T_lag (and at T_lag, where dC/dT_lag is unbounded) the derivatives are 0.
+    """
+    k_H, T_lag = param_column(k_H), param_column(T_lag)
+    sqrt_tau = np.sqrt(lag_time(t, T_lag, out=result_buffer(None, k_H, T_lag, t)))
+    dC_dT_lag = np.divide(-0.5*k_H, sqrt_tau, out=np.zeros_like(sqrt_tau), where=sqrt_tau > 0)
+    return np.stack((sqrt_tau, dC_dT_lag))
+
+
+def Jac_C_Higuchi_F0 (k_H, F0, t, sqrt_t=None):
+    """
+    t - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    k_H, F0 - parameters of the model, scalars or arrays of P values
+    sqrt_t - an optional precomputed sqrt_time(t)
+    
+    Returns the analytic partial derivatives of C_Higuchi_F0, stacked as [dC/dk_H, dC/dF0], of shape (2, T) or (2, P, T).
+    """
+    k_H, F0 = param_column(k_H), param_column(F0)
+    if sqrt_t is None:
+        sqrt_t = sqrt_time(t)
+    shape = np.broadcast_shapes(np.shape(k_H), np.shape(F0), np.shape(sqrt_t))
+    return np.array([np.broadcast_to(sqrt_t, shape), np.ones(shape)])
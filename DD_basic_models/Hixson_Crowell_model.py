@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hixson-Crowell (cube root law) models of drug release: 100*(1 - (1 - k_HC*t)^3), with an optional lag time.
+
+@author: edward
+"""
+import numpy as np
+from DD_basic_models.time_transforms import param_column, result_buffer, lag_time, remaining_fraction, erosion_release
+
+
+def C_Hixson_Crowell(k_HC, t, out=None):
+    """
+    k_HC - parameter of the model (the cube root rate constant relative to the initial cube root of the mass), a scalar or an array of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    The release is complete at t = 1/k_HC.
+
+    Hixson AW, Crowell JH. Dependence of reaction velocity upon surface and agitation. Ind Eng Chem. 1931;23:923–31.
+
+    bibtexkey: hixson1931
+    """
+    k_HC = param_column(k_HC)
+    Theor_C_Hixson_Crowell = lag_time(t, 0., out=result_buffer(out, k_HC, t))
+    erosion_release(remaining_fraction(Theor_C_Hixson_Crowell, k_HC), 3.)
+
+    return Theor_C_Hixson_Crowell
+
+
+def C_Hixson_Crowell_T_lag(k_HC, T_lag, t, out=None):
+    """
+    k_HC, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    No drug is released before T_lag.
+
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001
+    """
+    k_HC, T_lag = param_column(k_HC), param_column(T_lag)
+    Theor_C_Hixson_Crowell_T_lag = lag_time(t, T_lag, out=result_buffer(out, k_HC, T_lag, t))
+    erosion_release(remaining_fraction(Theor_C_Hixson_Crowell_T_lag, k_HC), 3.)
+
+    return Theor_C_Hixson_Crowell_T_lag
+
+
+def Jac_C_Hixson_Crowell(k_HC, t):
+    """
+    k_HC - parameter of the model, a scalar or an array of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Hixson_Crowell, stacked as [dC/dk_HC], of shape (1, T) or (1, P, T).
+    After the complete release (t >= 1/k_HC) the derivative is 0.
+    """
+    k_HC = param_column(k_HC)
+    tau = lag_time(t, 0., out=result_buffer(None, k_HC, t))
+    x = remaining_fraction(tau.copy(), k_HC)
+    return (300*x*x*tau)[np.newaxis]
+
+
+def Jac_C_Hixson_Crowell_T_lag(k_HC, T_lag, t):
+    """
+    k_HC, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Hixson_Crowell_T_lag, stacked as [dC/dk_HC, dC/dT_lag],
+    of shape (2, T) or (2, P, T). Before T_lag and after the complete release the derivatives are 0.
+    """
+    k_HC, T_lag = param_column(k_HC), param_column(T_lag)
+    tau = lag_time(t, T_lag, out=result_buffer(None, k_HC, T_lag, t))
+    x = remaining_fraction(tau.copy(), k_HC)
+    return np.stack((300*x*x*tau, np.where(tau > 0, -300*k_HC*x*x, 0.)))
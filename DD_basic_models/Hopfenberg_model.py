@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hopfenberg models of drug release from surface-eroding devices: 100*(1 - (1 - k_HB*t)^n), with an optional lag time.
+
+@author: edward
+"""
+import numpy as np
+from DD_basic_models.time_transforms import param_column, result_buffer, lag_time, remaining_fraction, erosion_release
+
+
+def C_Hopfenberg(k_HB, n, t, out=None):
+    """
+    k_HB, n - parameters of the model (the erosion rate constant, relative to the initial radius, and the geometry:
+    1 for a slab, 2 for a cylinder, 3 for a sphere), scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    Hopfenberg HB. Controlled release from erodible slabs, cylinders, and spheres. In: Paul DR, Harris FW, editors.
+    Controlled release polymeric formulations. ACS Symposium Series 33. Washington: American Chemical Society; 1976. p. 26–32.
+
+    bibtexkey: hopfenberg1976
+    """
+    k_HB, n = param_column(k_HB), param_column(n)
+    Theor_C_Hopfenberg = lag_time(t, 0., out=result_buffer(out, k_HB, n, t))
+    erosion_release(remaining_fraction(Theor_C_Hopfenberg, k_HB), n)
+
+    return Theor_C_Hopfenberg
+
+
+def C_Hopfenberg_T_lag(k_HB, n, T_lag, t, out=None):
+    """
+    k_HB, n, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    No drug is released before T_lag.
+
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001
+    """
+    k_HB, n, T_lag = param_column(k_HB), param_column(n), param_column(T_lag)
+    Theor_C_Hopfenberg_T_lag = lag_time(t, T_lag, out=result_buffer(out, k_HB, n, T_lag, t))
+    erosion_release(remaining_fraction(Theor_C_Hopfenberg_T_lag, k_HB), n)
+
+    return Theor_C_Hopfenberg_T_lag
+
+
+def _Jac_Hopfenberg(k_HB, n, tau):
+    """
+    Returns the derivatives of 100*(1 - (1 - k_HB*tau)^n) with respect to k_HB, n and tau,
+    0 once the device is fully eroded.
+    """
+    x = remaining_fraction(tau.copy(), k_HB)
+    eroding = x > 0
+    power_1 = np.power(x, n - 1, out=np.zeros_like(x), where=eroding)
+    log_x = np.log(x, out=np.zeros_like(x), where=eroding)
+    dC_dx = -100*n*power_1
+    return -dC_dx*tau, -100*power_1*x*log_x, -dC_dx*k_HB
+
+
+def Jac_C_Hopfenberg(k_HB, n, t):
+    """
+    k_HB, n - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Hopfenberg, stacked as [dC/dk_HB, dC/dn], of shape (2, T) or (2, P, T).
+    After the full erosion (t >= 1/k_HB) the derivatives are 0.
+    """
+    k_HB, n = param_column(k_HB), param_column(n)
+    tau = lag_time(t, 0., out=result_buffer(None, k_HB, n, t))
+    dC_dk_HB, dC_dn, _ = _Jac_Hopfenberg(k_HB, n, tau)
+    return np.stack((dC_dk_HB, dC_dn))
+
+
+def Jac_C_Hopfenberg_T_lag(k_HB, n, T_lag, t):
+    """
+    k_HB, n, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Hopfenberg_T_lag, stacked as [dC/dk_HB, dC/dn, dC/dT_lag],
+    of shape (3, T) or (3, P, T). Before T_lag and after the full erosion the derivatives are 0.
+    """
+    k_HB, n, T_lag = param_column(k_HB), param_column(n), param_column(T_lag)
+    tau = lag_time(t, T_lag, out=result_buffer(None, k_HB, n, T_lag, t))
+    dC_dk_HB, dC_dn, dC_dtau = _Jac_Hopfenberg(k_HB, n, tau)
+    return np.stack((dC_dk_HB, dC_dn, np.where(tau > 0, -dC_dtau, 0.)))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Korsmeyer-Peppas (power law) models of drug release: k_KP*t^n, with an optional lag time or burst effect F0.
+
+@author: edward
+"""
+import numpy as np
+from DD_basic_models.time_transforms import param_column, result_buffer, lag_time
+
+
+def _power(tau, k_KP, n):
+    """
+    Turns the buffer holding the elapsed time tau in place into k_KP*tau^n.
+    """
+    np.power(tau, n, out=tau)
+    np.multiply(k_KP, tau, out=tau)
+    return tau
+
+
+def C_Korsmeyer_Peppas(k_KP, n, t, out=None):
+    """
+    k_KP, n - parameters of the model (the release constant and the release exponent), scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    Korsmeyer RW, Gurny R, Doelker E, Buri P, Peppas NA. Mechanisms of solute release from porous hydrophilic polymers. Int J Pharm. 1983;15:25–35.
+
+    bibtexkey: korsmeyer1983
+    """
+    k_KP, n = param_column(k_KP), param_column(n)
+    Theor_C_Korsmeyer_Peppas = lag_time(t, 0., out=result_buffer(out, k_KP, n, t))
+    _power(Theor_C_Korsmeyer_Peppas, k_KP, n)
+
+    return Theor_C_Korsmeyer_Peppas
+
+
+def C_Korsmeyer_Peppas_T_lag(k_KP, n, T_lag, t, out=None):
+    """
+    k_KP, n, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    No drug is released before T_lag.
+
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001
+    """
+    k_KP, n, T_lag = param_column(k_KP), param_column(n), param_column(T_lag)
+    Theor_C_Korsmeyer_Peppas_T_lag = lag_time(t, T_lag, out=result_buffer(out, k_KP, n, T_lag, t))
+    _power(Theor_C_Korsmeyer_Peppas_T_lag, k_KP, n)
+
+    return Theor_C_Korsmeyer_Peppas_T_lag
+
+
+def C_Korsmeyer_Peppas_F0(k_KP, n, F0, t, out=None):
+    """
+    k_KP, n, F0 - parameters of the model (F0 being the burst release), scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    Kim H, Fassihi R. Application of binary polymer system in drug release rate modulation. 2. Influence of formulation
+    variables and hydrodynamic conditions on release kinetics. J Pharm Sci. 1997;86:323–8.
+
+    bibtexkey: kim1997
+    """
+    k_KP, n, F0 = param_column(k_KP), param_column(n), param_column(F0)
+    Theor_C_Korsmeyer_Peppas_F0 = lag_time(t, 0., out=result_buffer(out, k_KP, n, F0, t))
+    _power(Theor_C_Korsmeyer_Peppas_F0, k_KP, n)
+    np.add(Theor_C_Korsmeyer_Peppas_F0, F0, out=Theor_C_Korsmeyer_Peppas_F0)
+
+    return Theor_C_Korsmeyer_Peppas_F0
+
+
+def _Jac_Korsmeyer_Peppas(k_KP, n, tau):
+    """
+    Returns the derivatives of k_KP*tau^n with respect to k_KP, n and tau, 0 where tau is 0.
+    """
+    power = np.power(tau, n, out=np.zeros_like(tau), where=tau > 0)
+    log_tau = np.log(tau, out=np.zeros_like(tau), where=tau > 0)
+    dC_dtau = np.divide(k_KP*n*power, tau, out=np.zeros_like(tau), where=tau > 0)
+    return power, k_KP*power*log_tau, dC_dtau
+
+
+def Jac_C_Korsmeyer_Peppas(k_KP, n, t):
+    """
+    k_KP, n - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Korsmeyer_Peppas, stacked as [dC/dk_KP, dC/dn], of shape (2, T) or (2, P, T).
+    """
+    k_KP, n = param_column(k_KP), param_column(n)
+    tau = lag_time(t, 0., out=result_buffer(None, k_KP, n, t))
+    dC_dk_KP, dC_dn, _ = _Jac_Korsmeyer_Peppas(k_KP, n, tau)
+    return np.stack((dC_dk_KP, dC_dn))
+
+
+def Jac_C_Korsmeyer_Peppas_T_lag(k_KP, n, T_lag, t):
+    """
+    k_KP, n, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Korsmeyer_Peppas_T_lag, stacked as [dC/dk_KP, dC/dn, dC/dT_lag],
+    of shape (3, T) or (3, P, T). Before T_lag (and at T_lag, where dC/dT_lag is unbounded for n < 1) the derivatives are 0.
+    """
+    k_KP, n, T_lag = param_column(k_KP), param_column(n), param_column(T_lag)
+    tau = lag_time(t, T_lag, out=result_buffer(None, k_KP, n, T_lag, t))
+    dC_dk_KP, dC_dn, dC_dtau = _Jac_Korsmeyer_Peppas(k_KP, n, tau)
+    return np.stack((dC_dk_KP, dC_dn, -dC_dtau))
+
+
+def Jac_C_Korsmeyer_Peppas_F0(k_KP, n, F0, t):
+    """
+    k_KP, n, F0 - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Korsmeyer_Peppas_F0, stacked as [dC/dk_KP, dC/dn, dC/dF0],
+    of shape (3, T) or (3, P, T).
+    """
+    k_KP, n, F0 = param_column(k_KP), param_column(n), param_column(F0)
+    tau = lag_time(t, 0., out=result_buffer(None, k_KP, n, F0, t))
+    dC_dk_KP, dC_dn, _ = _Jac_Korsmeyer_Peppas(k_KP, n, tau)
+    return np.stack((dC_dk_KP, dC_dn, np.ones_like(tau)))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Weibull models of drug release: 100*(1 - exp(-(t/T_d)^beta)), with an optional lag time.
+
+@author: edward
+"""
+import numpy as np
+from DD_basic_models.time_transforms import param_column, result_buffer, lag_time, saturation
+
+
+def _scaled_power(tau, T_d, beta):
+    """
+    Turns the buffer holding the elapsed time tau in place into the exponent -(tau/T_d)^beta.
+    """
+    np.divide(tau, T_d, out=tau)
+    np.power(tau, beta, out=tau)
+    np.negative(tau, out=tau)
+    return tau
+
+
+def C_Weibull(T_d, beta, t, out=None):
+    """
+    T_d, beta - parameters of the model (the time scale and the shape of the release), scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    Langenbucher F. Linearization of dissolution rate curves by the Weibull distribution. J Pharm Pharmacol. 1972;24:979–81.
+
+    bibtexkey: langenbucher1972
+    """
+    T_d, beta = param_column(T_d), param_column(beta)
+    Theor_C_Weibull = lag_time(t, 0., out=result_buffer(out, T_d, beta, t))
+    _scaled_power(Theor_C_Weibull, T_d, beta)
+    saturation(Theor_C_Weibull, 100.)
+
+    return Theor_C_Weibull
+
+
+def C_Weibull_T_lag(T_d, beta, T_lag, t, out=None):
+    """
+    T_d, beta, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+
+    No drug is released before T_lag.
+
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001
+    """
+    T_d, beta, T_lag = param_column(T_d), param_column(beta), param_column(T_lag)
+    Theor_C_Weibull_T_lag = lag_time(t, T_lag, out=result_buffer(out, T_d, beta, T_lag, t))
+    _scaled_power(Theor_C_Weibull_T_lag, T_d, beta)
+    saturation(Theor_C_Weibull_T_lag, 100.)
+
+    return Theor_C_Weibull_T_lag
+
+
+def _Jac_Weibull(T_d, beta, tau):
+    """
+    Returns the derivatives of 100*(1 - exp(-(tau/T_d)^beta)) with respect to T_d, beta and tau, 0 where tau is 0.
+    """
+    x = tau/T_d
+    log_x = np.log(x, out=np.zeros_like(x), where=x > 0)
+    u = np.power(x, beta, out=np.zeros_like(x), where=x > 0)
+    dC_du = 100*np.exp(-u)
+    dC_dtau = np.divide(dC_du*beta*u, tau, out=np.zeros_like(u), where=tau > 0)
+    return -dC_du*beta*u/T_d, dC_du*u*log_x, dC_dtau
+
+
+def Jac_C_Weibull(T_d, beta, t):
+    """
+    T_d, beta - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Weibull, stacked as [dC/dT_d, dC/dbeta], of shape (2, T) or (2, P, T).
+    """
+    T_d, beta = param_column(T_d), param_column(beta)
+    tau = lag_time(t, 0., out=result_buffer(None, T_d, beta, t))
+    dC_dT_d, dC_dbeta, _ = _Jac_Weibull(T_d, beta, tau)
+    return np.stack((dC_dT_d, dC_dbeta))
+
+
+def Jac_C_Weibull_T_lag(T_d, beta, T_lag, t):
+    """
+    T_d, beta, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+
+    Returns the analytic partial derivatives of C_Weibull_T_lag, stacked as [dC/dT_d, dC/dbeta, dC/dT_lag],
+    of shape (3, T) or (3, P, T). Before T_lag (and at T_lag, where dC/dT_lag is unbounded for beta < 1) the derivatives are 0.
+    """
+    T_d, beta, T_lag = param_column(T_d), param_column(beta), param_column(T_lag)
+    tau = lag_time(t, T_lag, out=result_buffer(None, T_d, beta, T_lag, t))
+    dC_dT_d, dC_dbeta, dC_dtau = _Jac_Weibull(T_d, beta, tau)
+    return np.stack((dC_dT_d, dC_dbeta, -dC_dtau))
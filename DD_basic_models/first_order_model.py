@@ -5,56 +5,129 @@ Created on Tue Aug  8 15:26:58 2017
 @author: edward
 """
 import numpy as np
+from DD_basic_models.time_transforms import param_column, result_buffer, lag_time, saturation
 
-def C_first_order(k_1, t):
+def C_first_order(k_1, t, out=None):
     """
-    k_1- parameter of the model
+    k_1- parameter of the model, a scalar or an array of P values
     t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
        
     Polli JE, Rekhi GS, Augsburger LL, Shah VP. Methods to compare dissolution profiles and a rationale for wide dissolution specifications for metoprolol tartrate tablets. J Pharm Sci.1997;86:690–700.
     bibtexkey: polly1997
     """    
-    Theor_C_first_order = 100*(1- np.exp(-k_1*t))
+    k_1 = param_column(k_1)
+    Theor_C_first_order = result_buffer(out, k_1, t)
+    np.multiply(-k_1, t, out=Theor_C_first_order)
+    saturation(Theor_C_first_order, 100.)
     
     return Theor_C_first_order
 
 
-def C_first_order_T_lag(k_1, T_lag, t):
+def C_first_order_T_lag(k_1, T_lag, t, out=None):
     """
-    k_1, T_lag - parameters of the model
+    k_1, T_lag - parameters of the model, scalars or arrays of P values
     t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+    
+    No drug is released before T_lag.
        
     Phaechamud T, Pitaksantayothin K, Kositwattanakoon P, Seehapong P, Jungvivatanavong S.
     Sustainable release of propranolol hydrochloride tablet using chitin as press-coating material.Silpakorn Univ Int J. 2002;2:147–59.
     bibtexkey: phaechamud2002
     """   
-    Theor_C_first_order_T_lag = 100*(1- np.exp( - k_1*(t - T_lag)))
+    k_1, T_lag = param_column(k_1), param_column(T_lag)
+    Theor_C_first_order_T_lag = lag_time(t, T_lag, out=result_buffer(out, k_1, T_lag, t))
+    np.multiply(-k_1, Theor_C_first_order_T_lag, out=Theor_C_first_order_T_lag)
+    saturation(Theor_C_first_order_T_lag, 100.)
     
     return Theor_C_first_order_T_lag
 
 
-def C_first_order_F_max( k_1, F_max, t):
+def C_first_order_F_max( k_1, F_max, t, out=None):
     """
-    k_1, F_max- parameters of the model
+    k_1, F_max- parameters of the model, scalars or arrays of P values
     t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
         
     Tsong Y, Hammerstrom T, Chen JJ. Multipoint dissolution specification and acceptance sampling rule based on profile modeling and principal component analysis. J Biopharm Stat. 1997;7:423–39.
     bibtexkey: tsong1997
     """    
-    Theor_C_first_order_F_max = F_max *(1- np.exp( -k_1* t))
+    k_1, F_max = param_column(k_1), param_column(F_max)
+    Theor_C_first_order_F_max = result_buffer(out, k_1, F_max, t)
+    np.multiply(-k_1, t, out=Theor_C_first_order_F_max)
+    saturation(Theor_C_first_order_F_max, F_max)
     
     return Theor_C_first_order_F_max
 
 
-def C_first_order_F_max_T_lag( k_1, F_max, T_lag, t):
+def C_first_order_F_max_T_lag( k_1, F_max, T_lag, t, out=None):
     """
-    k_1, F_max, T_lag- parameters of the model
+    k_1, F_max, T_lag- parameters of the model, scalars or arrays of P values
     t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+    
+    No drug is released before T_lag.
         
     Berry MR, Likar MD. Statistical assessment of dissolution and drug release profile similarity using a model-dependent approach. J Pharm Biomed Anal.2007;45:194–200.
     
     bibtexkey: berry2007
     """    
-    Theor_C_first_order_F_max_T_lag = F_max *(1- np.exp( -k_1*(t - T_lag)))
+    k_1, F_max, T_lag = param_column(k_1), param_column(F_max), param_column(T_lag)
+    Theor_C_first_order_F_max_T_lag = lag_time(t, T_lag, out=result_buffer(out, k_1, F_max, T_lag, t))
+    np.multiply(-k_1, Theor_C_first_order_F_max_T_lag, out=Theor_C_first_order_F_max_T_lag)
+    saturation(Theor_C_first_order_F_max_T_lag, F_max)
     
     return Theor_C_first_order_F_max_T_lag
+
+
+def Jac_C_first_order(k_1, t):
+    """
+    k_1- parameter of the model, a scalar or an array of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    
+    Returns the analytic partial derivatives of C_first_order, stacked as [dC/dk_1], of shape (1, T) or (1, P, T).
+    """
+    k_1 = param_column(k_1)
+    return (100*t*np.exp(-k_1*t))[np.newaxis]
+
+
+def Jac_C_first_order_T_lag(k_1, T_lag, t):
+    """
+    k_1, T_lag - parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    
+    Returns the analytic partial derivatives of C_first_order_T_lag, stacked as [dC/dk_1, dC/dT_lag],
+    of shape (2, T) or (2, P, T). Before T_lag both derivatives are 0.
+    """
+    k_1, T_lag = param_column(k_1), param_column(T_lag)
+    tau = lag_time(t, T_lag, out=result_buffer(None, k_1, T_lag, t))
+    Exp = np.exp(-k_1*tau)
+    return np.stack((100*tau*Exp, np.where(tau > 0, -100*k_1*Exp, 0.)))
+
+
+def Jac_C_first_order_F_max(k_1, F_max, t):
+    """
+    k_1, F_max- parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    
+    Returns the analytic partial derivatives of C_first_order_F_max, stacked as [dC/dk_1, dC/dF_max],
+    of shape (2, T) or (2, P, T).
+    """
+    k_1, F_max = param_column(k_1), param_column(F_max)
+    Exp = np.exp(-k_1*t)
+    return np.stack(np.broadcast_arrays(F_max*t*Exp, 1 - Exp))
+
+
+def Jac_C_first_order_F_max_T_lag(k_1, F_max, T_lag, t):
+    """
+    k_1, F_max, T_lag- parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    
+    Returns the analytic partial derivatives of C_first_order_F_max_T_lag, stacked as
+    [dC/dk_1, dC/dF_max, dC/dT_lag], of shape (3, T) or (3, P, T). Before T_lag all derivatives are 0.
+    """
+    k_1, F_max, T_lag = param_column(k_1), param_column(F_max), param_column(T_lag)
+    tau = lag_time(t, T_lag, out=result_buffer(None, k_1, F_max, T_lag, t))
+    Exp = np.exp(-k_1*tau)
+    return np.stack((F_max*tau*Exp, 1 - Exp, np.where(tau > 0, -F_max*k_1*Exp, 0.)))
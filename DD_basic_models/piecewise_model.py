@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Piecewise release: a different DD model (or the same model with different parameters)
+on every interval of a multi-phase release protocol.
+
+@author: edward
+"""
+import numpy as np
+from DD_basic_models.registry import model_by_name
+
+chunk_size = 1 << 18
+
+
+def _segment_models(C_models, PAR):
+    """
+    Normalizes the per-segment models and parameters: returns the list of distinct kernels, the kernel index
+    of every segment and, for every kernel, a (K, n_params) array of parameters filled for its segments.
+    """
+    n_segments = len(PAR)
+    if callable(C_models) or isinstance(C_models, str):
+        C_models = [C_models]*n_segments
+    if len(C_models) != n_segments:
+        raise ValueError('%d models given for %d segments' % (len(C_models), n_segments))
+    C_models = [model_by_name(C_model).C_model if isinstance(C_model, str) else C_model for C_model in C_models]
+
+    kernels = list(dict.fromkeys(C_models))
+    kernel_index = np.array([kernels.index(C_model) for C_model in C_models])
+    PAR_dense = []
+    for k in range(len(kernels)):
+        segments = np.flatnonzero(kernel_index == k)
+        PAR_k = np.array([np.atleast_1d(PAR[s]) for s in segments], dtype=float)
+        Dense = np.full((n_segments, PAR_k.shape[1]), np.nan)
+        Dense[segments] = PAR_k
+        PAR_dense.append(Dense)
+    return kernels, kernel_index, PAR_dense
+
+
+def _evaluate(kernels, kernel_index, PAR_dense, seg, tau):
+    """
+    Evaluates the model of segment seg[i] at the time tau[i] for every point i, gathering the points
+    of every kernel and its per-point parameters, and scattering the results back.
+    """
+    C = np.empty(tau.shape)
+    kernel_of_point = kernel_index[seg]
+    for k, C_model in enumerate(kernels):
+        points = np.flatnonzero(kernel_of_point == k)
+        if points.size == 0:
+            continue
+        PAR_points = PAR_dense[k][seg[points]]
+        C[points] = C_model(*PAR_points.T[:, :, np.newaxis], tau[points, np.newaxis])[:, 0]
+    return C
+
+
+def C_piecewise(t, breakpoints, C_models, PAR, continuous=True, fill_value=0., out=None):
+    """
+    t - an 1-D np.array of times, in any order
+    breakpoints - an increasing 1-D np.array of the K+1 boundaries of the K release intervals,
+    e.g. as read by io_local.read_func.Time_Intervals_read
+    C_models - the model of every interval: a kernel from DD_basic_models (or its registered name) used on all
+    intervals, or a sequence of K kernels/names to mix model types
+    PAR - the parameters of every interval: a sequence of K parameter tuples or a (K, n_params) np.array
+    continuous - if True, the model of an interval is evaluated at the time elapsed since the start of the interval
+    and added to the cumulative release reached at the end of the previous intervals, so the release is continuous;
+    if False, the model of an interval is evaluated at the absolute time t
+    fill_value - the value at the times outside [breakpoints[0], breakpoints[-1]]
+    out - an optional preallocated np.array of the shape of t for the result
+
+    Every time point is assigned to its interval by a binary search (np.searchsorted), so the cost is
+    O(n log K) for n time points and K intervals, instead of one boolean mask per interval. The points are
+    processed in chunks of chunk_size, and within a chunk the points of every model type are gathered,
+    evaluated at once with their per-interval parameters and scattered back, which keeps the memory bounded
+    for millions of points and thousands of intervals.
+
+    Returns the piecewise release at the times t.
+    """
+    t = np.asarray(t, dtype=float)
+    breakpoints = np.asarray(breakpoints, dtype=float)
+    if np.any(np.diff(breakpoints) <= 0):
+        raise ValueError('breakpoints have to be strictly increasing')
+    n_segments = breakpoints.size - 1
+    kernels, kernel_index, PAR_dense = _segment_models(C_models, PAR)
+    if len(kernel_index) != n_segments:
+        raise ValueError('%d parameter sets given for %d intervals' % (len(kernel_index), n_segments))
+
+    if continuous:
+        segments = np.arange(n_segments)
+        C_end = _evaluate(kernels, kernel_index, PAR_dense, segments, np.diff(breakpoints))
+        offsets = np.concatenate(([0.], np.cumsum(C_end)[:-1]))
+
+    if out is None:
+        out = np.empty(t.shape)
+    t_flat, out_flat = t.reshape(-1), out.reshape(-1)
+    for start in range(0, t_flat.size, chunk_size):
+        t_chunk = t_flat[start:start+chunk_size]
+        seg = np.searchsorted(breakpoints, t_chunk, side='right') - 1
+        seg[t_chunk == breakpoints[-1]] = n_segments - 1
+        inside = (seg >= 0) & (seg < n_segments)
+        seg_in = seg[inside]
+        if continuous:
+            C_chunk = _evaluate(kernels, kernel_index, PAR_dense, seg_in, t_chunk[inside] - breakpoints[seg_in])
+            C_chunk += offsets[seg_in]
+        else:
+            C_chunk = _evaluate(kernels, kernel_index, PAR_dense, seg_in, t_chunk[inside])
+        out_chunk = out_flat[start:start+chunk_size]
+        out_chunk[inside] = C_chunk
+        out_chunk[~inside] = fill_value
+    return out
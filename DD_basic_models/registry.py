@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registry of the DD models: kernel, analytic Jacobian, parameters, default bounds and linearity
+of every model, so that fitting and model selection do not need per-model code.
+
+@author: edward
+"""
+from collections import namedtuple
+from DD_basic_models.zero_order_model import C_zero_order, C_zero_order_T_lag, C_zero_order_F0, Jac_C_zero_order, Jac_C_zero_order_T_lag, Jac_C_zero_order_F0
+from DD_basic_models.first_order_model import C_first_order, C_first_order_T_lag, C_first_order_F_max, C_first_order_F_max_T_lag, Jac_C_first_order, Jac_C_first_order_T_lag, Jac_C_first_order_F_max, Jac_C_first_order_F_max_T_lag
+from DD_basic_models.Higuchi_models import C_Higuchi, C_Higuchi_T_lag, C_Higuchi_F0, Jac_C_Higuchi, Jac_C_Higuchi_T_lag, Jac_C_Higuchi_F0
+from DD_basic_models.Weibull_model import C_Weibull, C_Weibull_T_lag, Jac_C_Weibull, Jac_C_Weibull_T_lag
+from DD_basic_models.Korsmeyer_Peppas_model import C_Korsmeyer_Peppas, C_Korsmeyer_Peppas_T_lag, C_Korsmeyer_Peppas_F0, Jac_C_Korsmeyer_Peppas, Jac_C_Korsmeyer_Peppas_T_lag, Jac_C_Korsmeyer_Peppas_F0
+from DD_basic_models.Hixson_Crowell_model import C_Hixson_Crowell, C_Hixson_Crowell_T_lag, Jac_C_Hixson_Crowell, Jac_C_Hixson_Crowell_T_lag
+from DD_basic_models.Hopfenberg_model import C_Hopfenberg, C_Hopfenberg_T_lag, Jac_C_Hopfenberg, Jac_C_Hopfenberg_T_lag
+
+# name - the model name used in reports and by model_by_name
+# C_model, Jac_model - the kernel and its analytic Jacobian
+# PAR_names - the parameter names, in the order of the kernel arguments
+# bounds - the default (min, max) bounds of the parameters, as in the Find_PAR_DEv_* fitters
+# linearity - 'linear' (linear in all parameters), 'separable' (one linear amplitude) or 'nonlinear'
+# design - for linear models the names of the time transforms forming the columns of the design matrix
+#          (see DD_basic_models.time_transforms.profile_transforms)
+# amp_index - for separable models the index of the linear amplitude among the parameters
+# grid_scales - for separable models the grid scale ('log' or 'linear') of every remaining nonlinear parameter
+DD_model = namedtuple('DD_model', ['name', 'C_model', 'Jac_model', 'PAR_names', 'bounds', 'linearity',
+                                   'design', 'amp_index', 'grid_scales'])
+
+MODELS = {}
+_MODELS_BY_KERNEL = {}
+
+
+def register_model(name, C_model, Jac_model, PAR_names, bounds, linearity='nonlinear', design=None, amp_index=None, grid_scales=None):
+    """
+    Adds a model to the registry (see DD_model for the meaning of the arguments) and returns its description.
+    """
+    model = DD_model(name, C_model, Jac_model, tuple(PAR_names), tuple(bounds), linearity, design, amp_index, grid_scales)
+    MODELS[name] = model
+    _MODELS_BY_KERNEL[C_model] = model
+    return model
+
+
+def model_by_name(name):
+    """
+    Returns the description of the registered model called name.
+    """
+    return MODELS[name]
+
+
+def model_of(C_model):
+    """
+    Returns the description of the registered model with the kernel C_model.
+    """
+    return _MODELS_BY_KERNEL[C_model]
+
+
+register_model('zero_order', C_zero_order, Jac_C_zero_order, ['k_0'], [(0., 100.)],
+               'linear', design=('t',))
+register_model('zero_order_T_lag', C_zero_order_T_lag, Jac_C_zero_order_T_lag, ['k_0', 'T_lag'], [(0., 10.), (-10., 10.)],
+               'separable', amp_index=0, grid_scales=('linear',))
+register_model('zero_order_F0', C_zero_order_F0, Jac_C_zero_order_F0, ['k_0', 'F_0'], [(0., 100.), (0., 100.)],
+               'linear', design=('t', '1'))
+register_model('first_order', C_first_order, Jac_C_first_order, ['k_1'], [(0., 100.)])
+register_model('first_order_T_lag', C_first_order_T_lag, Jac_C_first_order_T_lag, ['k_1', 'T_lag'], [(0., 100.), (0., 50.)])
+register_model('first_order_F_max', C_first_order_F_max, Jac_C_first_order_F_max, ['k_1', 'F_max'], [(0., 100.), (0., 1000.)],
+               'separable', amp_index=1, grid_scales=('log',))
+register_model('first_order_F_max_T_lag', C_first_order_F_max_T_lag, Jac_C_first_order_F_max_T_lag, ['k_1', 'F_max', 'T_lag'],
+               [(0., 100.), (0., 1000.), (0., 50.)], 'separable', amp_index=1, grid_scales=('log', 'linear'))
+register_model('Higuchi', C_Higuchi, Jac_C_Higuchi, ['k_H'], [(0., 150.)],
+               'linear', design=('sqrt_t',))
+register_model('Higuchi_T_lag', C_Higuchi_T_lag, Jac_C_Higuchi_T_lag, ['k_H', 'T_lag'], [(0., 150.), (0., 24.)],
+               'separable', amp_index=0, grid_scales=('linear',))
+register_model('Higuchi_F0', C_Higuchi_F0, Jac_C_Higuchi_F0, ['k_H', 'F0'], [(0., 150.), (0., 24.)],
+               'linear', design=('sqrt_t', '1'))
+register_model('Weibull', C_Weibull, Jac_C_Weibull, ['T_d', 'beta'], [(1e-3, 100.), (0.1, 5.)])
+register_model('Weibull_T_lag', C_Weibull_T_lag, Jac_C_Weibull_T_lag, ['T_d', 'beta', 'T_lag'], [(1e-3, 100.), (0.1, 5.), (0., 50.)])
+register_model('Korsmeyer_Peppas', C_Korsmeyer_Peppas, Jac_C_Korsmeyer_Peppas, ['k_KP', 'n'], [(0., 100.), (0.05, 2.)],
+               'separable', amp_index=0, grid_scales=('linear',))
+register_model('Korsmeyer_Peppas_T_lag', C_Korsmeyer_Peppas_T_lag, Jac_C_Korsmeyer_Peppas_T_lag, ['k_KP', 'n', 'T_lag'],
+               [(0., 100.), (0.05, 2.), (0., 50.)], 'separable', amp_index=0, grid_scales=('linear', 'linear'))
+register_model('Korsmeyer_Peppas_F0', C_Korsmeyer_Peppas_F0, Jac_C_Korsmeyer_Peppas_F0, ['k_KP', 'n', 'F0'],
+               [(0., 100.), (0.05, 2.), (0., 100.)])
+register_model('Hixson_Crowell', C_Hixson_Crowell, Jac_C_Hixson_Crowell, ['k_HC'], [(0., 10.)])
+register_model('Hixson_Crowell_T_lag', C_Hixson_Crowell_T_lag, Jac_C_Hixson_Crowell_T_lag, ['k_HC', 'T_lag'], [(0., 10.), (0., 50.)])
+register_model('Hopfenberg', C_Hopfenberg, Jac_C_Hopfenberg, ['k_HB', 'n'], [(0., 10.), (1., 3.)])
+register_model('Hopfenberg_T_lag', C_Hopfenberg_T_lag, Jac_C_Hopfenberg_T_lag, ['k_HB', 'n', 'T_lag'], [(0., 10.), (1., 3.), (0., 50.)])
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the DD model kernels: parameter broadcasting, output buffers
+and the time transforms (sqrt(t), t - T_lag) reused between model evaluations.
+
+@author: edward
+"""
+import numpy as np
+
+
+def param_column(par):
+    """
+    par - a model parameter given as a scalar, a (P,) or a (P,1) array
+
+    Returns the parameter as a float array which broadcasts against a 1-D time array:
+    scalars stay 0-d, a (P,) array becomes a (P,1) column and arrays of higher rank are returned unchanged,
+    so that the model kernels return a (P, T) surface for P parameter sets.
+    """
+    par = np.asarray(par, dtype=float)
+    if par.ndim == 1:
+        return par[:, np.newaxis]
+    return par
+
+
+def result_buffer(out, *arrays):
+    """
+    out - None or a preallocated float np.array
+    arrays - the (already broadcastable) parameters and time array of a model
+
+    Returns out, or a new uninitialised array when out is None. The buffer must hold
+    the broadcast shape of the arrays, because the kernels fill it in place.
+    """
+    shape = np.broadcast_shapes(*(np.shape(a) for a in arrays))
+    if out is None:
+        return np.empty(shape)
+    if np.broadcast_shapes(out.shape, shape) != out.shape:
+        raise ValueError('out has shape %s, the model result has shape %s' % (out.shape, shape))
+    return out
+
+
+def sqrt_time(t):
+    """
+    t - an np.array of times
+
+    Returns sqrt(t) with negative times treated as 0, so that the Higuchi kernels stay NaN-free.
+    The result can be computed once per profile and passed to the kernels as sqrt_t.
+    """
+    return np.sqrt(np.maximum(t, 0.))
+
+
+def lag_time(t, T_lag, out=None):
+    """
+    t - an np.array of times
+    T_lag - the lag time, a scalar or an array broadcastable against t
+    out - an optional preallocated buffer of the broadcast shape
+
+    Returns max(t - T_lag, 0), the time elapsed since the end of the lag period. Before T_lag the
+    elapsed time is 0, hence the lagged models release nothing instead of giving NaN under sqrt
+    or a negative release.
+    """
+    out = result_buffer(out, t, T_lag)
+    np.subtract(t, T_lag, out=out)
+    np.maximum(out, 0., out=out)
+    return out
+
+
+def saturation(exponent, F_max):
+    """
+    Turns the buffer holding an exponent (e.g. -k_1*t) in place into F_max*(1 - exp(exponent)),
+    the saturating release of the first order and Weibull kernels.
+    """
+    np.exp(exponent, out=exponent)
+    np.subtract(1., exponent, out=exponent)
+    np.multiply(exponent, F_max, out=exponent)
+    return exponent
+
+
+def remaining_fraction(tau, k):
+    """
+    Turns the buffer holding the elapsed time tau in place into the remaining fraction of an eroding radius,
+    1 - k*tau, which reaches 0 when the device is fully eroded at tau = 1/k (Hopfenberg and Hixson-Crowell kernels).
+    """
+    np.multiply(-k, tau, out=tau)
+    np.add(tau, 1., out=tau)
+    np.maximum(tau, 0., out=tau)
+    return tau
+
+
+def erosion_release(x, n):
+    """
+    Turns the buffer holding the remaining fraction x of an eroding radius in place into the release 100*(1 - x^n).
+    """
+    np.power(x, n, out=x)
+    np.subtract(1., x, out=x)
+    np.multiply(x, 100., out=x)
+    return x
+
+
+def profile_transforms(t):
+    """
+    t - an 1-D np.array of times of a profile
+
+    Returns the time transforms shared by the models of one profile, computed once:
+    {'1': ones, 't': t, 'sqrt_t': sqrt_time(t)}. They form the columns of the design matrices
+    of the linear models and the sqrt_t argument of the Higuchi kernels.
+    """
+    t = np.asarray(t, dtype=float)
+    return {'1': np.ones_like(t), 't': t, 'sqrt_t': sqrt_time(t)}
@@ -3,42 +3,95 @@
 Created on Sat Aug  5 14:19:29 2017
 @author: gbanach
 """
+import numpy as np
+from DD_basic_models.time_transforms import param_column, result_buffer, lag_time
 
-def C_zero_order(k_0, t):
+def C_zero_order(k_0, t, out=None):
     """
-    k_0- parameter of the model
+    k_0- parameter of the model, a scalar or an array of P values
     t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
     
     Gurny R, Doelker E, Peppas NA. Modelling of sustained release
     of water-soluble drugs from porous, hydrophobic polymers. Biomaterials. 1982;3:27–32.
     bibtexkey: gurny1982
     """    
-    Theor_C_zero_order = k_0*t
+    k_0 = param_column(k_0)
+    Theor_C_zero_order = result_buffer(out, k_0, t)
+    np.multiply(k_0, t, out=Theor_C_zero_order)
     
     return Theor_C_zero_order
 
 
-def C_zero_order_T_lag(k_0, T_lag, t):
+def C_zero_order_T_lag(k_0, T_lag, t, out=None):
     """
-    k_0, T_lag- parameters of the model
+    k_0, T_lag- parameters of the model, scalars or arrays of P values
     t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+    
+    No drug is released before T_lag.
     
     Borodkin S, Tucker FE. Linear drug release from laminated
     hydroxypropyl cellulose-polyvinyl acetate films. J Pharm Sci.1975;64:1289–94.
     bibtexkey: borodkin1975
     """   
-    Theor_C_zero_order_T_lag = k_0*(t - T_lag)
+    k_0, T_lag = param_column(k_0), param_column(T_lag)
+    Theor_C_zero_order_T_lag = lag_time(t, T_lag, out=result_buffer(out, k_0, T_lag, t))
+    np.multiply(k_0, Theor_C_zero_order_T_lag, out=Theor_C_zero_order_T_lag)
     
     return Theor_C_zero_order_T_lag
 
 
-def C_zero_order_F0( k_0, F_0, t):
+def C_zero_order_F0( k_0, F_0, t, out=None):
     """
-    k_0, F_0- parameters of the model
+    k_0, F_0- parameters of the model, scalars or arrays of P values
     t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    out - an optional preallocated np.array for the result, of shape (T,) or (P, T)
+    
     Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
     bibtexkey: costa2001
     """    
-    Theor_C_zero_order_F_0 = F_0 + k_0*t
+    k_0, F_0 = param_column(k_0), param_column(F_0)
+    Theor_C_zero_order_F_0 = result_buffer(out, k_0, F_0, t)
+    np.multiply(k_0, t, out=Theor_C_zero_order_F_0)
+    np.add(Theor_C_zero_order_F_0, F_0, out=Theor_C_zero_order_F_0)
     
     return Theor_C_zero_order_F_0
+
+
+def Jac_C_zero_order(k_0, t):
+    """
+    k_0- parameter of the model, a scalar or an array of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    
+    Returns the analytic partial derivatives of C_zero_order, stacked as [dC/dk_0], of shape (1, T) or (1, P, T).
+    """
+    k_0 = param_column(k_0)
+    shape = np.broadcast_shapes(np.shape(k_0), np.shape(t))
+    return np.array([np.broadcast_to(t, shape)], dtype=float)
+
+
+def Jac_C_zero_order_T_lag(k_0, T_lag, t):
+    """
+    k_0, T_lag- parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    
+    Returns the analytic partial derivatives of C_zero_order_T_lag, stacked as [dC/dk_0, dC/dT_lag],
+    of shape (2, T) or (2, P, T). Before T_lag both derivatives are 0.
+    """
+    k_0, T_lag = param_column(k_0), param_column(T_lag)
+    dC_dk_0 = lag_time(t, T_lag, out=result_buffer(None, k_0, T_lag, t))
+    dC_dT_lag = np.where(dC_dk_0 > 0, -k_0, 0.)
+    return np.stack((dC_dk_0, dC_dT_lag))
+
+
+def Jac_C_zero_order_F0(k_0, F_0, t):
+    """
+    k_0, F_0- parameters of the model, scalars or arrays of P values
+    t - an 1-D np.array of data corresponding to the time elapsed from the beginning of the experiment
+    
+    Returns the analytic partial derivatives of C_zero_order_F0, stacked as [dC/dk_0, dC/dF_0], of shape (2, T) or (2, P, T).
+    """
+    k_0, F_0 = param_column(k_0), param_column(F_0)
+    shape = np.broadcast_shapes(np.shape(k_0), np.shape(F_0), np.shape(t))
+    return np.array([np.broadcast_to(t, shape), np.ones(shape)], dtype=float)
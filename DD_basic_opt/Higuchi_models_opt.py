@@ -6,20 +6,26 @@ Created on Sat Aug 12 01:27:07 2017
 @author: edward
 """
 
-from scipy.optimize import differential_evolution
+from DD_basic_models.Higuchi_models import C_Higuchi, C_Higuchi_T_lag, C_Higuchi_F0
+from DD_basic_opt.hybrid_opt import Find_PAR
 
-def Find_PAR_DEv_Higuchi (Texp, Cexp, k_H_min=0., k_H_max=150.):
+def Find_PAR_DEv_Higuchi (Texp, Cexp, k_H_min=0., k_H_max=150., weights=None, seed=None, full_output=False, recorder=None):
     """
     Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
     Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
     k_H - the optimal Higuchi model parameter
     k_Hmin - an estimated minimal value of the k_H parameter, which defines a boundary for the DEv algorithm
     k_Hmax - an estimated maximal value of the k_H parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
     
-      A differential evolution algorithm ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
-    is used to find an optimal parameter
-    for zero order model by the minimazation of residual sum of squares (RSS) of experimentally estimated 
-    and theoretically calculated values of drug concentration.
+      The Higuchi model is linear in k_H, so the parameter minimizing the (weighted) residual sum of squares (RSS)
+    of experimentally estimated and theoretically calculated values of drug concentration is computed in closed form
+    by weighted least squares (see DD_basic_opt.linear_opt.Find_PAR_linear).
     
     Reference to the Higuchi model:
     Higuchi T. Rate of release of medicaments from ointment bases
@@ -29,18 +35,13 @@ def Find_PAR_DEv_Higuchi (Texp, Cexp, k_H_min=0., k_H_max=150.):
     """
     k_H_bounds= [(k_H_min, k_H_max)]
     
-    def RSS_Higuchi (k_H):
-        
-        Theor_C_Higuchi= k_H*(Texp**0.5)
-        RSSHig= sum((Cexp-Theor_C_Higuchi)**2)
-        
-        return RSSHig
-
-    DEv_result_Hig= differential_evolution(RSS_Higuchi, bounds= k_H_bounds, maxiter=50000, popsize= 25)
+    DEv_result_Hig= Find_PAR(C_Higuchi, Texp, Cexp, k_H_bounds, weights, seed, recorder=recorder)
     PAR_Higuchi={'k_H':DEv_result_Hig.x[0]}
+    if full_output:
+        return PAR_Higuchi, DEv_result_Hig
     return PAR_Higuchi
 
-def Find_PAR_DEv_Higuchi_T_lag (Texp, Cexp, k_H_min=0., k_H_max=150., T_lag_min= 0., T_lag_max= 24.):
+def Find_PAR_DEv_Higuchi_T_lag (Texp, Cexp, k_H_min=0., k_H_max=150., T_lag_min= 0., T_lag_max= 24., weights=None, seed=None, full_output=False, recorder=None):
     """
     Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
     Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
@@ -49,11 +50,16 @@ def Find_PAR_DEv_Higuchi_T_lag (Texp, Cexp, k_H_min=0., k_H_max=150., T_lag_min=
     k_Hmax - an estimated maximal value of the k_H parameter, which defines a boundary for the DEv algorithm
     T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
     T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
     
-      A differential evolution algorithm ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
-    is used to find an optimal parameter
-    for zero order model by the minimazation of residual sum of squares (RSS) of experimentally estimated 
-    and theoretically calculated values of drug concentration.
+      The model is linear in k_H, which is eliminated analytically (variable projection), and the (weighted) residual
+    sum of squares (RSS) of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized over T_lag only (see DD_basic_opt.linear_opt.Find_PAR_varpro).
     
     Reference to the Higuchi with T_lag model:
     
@@ -66,17 +72,13 @@ def Find_PAR_DEv_Higuchi_T_lag (Texp, Cexp, k_H_min=0., k_H_max=150., T_lag_min=
     """
     k_H_T_lag_bounds= [(k_H_min, k_H_max), (T_lag_min, T_lag_max)]
     
-    def RSS_Higuchi_T_lag (k_H, T_lag):
-        Theor_C_HiguchiTlag= k_H*((Texp-T_lag)**0.5)
-        RSSHigTlag= sum((Cexp-Theor_C_HiguchiTlag)**2)
-        
-        return RSSHigTlag
-    
-    DEv_result_Hig_T_lag= differential_evolution(RSS_Higuchi_T_lag, bounds= k_H_T_lag_bounds, maxiter=50000, popsize= 25)
-    PAR_Higuchi_T_lag= {'k_H':DEv_result_Hig_T_lag[0], 'T_lag': DEv_result_Hig_T_lag[1]}
+    DEv_result_Hig_T_lag= Find_PAR(C_Higuchi_T_lag, Texp, Cexp, k_H_T_lag_bounds, weights, seed, recorder=recorder)
+    PAR_Higuchi_T_lag= {'k_H':DEv_result_Hig_T_lag.x[0], 'T_lag': DEv_result_Hig_T_lag.x[1]}
+    if full_output:
+        return PAR_Higuchi_T_lag, DEv_result_Hig_T_lag
     return PAR_Higuchi_T_lag
 
-def Find_PAR_DEv_Higuchi_F0 (Texp, Cexp, k_H_min=0., k_H_max=150., F0_min= 0., F0_max= 24.):
+def Find_PAR_DEv_Higuchi_F0 (Texp, Cexp, k_H_min=0., k_H_max=150., F0_min= 0., F0_max= 24., weights=None, seed=None, full_output=False, recorder=None):
     """
     Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
     Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
@@ -85,11 +87,16 @@ def Find_PAR_DEv_Higuchi_F0 (Texp, Cexp, k_H_min=0., k_H_max=150., F0_min= 0., F
     k_Hmax - an estimated maximal value of the k_H parameter, which defines a boundary for the DEv algorithm
     F0_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
     F0_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
     
-      A differential evolution algorithm ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
-    is used to find an optimal parameter
-    for zero order model by the minimazation of residual sum of squares (RSS) of experimentally estimated 
-    and theoretically calculated values of drug concentration.
+      The model is linear in k_H and F0, so the parameters minimizing the (weighted) residual sum of squares (RSS)
+    of experimentally estimated and theoretically calculated values of drug concentration are computed in closed form
+    by weighted least squares (see DD_basic_opt.linear_opt.Find_PAR_linear).
     
     Reference to the Higuchi with F0 model:
         
@@ -102,13 +109,9 @@ def Find_PAR_DEv_Higuchi_F0 (Texp, Cexp, k_H_min=0., k_H_max=150., F0_min= 0., F
     """
     k_H_T_lag_bounds= [(k_H_min, k_H_max), (F0_min, F0_max)]
     
-    def RSS_Higuchi_F0 (k_H, F0):
-        Theor_C_HiguchiF0= F0+ k_H*(Texp**0.5)
-        RSSHigF0= sum((Cexp-Theor_C_HiguchiF0)**2)
-        
-        return RSSHigF0
-    
-    DEv_result_Hig_F0= differential_evolution(RSS_Higuchi_F0, bounds= k_H_T_lag_bounds, maxiter=50000, popsize= 25)
-    PAR_Higuchi_F0= {'k_H':DEv_result_Hig_F0[0], 'F0': DEv_result_Hig_F0[1]}
+    DEv_result_Hig_F0= Find_PAR(C_Higuchi_F0, Texp, Cexp, k_H_T_lag_bounds, weights, seed, recorder=recorder)
+    PAR_Higuchi_F0= {'k_H':DEv_result_Hig_F0.x[0], 'F0': DEv_result_Hig_F0.x[1]}
+    if full_output:
+        return PAR_Higuchi_F0, DEv_result_Hig_F0
     return PAR_Higuchi_F0
     
\ No newline at end of file
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fitters of the Hixson-Crowell models.
+
+@author: edward
+"""
+
+from DD_basic_models.Hixson_Crowell_model import C_Hixson_Crowell, C_Hixson_Crowell_T_lag
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+def Find_PAR_DEv_Hixson_Crowell (Texp, Cexp, k_HC_min=0., k_HC_max=10., weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_HC - the optimal Hixson-Crowell model parameter
+    k_HC_min - an estimated minimal value of the k_HC parameter, which defines a boundary for the DEv algorithm
+    k_HC_max - an estimated maximal value of the k_HC parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
+
+    Reference to the Hixson-Crowell model:
+    Hixson AW, Crowell JH. Dependence of reaction velocity upon surface and agitation. Ind Eng Chem. 1931;23:923–31.
+
+    bibtexkey: hixson1931"""
+
+
+    k_HC_bounds= [(k_HC_min, k_HC_max)]
+
+    DEv_result_HC = Find_PAR(C_Hixson_Crowell, Texp, Cexp, k_HC_bounds, weights, seed, recorder=recorder)
+    PAR_Hixson_Crowell = {'k_HC': DEv_result_HC.x[0]}
+    if full_output:
+        return PAR_Hixson_Crowell, DEv_result_HC
+    return PAR_Hixson_Crowell
+
+def Find_PAR_DEv_Hixson_Crowell_T_lag (Texp, Cexp, k_HC_min=0., k_HC_max=10., T_lag_min=0., T_lag_max=50, weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_HC, T_lag - the optimal parameters for the Hixson-Crowell model with T_lag
+    k_HC_min - an estimated minimal value of the k_HC parameter, which defines a boundary for the DEv algorithm
+    k_HC_max - an estimated maximal value of the k_HC parameter, which defines a boundary for the DEv algorithm
+    T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
+
+    Reference to the Hixson-Crowell model with T_lag:
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001"""
+
+
+    k_HC_T_lag_bounds= [(k_HC_min, k_HC_max), (T_lag_min, T_lag_max)]
+
+    DEv_result_HCTlag = Find_PAR(C_Hixson_Crowell_T_lag, Texp, Cexp, k_HC_T_lag_bounds, weights, seed, recorder=recorder)
+    PAR_Hixson_Crowell_T_lag = {'k_HC': DEv_result_HCTlag.x[0], 'T_lag': DEv_result_HCTlag.x[1]}
+    if full_output:
+        return PAR_Hixson_Crowell_T_lag, DEv_result_HCTlag
+    return PAR_Hixson_Crowell_T_lag
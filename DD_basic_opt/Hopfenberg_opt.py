@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fitters of the Hopfenberg models.
+
+@author: edward
+"""
+
+from DD_basic_models.Hopfenberg_model import C_Hopfenberg, C_Hopfenberg_T_lag
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+def Find_PAR_DEv_Hopfenberg (Texp, Cexp, k_HB_min=0., k_HB_max=10., n_min=1., n_max=3., weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_HB, n - the optimal parameters for the Hopfenberg model
+    k_HB_min - an estimated minimal value of the k_HB parameter, which defines a boundary for the DEv algorithm
+    k_HB_max - an estimated maximal value of the k_HB parameter, which defines a boundary for the DEv algorithm
+    n_min - an estimated minimal value of the n parameter (1 for a slab), which defines a boundary for the DEv algorithm
+    n_max - an estimated maximal value of the n parameter (3 for a sphere), which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
+
+    Reference to the Hopfenberg model:
+    Hopfenberg HB. Controlled release from erodible slabs, cylinders, and spheres. In: Paul DR, Harris FW, editors.
+    Controlled release polymeric formulations. ACS Symposium Series 33. Washington: American Chemical Society; 1976. p. 26–32.
+
+    bibtexkey: hopfenberg1976"""
+
+
+    k_HB_n_bounds= [(k_HB_min, k_HB_max), (n_min, n_max)]
+
+    DEv_result_HB = Find_PAR(C_Hopfenberg, Texp, Cexp, k_HB_n_bounds, weights, seed, recorder=recorder)
+    PAR_Hopfenberg = {'k_HB': DEv_result_HB.x[0], 'n': DEv_result_HB.x[1]}
+    if full_output:
+        return PAR_Hopfenberg, DEv_result_HB
+    return PAR_Hopfenberg
+
+def Find_PAR_DEv_Hopfenberg_T_lag (Texp, Cexp, k_HB_min=0., k_HB_max=10., n_min=1., n_max=3., T_lag_min=0., T_lag_max=50, weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_HB, n, T_lag - the optimal parameters for the Hopfenberg model with T_lag
+    k_HB_min - an estimated minimal value of the k_HB parameter, which defines a boundary for the DEv algorithm
+    k_HB_max - an estimated maximal value of the k_HB parameter, which defines a boundary for the DEv algorithm
+    n_min - an estimated minimal value of the n parameter (1 for a slab), which defines a boundary for the DEv algorithm
+    n_max - an estimated maximal value of the n parameter (3 for a sphere), which defines a boundary for the DEv algorithm
+    T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
+
+    Reference to the Hopfenberg model with T_lag:
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001"""
+
+
+    k_HB_n_T_lag_bounds= [(k_HB_min, k_HB_max), (n_min, n_max), (T_lag_min, T_lag_max)]
+
+    DEv_result_HBTlag = Find_PAR(C_Hopfenberg_T_lag, Texp, Cexp, k_HB_n_T_lag_bounds, weights, seed, recorder=recorder)
+    PAR_Hopfenberg_T_lag = {'k_HB': DEv_result_HBTlag.x[0], 'n': DEv_result_HBTlag.x[1], 'T_lag': DEv_result_HBTlag.x[2]}
+    if full_output:
+        return PAR_Hopfenberg_T_lag, DEv_result_HBTlag
+    return PAR_Hopfenberg_T_lag
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fitters of the Korsmeyer-Peppas models.
+
+@author: edward
+"""
+
+from DD_basic_models.Korsmeyer_Peppas_model import C_Korsmeyer_Peppas, C_Korsmeyer_Peppas_T_lag, C_Korsmeyer_Peppas_F0
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+def Find_PAR_DEv_Korsmeyer_Peppas (Texp, Cexp, k_KP_min=0., k_KP_max=100., n_min=0.05, n_max=2., weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_KP, n - the optimal parameters for the Korsmeyer-Peppas model
+    k_KP_min - an estimated minimal value of the k_KP parameter, which defines a boundary for the DEv algorithm
+    k_KP_max - an estimated maximal value of the k_KP parameter, which defines a boundary for the DEv algorithm
+    n_min - an estimated minimal value of the n parameter, which defines a boundary for the DEv algorithm
+    n_max - an estimated maximal value of the n parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The model is linear in k_KP, which is eliminated analytically (variable projection), and the (weighted) residual
+    sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized over n only (see DD_basic_opt.linear_opt.Find_PAR_varpro).
+
+    Reference to the Korsmeyer-Peppas model:
+    Korsmeyer RW, Gurny R, Doelker E, Buri P, Peppas NA. Mechanisms of solute release from porous hydrophilic polymers. Int J Pharm. 1983;15:25–35.
+
+    bibtexkey: korsmeyer1983"""
+
+
+    k_KP_n_bounds= [(k_KP_min, k_KP_max), (n_min, n_max)]
+
+    DEv_result_KP = Find_PAR(C_Korsmeyer_Peppas, Texp, Cexp, k_KP_n_bounds, weights, seed, recorder=recorder)
+    PAR_Korsmeyer_Peppas = {'k_KP': DEv_result_KP.x[0], 'n': DEv_result_KP.x[1]}
+    if full_output:
+        return PAR_Korsmeyer_Peppas, DEv_result_KP
+    return PAR_Korsmeyer_Peppas
+
+def Find_PAR_DEv_Korsmeyer_Peppas_T_lag (Texp, Cexp, k_KP_min=0., k_KP_max=100., n_min=0.05, n_max=2., T_lag_min=0., T_lag_max=50, weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_KP, n, T_lag - the optimal parameters for the Korsmeyer-Peppas model with T_lag
+    k_KP_min - an estimated minimal value of the k_KP parameter, which defines a boundary for the DEv algorithm
+    k_KP_max - an estimated maximal value of the k_KP parameter, which defines a boundary for the DEv algorithm
+    n_min - an estimated minimal value of the n parameter, which defines a boundary for the DEv algorithm
+    n_max - an estimated maximal value of the n parameter, which defines a boundary for the DEv algorithm
+    T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The model is linear in k_KP, which is eliminated analytically (variable projection), and the (weighted) residual
+    sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized over n and T_lag only (see DD_basic_opt.linear_opt.Find_PAR_varpro).
+
+    Reference to the Korsmeyer-Peppas model with T_lag:
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001"""
+
+
+    k_KP_n_T_lag_bounds= [(k_KP_min, k_KP_max), (n_min, n_max), (T_lag_min, T_lag_max)]
+
+    DEv_result_KPTlag = Find_PAR(C_Korsmeyer_Peppas_T_lag, Texp, Cexp, k_KP_n_T_lag_bounds, weights, seed, recorder=recorder)
+    PAR_Korsmeyer_Peppas_T_lag = {'k_KP': DEv_result_KPTlag.x[0], 'n': DEv_result_KPTlag.x[1], 'T_lag': DEv_result_KPTlag.x[2]}
+    if full_output:
+        return PAR_Korsmeyer_Peppas_T_lag, DEv_result_KPTlag
+    return PAR_Korsmeyer_Peppas_T_lag
+
+def Find_PAR_DEv_Korsmeyer_Peppas_F0 (Texp, Cexp, k_KP_min=0., k_KP_max=100., n_min=0.05, n_max=2., F0_min=0., F0_max=100., weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_KP, n, F0 - the optimal parameters for the Korsmeyer-Peppas model with F0
+    k_KP_min - an estimated minimal value of the k_KP parameter, which defines a boundary for the DEv algorithm
+    k_KP_max - an estimated maximal value of the k_KP parameter, which defines a boundary for the DEv algorithm
+    n_min - an estimated minimal value of the n parameter, which defines a boundary for the DEv algorithm
+    n_max - an estimated maximal value of the n parameter, which defines a boundary for the DEv algorithm
+    F0_min - an estimated minimal value of the F0 parameter, which defines a boundary for the DEv algorithm
+    F0_max - an estimated maximal value of the F0 parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
+
+    Reference to the Korsmeyer-Peppas model with F0:
+    Kim H, Fassihi R. Application of binary polymer system in drug release rate modulation. 2. Influence of formulation
+    variables and hydrodynamic conditions on release kinetics. J Pharm Sci. 1997;86:323–8.
+
+    bibtexkey: kim1997"""
+
+
+    k_KP_n_F0_bounds= [(k_KP_min, k_KP_max), (n_min, n_max), (F0_min, F0_max)]
+
+    DEv_result_KPF0 = Find_PAR(C_Korsmeyer_Peppas_F0, Texp, Cexp, k_KP_n_F0_bounds, weights, seed, recorder=recorder)
+    PAR_Korsmeyer_Peppas_F0 = {'k_KP': DEv_result_KPF0.x[0], 'n': DEv_result_KPF0.x[1], 'F0': DEv_result_KPF0.x[2]}
+    if full_output:
+        return PAR_Korsmeyer_Peppas_F0, DEv_result_KPF0
+    return PAR_Korsmeyer_Peppas_F0
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fitters of the Weibull models.
+
+@author: edward
+"""
+
+from DD_basic_models.Weibull_model import C_Weibull, C_Weibull_T_lag
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+def Find_PAR_DEv_Weibull (Texp, Cexp, T_d_min=1e-3, T_d_max=100., beta_min=0.1, beta_max=5., weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    T_d, beta - the optimal parameters for the Weibull model
+    T_d_min - an estimated minimal value of the T_d parameter, which defines a boundary for the DEv algorithm
+    T_d_max - an estimated maximal value of the T_d parameter, which defines a boundary for the DEv algorithm
+    beta_min - an estimated minimal value of the beta parameter, which defines a boundary for the DEv algorithm
+    beta_max - an estimated maximal value of the beta parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
+
+    Reference to the Weibull model:
+    Langenbucher F. Linearization of dissolution rate curves by the Weibull distribution. J Pharm Pharmacol. 1972;24:979–81.
+
+    bibtexkey: langenbucher1972"""
+
+
+    T_d_beta_bounds= [(T_d_min, T_d_max), (beta_min, beta_max)]
+
+    DEv_result_W = Find_PAR(C_Weibull, Texp, Cexp, T_d_beta_bounds, weights, seed, recorder=recorder)
+    PAR_Weibull = {'T_d': DEv_result_W.x[0], 'beta': DEv_result_W.x[1]}
+    if full_output:
+        return PAR_Weibull, DEv_result_W
+    return PAR_Weibull
+
+def Find_PAR_DEv_Weibull_T_lag (Texp, Cexp, T_d_min=1e-3, T_d_max=100., beta_min=0.1, beta_max=5., T_lag_min=0., T_lag_max=50, weights=None, seed=None, full_output=False, recorder=None):
+
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    T_d, beta, T_lag - the optimal parameters for the Weibull model with T_lag
+    T_d_min - an estimated minimal value of the T_d parameter, which defines a boundary for the DEv algorithm
+    T_d_max - an estimated maximal value of the T_d parameter, which defines a boundary for the DEv algorithm
+    beta_min - an estimated minimal value of the beta parameter, which defines a boundary for the DEv algorithm
+    beta_max - an estimated maximal value of the beta parameter, which defines a boundary for the DEv algorithm
+    T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
+
+    Reference to the Weibull model with T_lag:
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001"""
+
+
+    T_d_beta_T_lag_bounds= [(T_d_min, T_d_max), (beta_min, beta_max), (T_lag_min, T_lag_max)]
+
+    DEv_result_WTlag = Find_PAR(C_Weibull_T_lag, Texp, Cexp, T_d_beta_T_lag_bounds, weights, seed, recorder=recorder)
+    PAR_Weibull_T_lag = {'T_d': DEv_result_WTlag.x[0], 'beta': DEv_result_WTlag.x[1], 'T_lag': DEv_result_WTlag.x[2]}
+    if full_output:
+        return PAR_Weibull_T_lag, DEv_result_WTlag
+    return PAR_Weibull_T_lag
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch fitting of many dissolution profiles with many models over a process pool.
+
+@author: edward
+"""
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import product
+import os
+import numpy as np
+from DD_basic_opt.instrumentation import Fit_recorder
+
+
+def Batch_jobs(profiles, fitters, **fit_options):
+    """
+    profiles - a dict {profile name: (Texp, Cexp)}
+    fitters - a list of fitters, e.g. [Find_PAR_DEv_first_order, Find_PAR_DEv_Higuchi]
+    fit_options - keyword arguments passed to every fitter (bounds, weights, recorder, ...)
+
+    Returns the list of (job_id, fitter, Texp, Cexp, fit_options) jobs for every (profile, fitter) pair,
+    with job_id = (profile name, fitter name), ready for Fit_batch.
+    """
+    return [((name, fitter.__name__), fitter, Texp, Cexp, fit_options)
+            for (name, (Texp, Cexp)), fitter in product(profiles.items(), fitters)]
+
+
+def _fit_chunk(chunk):
+    """
+    Runs the fits of one chunk of jobs in a worker process; the jobs with recorded=True are fitted with a fresh
+    Fit_recorder whose records are sent back with the result.
+    """
+    results = []
+    for index, job_id, fitter, Texp, Cexp, fit_options, seed, recorded in chunk:
+        recorder = Fit_recorder() if recorded else None
+        if recorded:
+            fit_options = dict(fit_options, recorder=recorder)
+        PAR, Result = fitter(np.asarray(Texp, dtype=float), np.asarray(Cexp, dtype=float),
+                             seed=seed, full_output=True, **fit_options)
+        results.append((index, job_id, PAR, Result, recorder.records if recorded else []))
+    return results
+
+
+def _collect(results, recorders):
+    """
+    Adds the records of the fits of a chunk to the recorders of their jobs and yields the (job_id, PAR, Result) results.
+    """
+    for index, job_id, PAR, Result, records in results:
+        if records:
+            recorders[index].extend(records)
+        yield job_id, PAR, Result
+
+
+def Fit_batch(jobs, max_workers=None, chunksize=4, seed=None):
+    """
+    jobs - a sequence of (job_id, fitter, Texp, Cexp) or (job_id, fitter, Texp, Cexp, fit_options) jobs, see Batch_jobs;
+    the fitters are the module level Find_PAR_DEv_* functions (or any function with their signature)
+    max_workers - number of worker processes, os.cpu_count() by default; with max_workers=1 the jobs run in this process
+    chunksize - number of jobs sent to a worker at once, which amortizes the inter-process communication
+    seed - the root seed; every job gets its own seed spawned from it by its position in jobs, so a batch
+    gives the same results whatever the scheduling, the number of workers or the chunk size
+
+    A generator yielding (job_id, PAR, Result) - the fitted parameters and the scipy OptimizeResult of the fit -
+    as the chunks complete, i.e. not in the order of jobs. At most two chunks per worker are submitted at a time,
+    so the results of long job lists stream back while the remaining chunks wait outside the pool.
+    A Fit_recorder given in the fit_options of a job is not sent to the workers: the job is recorded in its
+    worker and the records are added to the recorder (see Fit_recorder.extend) when its result is yielded.
+    """
+    jobs = [tuple(job) if len(job) == 5 else tuple(job) + ({},) for job in jobs]
+    recorders = [job[4].get('recorder') for job in jobs]
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(jobs))]
+    jobs = [(index,) + job[:4] + ({name: value for name, value in job[4].items() if name != 'recorder'},
+                                  job_seed, recorder is not None)
+            for index, (job, job_seed, recorder) in enumerate(zip(jobs, seeds, recorders))]
+    chunks = [jobs[i:i+chunksize] for i in range(0, len(jobs), chunksize)]
+
+    if max_workers == 1:
+        for chunk in chunks:
+            yield from _collect(_fit_chunk(chunk), recorders)
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        max_pending = 2*max_workers
+        chunks = iter(chunks)
+        pending = set()
+        while True:
+            for chunk in chunks:
+                pending.add(executor.submit(_fit_chunk, chunk))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from _collect(future.result(), recorders)
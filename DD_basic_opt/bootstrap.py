@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bootstrap confidence intervals of the DD model parameters: all replicates are fitted at once
+by a batched, warm-started Levenberg-Marquardt iteration with the analytic Jacobians.
+
+@author: edward
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.optimize import OptimizeResult
+from DD_basic_models.registry import model_of
+from DD_basic_opt.hybrid_opt import Find_PAR
+from DD_basic_opt.local_opt import Find_PAR_local
+
+
+def Bootstrap_replicates(Texp, Cexp, C_fit, B, method='residual', weights=None, rng=None):
+    """
+    Texp, Cexp - 1-D np.arrays of the experimental times and drug concentrations
+    C_fit - the fitted model at Texp
+    B - the number of replicates
+    method - 'residual': C_fit plus the residuals Cexp - C_fit resampled with replacement, at the times Texp;
+             'case': the (time, concentration) points resampled with replacement
+    weights - an optional 1-D np.array of weights of the experimental points, resampled with the points in 'case'
+    rng - a np.random.Generator or a seed
+
+    Returns the replicates (Texp_B, Cexp_B, weights_B): Cexp_B of shape (B, T), Texp_B of shape (T,) for
+    'residual' and (B, T) for 'case', weights_B of the shape of Texp_B (or None).
+
+    Efron B, Tibshirani RJ. An Introduction to the Bootstrap. Chapman & Hall; 1993.
+
+    bibtexkey: efron1993
+    """
+    rng = np.random.default_rng(rng)
+    Texp = np.asarray(Texp, dtype=float)
+    Cexp = np.asarray(Cexp, dtype=float)
+    index = rng.integers(0, Cexp.size, size=(B, Cexp.size))
+    if method == 'residual':
+        residuals = Cexp - C_fit
+        return Texp, C_fit + residuals[index], weights
+    if method == 'case':
+        weights_B = None if weights is None else np.asarray(weights, dtype=float)[index]
+        return Texp[index], Cexp[index], weights_B
+    raise ValueError("method has to be 'residual' or 'case', not %r" % (method,))
+
+
+def Fit_replicates(C_model, Texp_B, Cexp_B, bounds, x0, weights_B=None, tol=1e-10, max_iter=200):
+    """
+    C_model - a model function from DD_basic_models, registered with its analytic Jacobian in DD_basic_models.registry
+    Texp_B - the times, of shape (T,) shared by all replicates or (B, T)
+    Cexp_B - the drug concentrations of the B replicates, of shape (B, T)
+    bounds - a list of (min, max) pairs, one for every model parameter
+    x0 - the starting parameters of all replicates, usually the point estimate
+    weights_B - optional weights of the points, of the shape of Texp_B
+    tol - the relative change of the RSS and of the parameters which stops the iteration of a replicate
+    max_iter - the cap on the number of batched iterations
+
+      The B least squares problems are solved together: every iteration evaluates the model and its analytic
+    Jacobian for all the active replicates in one call and solves the B damped normal equations
+    (J^T J + lambda diag(J^T J)) delta = -J^T r as one stack; the damping lambda of every replicate is
+    adapted separately (Levenberg-Marquardt) and the steps are projected onto the bounds.
+    The replicates not converged after max_iter, stalled (e.g. with T_lag on a kink of the RSS at an
+    experimental time) or which took a step clipped by the bounds are refined one by one by Find_PAR_local,
+    whose trust region method handles the active bounds; after a clipped step the refinement is also restarted
+    from x0 and the better fit is kept, since the clipped step may have left the basin of the minimum.
+
+    Returns the fitted parameters (B, n_params), the weighted RSS (B,) and the convergence mask (B,).
+    """
+    Cexp_B = np.asarray(Cexp_B, dtype=float)
+    B, T = Cexp_B.shape
+    Texp_B = np.asarray(Texp_B, dtype=float)
+    sw_B = np.ones((1, T)) if weights_B is None else np.sqrt(np.asarray(weights_B, dtype=float)).reshape(-1, T)
+    Jac_model = model_of(C_model).Jac_model
+    lb, ub = np.array(bounds, dtype=float).T
+    n_PAR = lb.size
+
+    def rows(array, active):
+        return array if array.ndim == 1 or array.shape[0] == 1 else array[active]
+
+    def residuals(X, active):
+        return rows(sw_B, active)*(C_model(*X[:, :, np.newaxis], rows(Texp_B, active)) - Cexp_B[active])
+
+    X = np.tile(np.clip(np.asarray(x0, dtype=float), lb, ub)[:, np.newaxis], (1, B))
+    active = np.arange(B)
+    r = residuals(X, active)
+    RSS = np.einsum('bt,bt->b', r, r)
+    damping = np.full(B, 1e-3)
+    converged = np.zeros(B, dtype=bool)
+    hit_bound = np.zeros(B, dtype=bool)
+    refine = []
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        Xa = X[:, active]
+        J = np.broadcast_to(Jac_model(*Xa[:, :, np.newaxis], rows(Texp_B, active)), (n_PAR,) + r.shape)
+        J = J*rows(sw_B, active)
+        JTJ = np.einsum('ibt,jbt->bij', J, J)
+        gradient = np.einsum('ibt,bt->bi', J, r)
+        diagonal = np.einsum('bii->bi', JTJ)
+        scale = diagonal + 1e-12*(diagonal.max(axis=1, keepdims=True) + 1e-300)
+        A = JTJ + (damping[active, np.newaxis]*scale)[:, :, np.newaxis]*np.eye(n_PAR)
+        delta = np.linalg.solve(A, -gradient[:, :, np.newaxis])[:, :, 0]
+
+        X_step = Xa + delta.T
+        X_trial = np.clip(X_step, lb[:, np.newaxis], ub[:, np.newaxis])
+        clipped = np.any(X_trial != X_step, axis=0)
+        r_trial = residuals(X_trial, active)
+        RSS_trial = np.einsum('bt,bt->b', r_trial, r_trial)
+        accept = RSS_trial <= RSS[active]
+        step = np.abs(delta.T).max(axis=0) <= tol*(np.abs(Xa).max(axis=0) + tol)
+        decrease = RSS[active] - RSS_trial <= tol*RSS[active]
+
+        accepted = active[accept]
+        X[:, accepted] = X_trial[:, accept]
+        RSS[accepted] = RSS_trial[accept]
+        r[accept] = r_trial[accept]
+        hit_bound[active[accept & clipped]] = True
+        damping[accepted] /= 3
+        damping[active[~accept]] *= 2
+
+        # a stop with a strong damping is a stall on a kink of the RSS rather than a minimum, and a stop after a step
+        # clipped by the bounds may be a corner with a nonzero projected gradient or a flat plateau beyond the data
+        stop = accept & (decrease | step)
+        done = stop & (damping[active] <= 1) & ~hit_bound[active]
+        stalled = stop & ~done | (damping[active] > 1e8)
+        converged[active[done]] = True
+        refine.extend(active[stalled])
+        r = r[~(done | stalled)]
+        active = active[~(done | stalled)]
+
+    for b in refine + list(active):
+        Texp_b = rows(Texp_B, [b]).reshape(-1)
+        weights_b = None if weights_B is None else rows(np.asarray(weights_B, dtype=float).reshape(-1, T), [b]).reshape(-1)
+        local_result = Find_PAR_local(C_model, Texp_b, Cexp_B[b], bounds, X[:, b], weights_b, tol)
+        if hit_bound[b]:
+            restart = Find_PAR_local(C_model, Texp_b, Cexp_B[b], bounds, x0, weights_b, tol)
+            if restart.fun < local_result.fun:
+                local_result = restart
+        X[:, b], RSS[b], converged[b] = local_result.x, local_result.fun, local_result.success
+    return X.T, RSS, converged
+
+
+def _fit_chunk(chunk):
+    """
+    Fits one chunk of replicates in a worker process.
+    """
+    C_model, Texp_B, Cexp_B, bounds, x0, weights_B, tol = chunk
+    return Fit_replicates(C_model, Texp_B, Cexp_B, bounds, x0, weights_B, tol)
+
+
+def Bootstrap_PAR(C_model, Texp, Cexp, bounds=None, B=1000, method='residual', alpha=0.05, weights=None,
+                  seed=None, x0=None, max_workers=1, chunk_size=250, tol=1e-10):
+    """
+    C_model - a model function from DD_basic_models, registered with its analytic Jacobian in DD_basic_models.registry
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    bounds - a list of (min, max) pairs, one for every model parameter, the registry defaults by default
+    B - the number of bootstrap replicates
+    method - 'residual' or 'case' resampling, see Bootstrap_replicates
+    alpha - the confidence intervals are the alpha/2 and 1 - alpha/2 percentiles of the replicates
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - seed of the point estimate and of the resampling, for reproducible intervals
+    x0 - an optional point estimate (e.g. the x of a previous fit); fitted by DD_basic_opt.hybrid_opt.Find_PAR if None
+    max_workers - the replicates are fitted in chunks of chunk_size, on max_workers processes if max_workers > 1
+    tol - the tolerance of the replicate fits
+
+    All replicates start from the point estimate (warm start) and are fitted by Fit_replicates.
+
+    Returns a scipy OptimizeResult with the point estimate x and PAR (a dict), the replicate parameters
+    replicates (B, n_params) and their RSS, the percentile intervals ci (a dict {name: (low, high)}),
+    the bootstrap covariance cov and standard errors std of the parameters and the fraction of converged replicates.
+    """
+    model = model_of(C_model)
+    bounds = model.bounds if bounds is None else bounds
+    Texp = np.asarray(Texp, dtype=float)
+    Cexp = np.asarray(Cexp, dtype=float)
+    seed_fit, seed_resampling = np.random.SeedSequence(seed).spawn(2)
+    if x0 is None:
+        x0 = Find_PAR(C_model, Texp, Cexp, bounds, weights, seed=int(seed_fit.generate_state(1)[0])).x
+    x0 = np.asarray(x0, dtype=float)
+
+    Texp_B, Cexp_B, weights_B = Bootstrap_replicates(Texp, Cexp, C_model(*x0, Texp), B, method, weights,
+                                                     np.random.default_rng(seed_resampling))
+    chunks = []
+    for start in range(0, B, chunk_size):
+        part = slice(start, start+chunk_size)
+        Texp_chunk = Texp_B if Texp_B.ndim == 1 else Texp_B[part]
+        weights_chunk = weights_B if weights_B is None or weights_B.ndim == 1 else weights_B[part]
+        chunks.append((C_model, Texp_chunk, Cexp_B[part], bounds, x0, weights_chunk, tol))
+    if max_workers == 1 or len(chunks) == 1:
+        results = [_fit_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_fit_chunk, chunks))
+    replicates = np.concatenate([result[0] for result in results])
+    RSS = np.concatenate([result[1] for result in results])
+    converged = np.concatenate([result[2] for result in results])
+
+    low, high = np.percentile(replicates, [100*alpha/2, 100*(1 - alpha/2)], axis=0)
+    cov = np.atleast_2d(np.cov(replicates, rowvar=False))
+    return OptimizeResult(x=x0, PAR=dict(zip(model.PAR_names, x0)), replicates=replicates, RSS=RSS,
+                          ci={name: (low[i], high[i]) for i, name in enumerate(model.PAR_names)},
+                          cov=cov, std=np.sqrt(np.diag(cov)), converged=converged.mean())
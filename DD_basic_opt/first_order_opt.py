@@ -6,10 +6,10 @@ Created on Thu Aug 10 17:56:23 2017
 @author: edward
 """
 
-from scipy.optimize import differential_evolution
-import numpy as np
+from DD_basic_models.first_order_model import C_first_order, C_first_order_T_lag, C_first_order_F_max, C_first_order_F_max_T_lag
+from DD_basic_opt.hybrid_opt import Find_PAR
 
-def Find_PAR_DEv_first_order (Texp, Cexp, k_1min=0., k_1max=100.):
+def Find_PAR_DEv_first_order (Texp, Cexp, k_1min=0., k_1max=100., weights=None, seed=None, full_output=False, recorder=None):
     
     """
     Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
@@ -17,10 +17,17 @@ def Find_PAR_DEv_first_order (Texp, Cexp, k_1min=0., k_1max=100.):
     k_1 - the optimal first order model parameter
     k_1min - an estimated minimal value of the k_1 parameter, which defines a boundary for the DEv algorithm
     k_1max - an estimated maximal value of the k_1 parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
        
-       A differential evolution algorithm ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
-    is used to find an optimal parameter for zero order model by the minimazation of residual sum of squares RSS of experimentally estimated 
-    and theoretically calculated values of drug concentration.
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
     
     Reference to the first order model:
     Polli JE, Rekhi GS, Augsburger LL, Shah VP. Methods to compare dissolution profiles and a rationale for wide dissolution specifications for metoprolol
@@ -31,17 +38,13 @@ def Find_PAR_DEv_first_order (Texp, Cexp, k_1min=0., k_1max=100.):
     
     k_1_bounds= [(k_1min, k_1max)]
     
-    def RSS_FO (k_1):
-        
-        Theor_C_first_order = 100*(1-np.exp(-k_1*Texp))
-        RSSFO= sum((Cexp-Theor_C_first_order)**2)
-        return RSSFO
-    
-    DEv_result_FO = differential_evolution(RSS_FO, bounds = k_1_bounds , maxiter=10000)
+    DEv_result_FO = Find_PAR(C_first_order, Texp, Cexp, k_1_bounds, weights, seed, recorder=recorder)
     PAR_First_order = {'k_1': DEv_result_FO.x[0]}
+    if full_output:
+        return PAR_First_order, DEv_result_FO
     return PAR_First_order
 
-def Find_PAR_DEv_first_order_T_lag (Texp, Cexp, k_1min=0., k_1max=100., T_lag_min=0., T_lag_max=50):
+def Find_PAR_DEv_first_order_T_lag (Texp, Cexp, k_1min=0., k_1max=100., T_lag_min=0., T_lag_max=50, weights=None, seed=None, full_output=False, recorder=None):
     
     """
     Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
@@ -51,10 +54,17 @@ def Find_PAR_DEv_first_order_T_lag (Texp, Cexp, k_1min=0., k_1max=100., T_lag_mi
     k_1max - an estimated maximal value of the k_1 parameter, which defines a boundary for the DEv algorithm
     T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
     T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
        
-       A differential evolution algorithm ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
-    is used to find an optimal parameter for zero order model by the minimazation of residual sum of squares RSS of experimentally estimated 
-    and theoretically calculated values of drug concentration.
+       The residual sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized by the hybrid engine DD_basic_opt.hybrid_opt.Find_PAR_hybrid: a short differential evolution run
+    ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html ) followed by
+    trust region steps with the analytic Jacobian of the model, stopped on tolerance.
     
     Reference to the first order model with T_lag:
     Phaechamud T, Pitaksantayothin K, Kositwattanakoon P, Seehapong P, Jungvivatanavong S.
@@ -65,17 +75,13 @@ def Find_PAR_DEv_first_order_T_lag (Texp, Cexp, k_1min=0., k_1max=100., T_lag_mi
     
     k_1_T_lag_bounds= [(k_1min, k_1max), (T_lag_min, T_lag_max)]
     
-    def RSS_FO_T_lag (XFOTlag):
-        
-        Theor_C_First_order_T_lag = 100*(1- np.exp(-XFOTlag[0] * (Texp- XFOTlag[1])))
-        RSSFOTLAG = sum((Cexp -Theor_C_First_order_T_lag)**2)
-        return RSSFOTLAG
-    
-    DEv_result_FOTlag = differential_evolution(RSS_FO_T_lag, bounds = k_1_T_lag_bounds , maxiter=10000)
+    DEv_result_FOTlag = Find_PAR(C_first_order_T_lag, Texp, Cexp, k_1_T_lag_bounds, weights, seed, recorder=recorder)
     PAR_First_order_T_lag = {'k_1': DEv_result_FOTlag.x[0], 'T_lag': DEv_result_FOTlag.x[1]}
+    if full_output:
+        return PAR_First_order_T_lag, DEv_result_FOTlag
     return PAR_First_order_T_lag
 
-def Find_PAR_DEv_first_order_F_max (Texp, Cexp, k_1min=0., k_1max=100., F_max_min=0., F_max_max=1000):
+def Find_PAR_DEv_first_order_F_max (Texp, Cexp, k_1min=0., k_1max=100., F_max_min=0., F_max_max=1000, weights=None, seed=None, full_output=False, recorder=None):
     
     """
     Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
@@ -85,11 +91,16 @@ def Find_PAR_DEv_first_order_F_max (Texp, Cexp, k_1min=0., k_1max=100., F_max_mi
     k_1max - an estimated maximal value of the k_1 parameter, which defines a boundary for the DEv algorithm
     F_max_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
     F_max_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
        
-       A differential evolution algorithm ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
-    is used to find an optimal parameter
-    for zero order model by the minimazation of residual sum of squares RSS of experimentally estimated 
-    and theoretically calculated values of drug concentration.
+       The model is linear in F_max, which is eliminated analytically (variable projection), and the (weighted) residual
+    sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized over k_1 only (see DD_basic_opt.linear_opt.Find_PAR_varpro).
     
     Reference to the first order model with F_max :
     Tsong Y, Hammerstrom T, Chen JJ. Multipoint dissolution specification and 
@@ -101,17 +112,13 @@ def Find_PAR_DEv_first_order_F_max (Texp, Cexp, k_1min=0., k_1max=100., F_max_mi
     
     k_1_F_max_bounds= [(k_1min, k_1max), (F_max_min, F_max_max)]
     
-    def RSS_FO_F_max (XFOFmax):
-        
-        Theor_C_First_order_F_max = XFOFmax[1]*(1- np.exp(-XFOFmax[0] * Texp))
-        RSSFOFmax = sum((Cexp -Theor_C_First_order_F_max)**2)
-        return RSSFOFmax
-    
-    DEv_result_FOFmax = differential_evolution(RSS_FO_F_max, bounds = k_1_F_max_bounds , maxiter=10000)
+    DEv_result_FOFmax = Find_PAR(C_first_order_F_max, Texp, Cexp, k_1_F_max_bounds, weights, seed, recorder=recorder)
     PAR_First_order_F_max = {'k_1': DEv_result_FOFmax.x[0], 'F_max': DEv_result_FOFmax.x[1]}
+    if full_output:
+        return PAR_First_order_F_max, DEv_result_FOFmax
     return PAR_First_order_F_max
 
-def Find_PAR_DEv_first_order_F_max_T_lag (Texp, Cexp, k_1min=0., k_1max=100., F_max_min=0., F_max_max=1000, T_lag_min=0., T_lag_max=50):
+def Find_PAR_DEv_first_order_F_max_T_lag (Texp, Cexp, k_1min=0., k_1max=100., F_max_min=0., F_max_max=1000, T_lag_min=0., T_lag_max=50, weights=None, seed=None, full_output=False, recorder=None):
     
     """
     Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
@@ -123,10 +130,16 @@ def Find_PAR_DEv_first_order_F_max_T_lag (Texp, Cexp, k_1min=0., k_1max=100., F_
     F_max_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
     T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the DEv algorithm
     T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the DEv algorithm
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
        
-       A differential evolution algorithm ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
-    is used to find an optimal parameter for zero order model by the minimazation of residual sum of squares RSS of experimentally estimated 
-    and theoretically calculated values of drug concentration.
+       The model is linear in F_max, which is eliminated analytically (variable projection), and the (weighted) residual
+    sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized over k_1 and T_lag only (see DD_basic_opt.linear_opt.Find_PAR_varpro).
     
     Reference to the first order model with Fmax and Tlag:
      Berry MR, Likar MD. Statistical assessment of dissolution and drug release profile similarity using a model-dependent approach. J Pharm Biomed Anal. 
@@ -137,12 +150,8 @@ def Find_PAR_DEv_first_order_F_max_T_lag (Texp, Cexp, k_1min=0., k_1max=100., F_
     
     k_1_F_max_T_lag_bounds= [(k_1min, k_1max), (F_max_min, F_max_max), (T_lag_min, T_lag_max)]
     
-    def RSS_FO_F_max_T_lag (XFOFmaxTlag):
-        
-        Theor_C_First_order_F_max_T_lag = XFOFmaxTlag[1]*(1- np.exp(-XFOFmaxTlag[0] * (Texp- XFOFmaxTlag[2])))
-        RSSFOFmaxTlag = sum((Cexp -Theor_C_First_order_F_max_T_lag)**2)
-        return RSSFOFmaxTlag
-    
-    DEv_result_FOFmaxTlag = differential_evolution(RSS_FO_F_max_T_lag, bounds = k_1_F_max_T_lag_bounds , maxiter=50000, popsize= 25)
+    DEv_result_FOFmaxTlag = Find_PAR(C_first_order_F_max_T_lag, Texp, Cexp, k_1_F_max_T_lag_bounds, weights, seed, recorder=recorder)
     PAR_First_order_F_max_T_lag = {'k_1': DEv_result_FOFmaxTlag.x[0], 'F_max': DEv_result_FOFmaxTlag.x[1], 'T_lag': DEv_result_FOFmaxTlag.x[2] }
+    if full_output:
+        return PAR_First_order_F_max_T_lag, DEv_result_FOFmaxTlag
     return PAR_First_order_F_max_T_lag
\ No newline at end of file
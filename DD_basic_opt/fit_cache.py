@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent, content-addressed cache of fit results with an in-process hot tier.
+
+@author: edward
+"""
+
+from collections import OrderedDict
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from scipy.optimize import OptimizeResult
+from DD_basic_opt.hybrid_opt import Engine_settings
+
+
+def _to_json(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
+
+
+def _resolved_options(fitter, fit_options):
+    """
+    Returns the options of a call of fitter with its defaults filled in (the bounds not given, weights, ...),
+    without the seed, full_output and recorder arguments.
+    """
+    try:
+        parameters = inspect.signature(fitter).parameters.values()
+    except (TypeError, ValueError):
+        parameters = []
+    options = {parameter.name: parameter.default for parameter in parameters
+               if parameter.default is not inspect.Parameter.empty and parameter.kind is not inspect.Parameter.POSITIONAL_ONLY}
+    options.update(fit_options)
+    for name in ('seed', 'full_output', 'recorder'):
+        options.pop(name, None)
+    return options
+
+
+def Fit_key(fitter, Texp, Cexp, seed=None, **fit_options):
+    """
+    fitter - a Find_PAR_DEv_* fitter (or any function with their signature)
+    Texp, Cexp - the experimental times and drug concentrations
+    seed - the seed of the fit
+    fit_options - the other keyword arguments of the fitter (bounds, weights, ...); a recorder does not change
+    the fit and is left out of the key
+
+    Returns the SHA-256 key of a fit: a hash of the fitter identity, the settings of the fitting engine
+    (see DD_basic_opt.hybrid_opt.Engine_settings), the bytes of Texp and Cexp, the options with the defaults
+    of the fitter filled in (arrays such as weights by their bytes) and the seed. A change of the engine settings
+    or of the default bounds of a fitter thus invalidates the cached fits, and a bound given at its default value
+    gives the same key as the default.
+    """
+    digest = hashlib.sha256()
+    digest.update(('%s.%s' % (fitter.__module__, fitter.__qualname__)).encode())
+    digest.update(json.dumps(_to_json(Engine_settings()), sort_keys=True).encode())
+    for data in (Texp, Cexp):
+        digest.update(np.ascontiguousarray(data, dtype=float).tobytes())
+        digest.update(b'|')
+    fit_options = _resolved_options(fitter, fit_options)
+    for name in sorted(fit_options):
+        value = fit_options[name]
+        digest.update(name.encode())
+        if isinstance(value, np.ndarray):
+            digest.update(np.ascontiguousarray(value, dtype=float).tobytes())
+        else:
+            digest.update(json.dumps(_to_json(value), sort_keys=True).encode())
+    digest.update(json.dumps(_to_json(seed)).encode())
+    return digest.hexdigest()
+
+
+class Fit_cache:
+    """
+    directory - the directory of the persistent tier, one JSON file per fit result
+    max_bytes - the size bound of the persistent tier; the least recently used results are evicted beyond it
+    hot_size - the number of results kept in memory (least recently used ones are dropped first)
+
+    The hits and misses counters report the effectiveness of the cache.
+    """
+
+    def __init__(self, directory, max_bytes=64*2**20, hot_size=1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hot_size = hot_size
+        self.hot = OrderedDict()
+        self.hits = self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(f) for f in self._files())
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith('.json'):
+                    yield os.path.join(root, name)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _remember(self, key, entry):
+        self.hot[key] = entry
+        self.hot.move_to_end(key)
+        while len(self.hot) > self.hot_size:
+            self.hot.popitem(last=False)
+
+    def get(self, key):
+        """
+        Returns a copy of the cached entry {'PAR': ..., 'Result': ...} of key, or None.
+        A hit marks the result as recently used in the persistent tier too, which orders the eviction.
+        """
+        path = self._path(key)
+        if key in self.hot:
+            self.hot.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return copy.deepcopy(self.hot[key])
+        try:
+            with open(path) as input_file:
+                stored = json.load(input_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        entry = {'PAR': stored['PAR'], 'Result': OptimizeResult(stored['Result'])}
+        entry['Result'].x = np.array(entry['Result'].x)
+        self._remember(key, entry)
+        self.hits += 1
+        return copy.deepcopy(entry)
+
+    def put(self, key, PAR, Result, **diagnostics):
+        """
+        Stores the parameters PAR and the OptimizeResult Result of a fit, with optional extra diagnostics.
+        """
+        Result = OptimizeResult(Result, **diagnostics)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            self._size -= os.path.getsize(path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as output_file:
+            json.dump({'PAR': _to_json(PAR), 'Result': _to_json(dict(Result))}, output_file)
+        os.replace(tmp_path, path)
+        self._size += os.path.getsize(path)
+        self._remember(key, copy.deepcopy({'PAR': dict(PAR), 'Result': Result}))
+        if self._size > self.max_bytes:
+            self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        """
+        Removes the least recently used results, except the one of key keep, until the persistent tier is below 90% of max_bytes.
+        """
+        by_age = sorted(self._files(), key=os.path.getmtime)
+        for path in by_age:
+            if self._size <= 0.9*self.max_bytes:
+                break
+            if os.path.basename(path)[:-5] == keep:
+                continue
+            self._size -= os.path.getsize(path)
+            os.remove(path)
+            self.hot.pop(os.path.basename(path)[:-5], None)
+
+    def clear(self):
+        for path in list(self._files()):
+            os.remove(path)
+        self.hot.clear()
+        self._size = 0
+
+
+def Cached_fit(cache, fitter, Texp, Cexp, seed=None, full_output=False, **fit_options):
+    """
+    cache - a Fit_cache
+    fitter - a Find_PAR_DEv_* fitter
+    Texp, Cexp, seed, full_output, fit_options - the arguments of the fitter, the bounds given as keywords
+
+    Returns the result of fitter(Texp, Cexp, seed=seed, full_output=full_output, **fit_options), from the cache
+    when the same fit (see Fit_key) was done before. A new fit is stored with its wall time in the diagnostics.
+    Note that a fit with seed=None is cached too: later calls return its result instead of a new random run.
+    A recorder given in fit_options is passed on to the fitter, so it records the fits actually run;
+    nothing is recorded for a result served from the cache.
+    """
+    key = Fit_key(fitter, Texp, Cexp, seed, **fit_options)
+    entry = cache.get(key)
+    if entry is None:
+        start = time.perf_counter()
+        PAR, Result = fitter(Texp, Cexp, seed=seed, full_output=True, **fit_options)
+        Result = OptimizeResult(Result, wall_time=time.perf_counter() - start)
+        cache.put(key, PAR, Result)
+        entry = {'PAR': dict(PAR), 'Result': Result}
+    if full_output:
+        return entry['PAR'], entry['Result']
+    return entry['PAR']
+
+
+def Cached_fitter(cache, fitter):
+    """
+    Returns fitter wrapped by Cached_fit with the given cache, with the fitter's call signature.
+    """
+    @functools.wraps(fitter)
+    def wrapper(Texp, Cexp, seed=None, full_output=False, **fit_options):
+        return Cached_fit(cache, fitter, Texp, Cexp, seed, full_output, **fit_options)
+    return wrapper
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unified fitting engine for the DD models: a short global stage followed by a gradient-based
+local refinement with analytic Jacobians, stopping on tolerance instead of an iteration cap.
+
+@author: edward
+"""
+
+import inspect
+import numpy as np
+from scipy.optimize import differential_evolution, OptimizeResult
+from DD_basic_models.registry import model_of
+from DD_basic_opt.objective import RSS_population, DEv_vectorized_options
+from DD_basic_opt.instrumentation import fit_record, phase
+from DD_basic_opt.local_opt import Find_PAR_local, Find_PAR_lag_local, lag_index, lag_bounds
+from DD_basic_opt.linear_opt import is_linear, is_separable, Find_PAR_linear, Find_PAR_varpro
+
+# version of the fitting engine, to be increased whenever a change of its internals (grid sizes, stopping rules, ...)
+# or of the model kernels changes the results of the fits; it is part of the keys of the cached fits
+# (see DD_basic_opt.fit_cache.Fit_key), which also hold the default bounds of the fitters
+ENGINE_VERSION = 4
+
+
+def Engine_settings():
+    """
+    Returns the settings of the fitting engine which determine the result of a fit: ENGINE_VERSION, the default
+    options of Find_PAR_hybrid, Find_PAR_varpro and Find_PAR_local and the chunk size of the grid search.
+    """
+    from DD_basic_opt import linear_opt
+    settings = {'version': ENGINE_VERSION, 'chunk_elements': linear_opt.chunk_elements}
+    for function in (Find_PAR_hybrid, Find_PAR_varpro, Find_PAR_local):
+        settings[function.__name__] = {name: parameter.default for name, parameter in inspect.signature(function).parameters.items()
+                                       if parameter.default is not inspect.Parameter.empty and name not in ('weights', 'seed', 'recorder')}
+    return settings
+
+
+def Find_PAR_hybrid(C_model, Texp, Cexp, bounds, weights=None, popsize=10, global_maxiter=30, seed=None, tol=1e-10, recorder=None):
+    """
+    C_model - a model function from DD_basic_models, registered with its analytic Jacobian in DD_basic_models.registry
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    bounds - a list of (min, max) pairs, one for every model parameter
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    popsize, global_maxiter - population size multiplier and generation cap of the global stage
+    seed - seed of the global stage, for reproducible fits
+    tol - the tolerance which stops the local refinement
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder timing the global and local phases
+    and tracing the best RSS of every generation
+
+      A short, vectorized differential evolution run ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.differential_evolution.html )
+    locates the basin of the RSS minimum and its best member is refined by Find_PAR_local
+    (trust region / Levenberg-Marquardt steps with the analytic Jacobian of the model).
+    For a lagged model the upper bound of T_lag is lowered to the last experimental time (see lag_bounds), a second
+    global run searches the model at the smallest T_lag (the nested model without lag, whose RSS has no plateau
+    of lag times releasing nothing) and both best members are refined by Find_PAR_lag_local, which does not stall
+    where T_lag crosses an experimental time.
+
+    Returns a scipy OptimizeResult with the parameters x, the weighted RSS fun, the total number of
+    objective evaluations nfev (global_nfev + local_nfev), the Jacobian evaluations njev, the iterations nit
+    and the stopping message of the global stage global_message.
+    """
+    RSS = RSS_population(C_model, Texp, Cexp, weights)
+    lag = lag_index(C_model)
+    bounds = lag_bounds(C_model, Texp, bounds)
+    DEv_options = dict(maxiter=global_maxiter, popsize=popsize, tol=1e-2, polish=False, rng=seed, **DEv_vectorized_options)
+    with phase(recorder, 'global'):
+        DEv_result = differential_evolution(RSS, bounds=bounds, callback=None if recorder is None else recorder.generation,
+                                            **DEv_options)
+        starts = [(DEv_result.x, DEv_result.fun)]
+        if lag is not None and len(bounds) > 1:
+            T_lag_min = bounds[lag][0]
+
+            def RSS_nested (X):
+                return RSS(np.insert(X, lag, T_lag_min, axis=0))
+
+            nested_result = differential_evolution(RSS_nested, bounds=bounds[:lag] + bounds[lag+1:], **DEv_options)
+            starts.append((np.insert(nested_result.x, lag, T_lag_min), nested_result.fun))
+    global_nfev = RSS.nfev
+    x, RSS_opt = min(starts, key=lambda start: start[1])
+    local_nfev = njev = nit = 0
+    local_result = None
+    with phase(recorder, 'local'):
+        for x0, _ in starts:
+            Result = Find_PAR_lag_local(C_model, Texp, Cexp, bounds, x0, weights, tol)
+            local_nfev, njev, nit = local_nfev + Result.nfev, njev + Result.njev, nit + Result.nit
+            if local_result is None or Result.fun < local_result.fun:
+                local_result = Result
+    if local_result.fun <= RSS_opt:
+        x, RSS_opt = local_result.x, local_result.fun
+
+    return OptimizeResult(x=x, fun=RSS_opt, nfev=global_nfev + local_nfev, njev=njev,
+                          nit=DEv_result.nit + nit, global_nfev=global_nfev, local_nfev=local_nfev,
+                          global_message=DEv_result.message,
+                          status=local_result.status, success=local_result.success,
+                          message='differential evolution refined by: %s' % local_result.message)
+
+
+def Find_PAR(C_model, Texp, Cexp, bounds, weights=None, seed=None, transforms=None, recorder=None, **hybrid_options):
+    """
+    C_model - a model function from DD_basic_models
+    Texp, Cexp - 1-D np.arrays of the experimental times and drug concentrations
+    bounds - a list of (min, max) pairs, one for every model parameter
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - seed of the global stage of Find_PAR_hybrid, for reproducible fits
+    transforms - optional time transforms of Texp from DD_basic_models.time_transforms.profile_transforms
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting a record of the fit
+    hybrid_options - further options of Find_PAR_hybrid
+
+    Fits C_model with the fastest available method: in closed form if it is linear in all parameters,
+    by variable projection if it has a linear amplitude, and by Find_PAR_hybrid otherwise.
+    This is the engine behind all Find_PAR_DEv_* fitters.
+
+    Returns a scipy OptimizeResult with the parameters x, the weighted RSS fun, nfev, njev and nit.
+    """
+    if is_linear(C_model):
+        method = 'linear'
+    elif is_separable(C_model):
+        method = 'varpro'
+    else:
+        method = 'hybrid'
+    with fit_record(recorder, model_of(C_model).name, method, np.size(Texp)):
+        if method == 'linear':
+            Result = Find_PAR_linear(C_model, Texp, Cexp, bounds, weights, transforms, recorder=recorder)
+        elif method == 'varpro':
+            Result = Find_PAR_varpro(C_model, Texp, Cexp, bounds, weights, recorder=recorder)
+        else:
+            Result = Find_PAR_hybrid(C_model, Texp, Cexp, bounds, weights, seed=seed, recorder=recorder, **hybrid_options)
+        if recorder is not None:
+            recorder.finish(Result)
+    return Result
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentation of the fits: objective evaluation counts, the best RSS of every differential evolution
+generation, the wall time of every phase and the convergence status, collected as structured rows.
+
+The fitting functions take an optional recorder (a Fit_recorder); with recorder=None nothing is recorded
+and the only cost is a test of the argument.
+
+@author: edward
+"""
+
+from contextlib import contextmanager, nullcontext
+import csv
+import time
+import numpy as np
+
+# the columns of Fit_recorder.rows, in order
+ROW_FIELDS = ['fit', 'model', 'method', 'n_points', 'wall_time', 'time_global', 'time_grid', 'time_local', 'time_linear',
+              'nfev', 'global_nfev', 'local_nfev', 'njev', 'nit', 'generations', 'best_RSS_first', 'RSS',
+              'global_message', 'status', 'success', 'message', 'x']
+
+
+class Fit_recorder:
+    """
+    callback - an optional function called with every finished record (a dict), e.g. to log the fits of a production run
+
+    Collects one record per fit of DD_basic_opt.hybrid_opt.Find_PAR (and so of every Find_PAR_DEv_* fitter) called with
+    recorder=this recorder. A record holds the model, the fitting method ('linear', 'varpro' or 'hybrid'), the number of
+    points, the total wall time and the wall time of every phase (time_global, time_grid, time_local, time_linear),
+    the objective and Jacobian evaluation counts, the iterations, the best RSS after every differential evolution
+    generation (trace), the message of the global stage (e.g. whether it hit its maximum number of generations)
+    and the final RSS, parameters and convergence status.
+    A recorder is not thread-safe: use one recorder per thread or process.
+    """
+
+    def __init__(self, callback=None):
+        self.records = []
+        self.callback = callback
+        self._current = None
+
+    def __len__(self):
+        return len(self.records)
+
+    @contextmanager
+    def fit(self, model, method, n_points):
+        """
+        Opens the record of a fit of model by method, finished by finish(); the wall time covers the with block.
+        """
+        record = {'fit': len(self.records), 'model': model, 'method': method, 'n_points': n_points, 'trace': []}
+        self._current = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['wall_time'] = time.perf_counter() - start
+            self._current = None
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Adds the wall time of the with block to the time_<name> entry of the current record.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._current is not None:
+                key = 'time_' + name
+                self._current[key] = self._current.get(key, 0.) + time.perf_counter() - start
+
+    def generation(self, intermediate_result):
+        """
+        The callback of differential_evolution: appends the best RSS of the generation to the trace of the current record.
+        """
+        if self._current is not None:
+            self._current['trace'].append(float(intermediate_result.fun))
+
+    def finish(self, Result, **diagnostics):
+        """
+        Stores the scipy OptimizeResult of the fit, and optional extra diagnostics, in the current record.
+        """
+        if self._current is None:
+            return
+        self._current.update(diagnostics)
+        for key in ('nfev', 'global_nfev', 'local_nfev', 'njev', 'nit', 'global_message', 'status', 'success', 'message'):
+            if key in Result:
+                self._current[key] = Result[key]
+        self._current['RSS'] = float(Result.fun)
+        self._current['x'] = np.asarray(Result.x, dtype=float).tolist()
+
+    def extend(self, records):
+        """
+        Appends the records of another recorder (e.g. of a fit run in a worker process), renumbering their fit index
+        and passing every one to the callback.
+        """
+        for record in records:
+            record = dict(record, fit=len(self.records))
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def rows(self):
+        """
+        Returns the records as flat rows (dicts with the keys ROW_FIELDS, None where not applicable):
+        generations is the length of the trace and best_RSS_first its first value.
+        """
+        Rows = []
+        for record in self.records:
+            Row = {field: record.get(field) for field in ROW_FIELDS}
+            Row['generations'] = len(record['trace'])
+            Row['best_RSS_first'] = record['trace'][0] if record['trace'] else None
+            Rows.append(Row)
+        return Rows
+
+    def trace_rows(self):
+        """
+        Returns the convergence traces in long format: a row {'fit', 'model', 'generation', 'best_RSS'} per generation.
+        """
+        return [{'fit': record['fit'], 'model': record['model'], 'generation': generation, 'best_RSS': best_RSS}
+                for record in self.records for generation, best_RSS in enumerate(record['trace'], start=1)]
+
+    def to_csv(self, file_name, traces=False):
+        """
+        Writes the rows (or the trace rows if traces is True) to the CSV file file_name.
+        """
+        Rows = self.trace_rows() if traces else self.rows()
+        fields = ['fit', 'model', 'generation', 'best_RSS'] if traces else ROW_FIELDS
+        with open(file_name, 'w', newline='') as output_file:
+            writer = csv.DictWriter(output_file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(Rows)
+
+
+def fit_record(recorder, model, method, n_points):
+    """
+    Returns recorder.fit(model, method, n_points), or a context doing nothing when recorder is None.
+    """
+    if recorder is None:
+        return nullcontext()
+    return recorder.fit(model, method, n_points)
+
+
+def phase(recorder, name):
+    """
+    Returns recorder.phase(name), or a context doing nothing when recorder is None.
+    """
+    if recorder is None:
+        return nullcontext()
+    return recorder.phase(name)
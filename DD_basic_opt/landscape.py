@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dense scans of the RSS landscape of the DD models: RSS surfaces over 1-D, 2-D and 3-D parameter grids,
+profile-likelihood curves, identifiability of the parameters and data-driven bounds for the fitters.
+
+@author: edward
+"""
+
+import numpy as np
+from scipy.optimize import OptimizeResult
+from scipy.stats import f as f_distribution
+from DD_basic_models.registry import model_by_name, model_of
+from DD_basic_models.time_transforms import profile_transforms
+from DD_basic_opt.objective import RSS_population
+from DD_basic_opt.linear_opt import RSS_profiled, parameter_grid, point_weights
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+# number of model values (grid points x time points) evaluated at once, small enough for the chunk to stay in cache
+chunk_elements = 1 << 16
+
+# default number of grid points per scanned parameter, by the number of scanned parameters
+n_grid_default = {1: 2000, 2: 200, 3: 50}
+
+
+def _RSS_linear_profiled(model, Texp, Cexp, bounds, weights, profiled):
+    """
+    Returns the objective of a model linear in all its parameters with the parameters of index profiled solved
+    in closed form: a function of the (n_params, P) parameters (the profiled rows are ignored) returning the (P,)
+    weighted RSS and the (u, P) profiled parameters, clipped to their bounds.
+    """
+    w = point_weights(Cexp, weights)
+    transforms = profile_transforms(Texp)
+    A = np.column_stack([transforms[name] for name in model.design])
+    scanned = [i for i in range(A.shape[1]) if i not in profiled]
+    A_s, A_u = A[:, scanned], A[:, profiled]
+    solve = np.linalg.pinv(A_u.T @ (A_u*w[:, np.newaxis])) @ (A_u*w[:, np.newaxis]).T
+    lb, ub = np.array(bounds, dtype=float)[profiled].T
+
+    def RSS (X):
+        Res = Cexp - X[scanned].T @ A_s.T
+        theta = np.clip(solve @ Res.T, lb[:, np.newaxis], ub[:, np.newaxis])
+        Res -= theta.T @ A_u.T
+        return np.einsum('pt,pt,t->p', Res, Res, w), theta
+
+    return RSS
+
+
+def Scan_landscape(C_model, Texp, Cexp, scan=None, grids=None, n_grid=None, bounds=None, fixed=None, weights=None, seed=None):
+    """
+    C_model - a model function from DD_basic_models or its registered name
+    Texp, Cexp - 1-D np.arrays of the experimental times and drug concentrations
+    scan - the names of the 1 to 3 scanned parameters; by default all the nonlinear parameters of the model
+    (all the parameters of a model linear in all of them)
+    grids - an optional dict {parameter name: 1-D np.array of its grid values}
+    n_grid - the number of grid points of the other scanned parameters, by default 2000, 200 or 50 for 1, 2 or 3
+    scanned parameters; the grids span the bounds, on a log scale where the registry gives one
+    bounds - a list of (min, max) pairs, one for every model parameter, the default bounds of the registry by default
+    fixed - an optional dict {parameter name: value} of the parameters neither scanned nor linear; the parameters
+    missing from it are fixed at their best fit by DD_basic_opt.hybrid_opt.Find_PAR
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - seed of the fit of the fixed parameters
+
+      The linear parameters which are not scanned (the amplitude of a separable model, any parameter of a linear
+    model) are profiled out analytically at every grid point: they take their optimal value, clipped to their
+    bounds, so that the RSS surface is the profile over them. The grid is evaluated in chunks of chunk_elements
+    model values generated from flat grid indices, so the memory does not grow with the grid.
+
+    Returns a scipy OptimizeResult with the names and the grids of the scanned parameters, the RSS surface of
+    shape (len(grid_1), ...) RSS, the surfaces of the profiled parameters profiled (a dict), the fixed parameters,
+    the best grid point with all the parameters x and its RSS fun, the model name, its PAR_names, the bounds,
+    the number of points n_points and the number of evaluated grid points nfev.
+    """
+    model = model_by_name(C_model) if isinstance(C_model, str) else model_of(C_model)
+    Texp = np.asarray(Texp, dtype=float)
+    Cexp = np.asarray(Cexp, dtype=float)
+    bounds = list(model.bounds if bounds is None else bounds)
+    names = list(model.PAR_names)
+    if model.linearity == 'linear':
+        linear = names
+    elif model.linearity == 'separable':
+        linear = [names[model.amp_index]]
+    else:
+        linear = []
+    if scan is None:
+        scan = [name for name in names if name not in linear] or names
+    scan = list(scan)
+    if not 1 <= len(scan) <= 3:
+        raise ValueError('1 to 3 parameters can be scanned, got %s' % scan)
+    profiled = [name for name in linear if name not in scan]
+    fixed = dict(fixed or {})
+    missing = [name for name in names if name not in scan and name not in profiled and name not in fixed]
+    if missing:
+        Best = Find_PAR(model.C_model, Texp, Cexp, bounds, weights, seed)
+        fixed.update({name: Best.x[names.index(name)] for name in missing})
+
+    if n_grid is None:
+        n_grid = n_grid_default[len(scan)]
+    scales = {}
+    if model.linearity == 'separable':
+        scales = dict(zip([name for name in names if name not in linear], model.grid_scales))
+    grids = [np.asarray((grids or {}).get(name, parameter_grid(*bounds[names.index(name)], scales.get(name, 'linear'), n_grid)),
+                        dtype=float) for name in scan]
+    shape = tuple(grid.size for grid in grids)
+
+    if not profiled:
+        RSS_pop = RSS_population(model.C_model, Texp, Cexp, weights)
+        objective = lambda X: (RSS_pop(X), np.empty((0, X.shape[1])))
+        rows = list(range(len(names)))
+    elif model.linearity == 'separable':
+        RSS_amp = RSS_profiled(model.C_model, Texp, Cexp, bounds, weights)
+
+        def objective (X):
+            RSS_X, amp = RSS_amp(X)
+            return RSS_X, amp[np.newaxis]
+        rows = [i for i in range(len(names)) if i != model.amp_index]
+    else:
+        objective = _RSS_linear_profiled(model, Texp, Cexp, bounds, weights, [names.index(name) for name in profiled])
+        rows = list(range(len(names)))
+
+    n_total = int(np.prod(shape))
+    chunk_size = max(1, chunk_elements // max(Texp.size, 1))
+    RSS = np.empty(n_total)
+    Profiled = np.empty((len(profiled), n_total))
+    X = np.empty((len(rows), min(chunk_size, n_total)))
+    for name, value in fixed.items():
+        if names.index(name) in rows:
+            X[rows.index(names.index(name))] = value
+    scanned_rows = [rows.index(names.index(name)) for name in scan]
+    for start in range(0, n_total, chunk_size):
+        stop = min(start + chunk_size, n_total)
+        if stop - start < X.shape[1]:
+            X = X[:, :stop - start]
+        for row, grid, index in zip(scanned_rows, grids, np.unravel_index(np.arange(start, stop), shape)):
+            X[row] = grid[index]
+        RSS[start:stop], Profiled[:, start:stop] = objective(X)
+    RSS[~np.isfinite(RSS)] = np.inf
+
+    best = np.unravel_index(np.argmin(RSS), shape)
+    x = np.empty(len(names))
+    for name, value in fixed.items():
+        x[names.index(name)] = value
+    for name, grid, index in zip(scan, grids, best):
+        x[names.index(name)] = grid[index]
+    for name, surface in zip(profiled, Profiled):
+        x[names.index(name)] = surface.reshape(shape)[best]
+
+    return OptimizeResult(model=model.name, PAR_names=names, bounds=bounds, names=scan, grids=grids,
+                          RSS=RSS.reshape(shape), profiled={name: surface.reshape(shape) for name, surface in zip(profiled, Profiled)},
+                          fixed=fixed, x=x, fun=RSS.min(), n_points=Texp.size, nfev=n_total)
+
+
+def RSS_threshold(RSS_min, n_points, n_params, n_interest=1, alpha=0.05):
+    """
+    RSS_min - the RSS of the best fit
+    n_points, n_params - the numbers of experimental points and of model parameters
+    n_interest - the number of parameters of the confidence region, 1 for the interval of a single parameter
+    alpha - the significance level
+
+    Returns the RSS bounding the 1 - alpha confidence region by the F test of the extra sum of squares:
+    RSS_min*(1 + n_interest/(n_points - n_params)*F(1 - alpha; n_interest, n_points - n_params)).
+
+    Bates DM, Watts DG. Nonlinear regression analysis and its applications. New York: Wiley; 1988.
+
+    bibtexkey: bates1988
+    """
+    dof = n_points - n_params
+    if dof <= 0:
+        return np.inf
+    return RSS_min*(1 + n_interest/dof*f_distribution.ppf(1 - alpha, n_interest, dof))
+
+
+def Profile_likelihood(landscape, alpha=0.05):
+    """
+    landscape - the result of Scan_landscape
+    alpha - the significance level of the confidence intervals
+
+    The profile of a scanned parameter is the minimum of the RSS surface over the other scanned parameters
+    (the linear ones being already profiled out). A flat profile, or a confidence interval reaching an end
+    of the grid, flags a parameter which the data do not determine, e.g. trading off against another one.
+
+    Raue A, Kreutz C, Maiwald T, Bachmann J, Schilling M, Klingmüller U, Timmer J. Structural and practical
+    identifiability analysis of partially observed dynamical models by exploiting the profile likelihood.
+    Bioinformatics. 2009;25:1923–9.
+
+    bibtexkey: raue2009
+
+    Returns a dict {parameter name: {'grid', 'RSS', 'threshold', 'low', 'high', 'open_low', 'open_high'}} with the
+    profile RSS over the grid, the RSS threshold of the 1 - alpha confidence interval (see RSS_threshold), the ends
+    of the interval (the grid values with a profile RSS below the threshold) and whether it reaches the ends of the grid.
+    """
+    threshold = RSS_threshold(landscape.fun, landscape.n_points, len(landscape.PAR_names), 1, alpha)
+    Profiles = {}
+    for axis, (name, grid) in enumerate(zip(landscape.names, landscape.grids)):
+        other = tuple(i for i in range(landscape.RSS.ndim) if i != axis)
+        profile = landscape.RSS.min(axis=other) if other else landscape.RSS
+        inside = np.flatnonzero(profile <= threshold)
+        Profiles[name] = {'grid': grid, 'RSS': profile, 'threshold': threshold,
+                          'low': grid[inside[0]], 'high': grid[inside[-1]],
+                          'open_low': inside[0] == 0, 'open_high': inside[-1] == grid.size - 1}
+    return Profiles
+
+
+def Suggest_bounds(landscape, alpha=0.05, margin=0.5):
+    """
+    landscape - the result of Scan_landscape
+    alpha - the significance level of the confidence intervals
+    margin - the widening of an interval on every side, as a fraction of its width (at least to the next grid point)
+
+      The bounds of a scanned parameter are its profile-likelihood confidence interval (see Profile_likelihood)
+    widened by margin; on a side where the interval reaches the end of the grid the data do not bound the parameter
+    and the original bound is kept. The bounds of a profiled linear parameter are the range of its optimal values
+    over the joint confidence region of the scanned parameters, widened in the same way; the fixed parameters keep
+    their bounds. All the suggestions stay within the original bounds.
+
+    Returns the suggested bounds, a list of (min, max) pairs in the order of the model parameters to be passed to the
+    fitters (e.g. as k_1min, k_1max, ... of the Find_PAR_DEv_* fitters), and a list of rows {'parameter', 'role',
+    'low', 'high', 'identifiable', 'min', 'max'} with the confidence interval, whether it is closed on both sides,
+    and the suggested bounds of every parameter.
+    """
+    names = landscape.PAR_names
+    bounds = [tuple(map(float, b)) for b in landscape.bounds]
+    Rows = {name: {'parameter': name, 'role': 'fixed', 'low': None, 'high': None, 'identifiable': None,
+                   'min': bounds[i][0], 'max': bounds[i][1]} for i, name in enumerate(names)}
+
+    def widen(Row, open_low, open_high, below=np.inf, above=-np.inf):
+        par_min, par_max = bounds[names.index(Row['parameter'])]
+        pad = margin*(Row['high'] - Row['low'])
+        Row['identifiable'] = not (open_low or open_high)
+        Row['min'] = par_min if open_low else float(max(par_min, min(Row['low'] - pad, below)))
+        Row['max'] = par_max if open_high else float(min(par_max, max(Row['high'] + pad, above)))
+
+    for name, Profile in Profile_likelihood(landscape, alpha).items():
+        Row = Rows[name]
+        Row.update(role='scanned', low=float(Profile['low']), high=float(Profile['high']))
+        grid = Profile['grid']
+        inside = np.flatnonzero(Profile['RSS'] <= Profile['threshold'])
+        widen(Row, Profile['open_low'], Profile['open_high'],
+              grid[max(inside[0] - 1, 0)], grid[min(inside[-1] + 1, grid.size - 1)])
+
+    region = landscape.RSS <= RSS_threshold(landscape.fun, landscape.n_points, len(names), len(landscape.names), alpha)
+    for name, surface in landscape.profiled.items():
+        par_min, par_max = bounds[names.index(name)]
+        values = surface[region]
+        Row = Rows[name]
+        Row.update(role='profiled', low=float(values.min()), high=float(values.max()))
+        widen(Row, Row['low'] <= par_min, Row['high'] >= par_max)
+
+    Rows = [Rows[name] for name in names]
+    return [(Row['min'], Row['max']) for Row in Rows], Rows
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analytic fast paths for the DD models which are linear in (some of) their parameters.
+
+Models linear in all parameters (zero order, zero order with F0, Higuchi, Higuchi with F0)
+are solved in closed form by weighted least squares. Models with a single linear amplitude
+(F_max of the first order models, k_H and k_0 of the lagged Higuchi and zero order models)
+are fitted by variable projection: the amplitude is eliminated analytically and only the
+remaining nonlinear parameters are searched on a deterministic grid, followed by a bounded
+gradient-based refinement.
+
+@author: edward
+"""
+
+import numpy as np
+from scipy.optimize import lsq_linear, OptimizeResult
+from DD_basic_models.registry import model_of
+from DD_basic_models.time_transforms import profile_transforms
+from DD_basic_opt.local_opt import Find_PAR_lag_local, lag_bounds
+from DD_basic_opt.instrumentation import phase
+
+# number of model values (candidates x time points) evaluated at once on the grid
+chunk_elements = 1 << 20
+
+
+def is_linear(C_model):
+    """
+    Returns True if C_model is linear in all its parameters and can be solved in closed form.
+    """
+    return model_of(C_model).linearity == 'linear'
+
+
+def is_separable(C_model):
+    """
+    Returns True if C_model has a linear amplitude which can be eliminated by variable projection.
+    """
+    return model_of(C_model).linearity == 'separable'
+
+
+def point_weights(Cexp, weights):
+    """
+    Returns the weights of the experimental points as a float np.array, all 1 when weights is None.
+    """
+    if weights is None:
+        return np.ones_like(Cexp)
+    return np.asarray(weights, dtype=float)
+
+
+def Find_PAR_linear(C_model, Texp, Cexp, bounds, weights=None, transforms=None, recorder=None):
+    """
+    C_model - a model from DD_basic_models linear in all its parameters (see is_linear)
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    bounds - a list of (min, max) pairs, one for every model parameter
+    weights - an optional 1-D np.array of weights of the experimental points (e.g. 1/variance), all 1 by default
+    transforms - optional time transforms of Texp from profile_transforms, shared between the models of a profile
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder timing the solution (time_linear)
+
+    The parameters minimizing the weighted RSS are computed in closed form from the design matrix of the model,
+    made of the time transforms named in the registry.
+    When the unconstrained solution leaves the bounds, the bounded problem is solved exactly by the
+    bounded-variable least squares method.
+
+    Returns a scipy OptimizeResult with the parameters x and the weighted RSS fun.
+    """
+    with phase(recorder, 'linear'):
+        Texp = np.asarray(Texp, dtype=float)
+        Cexp = np.asarray(Cexp, dtype=float)
+        sw = np.sqrt(point_weights(Cexp, weights))
+        if transforms is None:
+            transforms = profile_transforms(Texp)
+        A = np.column_stack([transforms[name] for name in model_of(C_model).design]) * sw[:, np.newaxis]
+        y = Cexp * sw
+        lb, ub = np.array(bounds, dtype=float).T
+
+        x = np.linalg.lstsq(A, y, rcond=None)[0]
+        message = 'closed-form weighted least squares'
+        if np.any(x < lb) or np.any(x > ub):
+            x = lsq_linear(A, y, bounds=(lb, ub), method='bvls').x
+            message = 'bounded-variable weighted least squares'
+        Res = y - A @ x
+
+    return OptimizeResult(x=x, fun=Res @ Res, nfev=1, njev=0, nit=1, success=True, message=message)
+
+
+def RSS_profiled(C_model, Texp, Cexp, bounds, weights=None):
+    """
+    C_model - a separable model from DD_basic_models (see is_separable)
+    Texp, Cexp - 1-D np.arrays of the experimental times and drug concentrations
+    bounds - a list of (min, max) pairs, one for every model parameter
+    weights - an optional 1-D np.array of weights of the experimental points
+
+    Returns the variable-projection objective: a function of the nonlinear parameters X, shaped
+    (n_nonlinear, P) or (n_nonlinear,), returning the weighted RSS and the optimal amplitude of every
+    candidate. For fixed nonlinear parameters the model is amp*g(t), so the optimal amplitude is
+    <g, C>/<g, g>, clipped to its bounds.
+    """
+    Texp = np.asarray(Texp, dtype=float)
+    Cexp = np.asarray(Cexp, dtype=float)
+    w = point_weights(Cexp, weights)
+    wC = w*Cexp
+    amp_index = model_of(C_model).amp_index
+    amp_min, amp_max = bounds[amp_index]
+
+    def RSS (X):
+        X = np.asarray(X, dtype=float)
+        PAR = [par[:, np.newaxis] for par in X.reshape(X.shape[0], -1)]
+        PAR.insert(amp_index, 1.)
+        g = C_model(*PAR, Texp)
+        gC = g @ wC
+        gg = np.einsum('pt,pt,t->p', g, g, w)
+        amp = np.divide(gC, gg, out=np.zeros_like(gC), where=gg > 0)
+        np.clip(amp, amp_min, amp_max, out=amp)
+        np.multiply(g, amp[:, np.newaxis], out=g)
+        np.subtract(g, Cexp, out=g)
+        RSS_pop = np.einsum('pt,pt,t->p', g, g, w)
+        if X.ndim == 1:
+            return RSS_pop[0], amp[0]
+        return RSS_pop, amp
+
+    return RSS
+
+
+def parameter_grid(par_min, par_max, scale, n_grid):
+    """
+    par_min, par_max - the bounds of a parameter
+    scale - 'log' (geometric, from par_max*1e-6 or par_min, with par_min prepended when below) or 'linear'
+    n_grid - the number of grid points
+
+    Returns the grid of the parameter searched by Find_PAR_varpro and scanned by DD_basic_opt.landscape.
+    """
+    if scale == 'log' and par_max > 0:
+        grid = np.geomspace(max(par_min, par_max*1e-6), par_max, n_grid)
+        if par_min < grid[0]:
+            grid = np.concatenate(([par_min], grid))
+        return grid
+    return np.linspace(par_min, par_max, n_grid)
+
+
+def Find_PAR_varpro(C_model, Texp, Cexp, bounds, weights=None, n_grid=None, tol=1e-10, recorder=None):
+    """
+    C_model - a separable model from DD_basic_models (see is_separable)
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    bounds - a list of (min, max) pairs, one for every model parameter
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    n_grid - number of grid points per nonlinear parameter, 2000 for one and 200 for two nonlinear parameters by default
+    tol - the tolerance which stops the local refinement
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder timing the grid search and the refinement
+
+    The linear amplitude is eliminated analytically (variable projection). The profiled RSS is evaluated
+    on a grid of the nonlinear parameters in chunks of chunk_elements model values, and the best grid point with its
+    optimal amplitude is refined in all parameters by Find_PAR_local with the analytic Jacobian. The result is deterministic.
+    For a lagged model the grid of T_lag ends at the last experimental time (see DD_basic_opt.local_opt.lag_bounds)
+    and the refinement is done by Find_PAR_lag_local within the intervals between experimental times next to the best
+    grid point, since the profiled RSS has a kink wherever T_lag crosses an experimental time.
+
+    Returns a scipy OptimizeResult with the parameters x and the weighted RSS fun.
+    """
+    amp_index, scales = model_of(C_model).amp_index, model_of(C_model).grid_scales
+    bounds = lag_bounds(C_model, Texp, bounds)
+    nl_bounds = [b for i, b in enumerate(bounds) if i != amp_index]
+    if n_grid is None:
+        n_grid = 2000 if len(scales) == 1 else 200
+    RSS = RSS_profiled(C_model, Texp, Cexp, bounds, weights)
+
+    with phase(recorder, 'grid'):
+        grids = [parameter_grid(lo, hi, scale, n_grid) for (lo, hi), scale in zip(nl_bounds, scales)]
+        mesh = np.stack([m.ravel() for m in np.meshgrid(*grids, indexing='ij')])
+        chunk_size = max(1, chunk_elements // np.size(Texp))
+        RSS_grid = np.concatenate([RSS(mesh[:, i:i+chunk_size])[0] for i in range(0, mesh.shape[1], chunk_size)])
+        X0 = mesh[:, np.argmin(RSS_grid)]
+
+    RSS_0, amp_0 = RSS(X0)
+    x0 = np.insert(X0, amp_index, amp_0)
+    with phase(recorder, 'local'):
+        local_result = Find_PAR_lag_local(C_model, Texp, Cexp, bounds, x0, weights, tol)
+    if local_result.fun <= RSS_0:
+        x, RSS_opt = local_result.x, local_result.fun
+    else:
+        x, RSS_opt = x0, RSS_0
+
+    return OptimizeResult(x=x, fun=RSS_opt, nfev=mesh.shape[1] + local_result.nfev, njev=local_result.njev,
+                          nit=local_result.nit, success=True,
+                          message='variable projection grid search, refined by: %s' % local_result.message)
+
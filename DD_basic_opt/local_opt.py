@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gradient-based local refinement of the DD model parameters with analytic Jacobians.
+
+@author: edward
+"""
+
+import numpy as np
+from scipy.optimize import least_squares, OptimizeResult
+from DD_basic_models.registry import model_of
+
+
+def Find_PAR_local(C_model, Texp, Cexp, bounds, x0, weights=None, tol=1e-10, max_nfev=None):
+    """
+    C_model - a model function from DD_basic_models, registered with its analytic Jacobian in DD_basic_models.registry
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    bounds - a list of (min, max) pairs, one for every model parameter
+    x0 - the starting parameters, e.g. the best member of a global search
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    tol - the tolerance on the change of the RSS, of the parameters and of the gradient which stops the refinement
+    max_nfev - an optional cap on the number of model evaluations
+
+      The weighted residuals are minimized by scipy.optimize.least_squares ( https://docs.scipy.org/doc/scipy/reference/generated/scipy.optimize.least_squares.html )
+    using the analytic Jacobian of the model: the trust region reflective method within the bounds,
+    or Levenberg-Marquardt when no parameter is bounded. The refinement stops on tolerance.
+
+    Returns a scipy OptimizeResult with the parameters x, the weighted RSS fun, the number of model
+    evaluations nfev, the number of Jacobian evaluations njev (the iterations nit) and the convergence status.
+    A fit ending with an all-zero Jacobian stopped on a plateau of the RSS (e.g. a lag time beyond the last
+    experimental time, where nothing is released) and is reported as not converged (success False).
+    """
+    Texp = np.asarray(Texp, dtype=float)
+    Cexp = np.asarray(Cexp, dtype=float)
+    sw = np.ones_like(Cexp) if weights is None else np.sqrt(np.asarray(weights, dtype=float))
+    Jac_model = model_of(C_model).Jac_model
+    lb, ub = np.array(bounds, dtype=float).T
+    x0 = np.clip(np.asarray(x0, dtype=float), lb, ub)
+
+    def residuals (X):
+        return sw*(C_model(*X, Texp) - Cexp)
+
+    def jacobian (X):
+        return sw[:, np.newaxis]*Jac_model(*X, Texp).T
+
+    if np.all(np.isinf(lb)) and np.all(np.isinf(ub)):
+        LS_result = least_squares(residuals, x0, jac=jacobian, method='lm', xtol=tol, ftol=tol, gtol=tol, max_nfev=max_nfev)
+    else:
+        LS_result = least_squares(residuals, x0, jac=jacobian, bounds=(lb, ub), method='trf', xtol=tol, ftol=tol, gtol=tol, max_nfev=max_nfev)
+
+    status, success, message = LS_result.status, LS_result.success, LS_result.message
+    if not np.any(LS_result.jac):
+        status, success, message = 0, False, 'the Jacobian is zero: the RSS is flat around x, not a converged minimum'
+
+    return OptimizeResult(x=LS_result.x, fun=2*LS_result.cost, nfev=LS_result.nfev, njev=LS_result.njev, nit=LS_result.njev,
+                          status=status, success=success, message=message)
+
+
+def lag_index(C_model):
+    """
+    Returns the index of the T_lag parameter of C_model, or None for the models without a lag time.
+    """
+    PAR_names = model_of(C_model).PAR_names
+    return PAR_names.index('T_lag') if 'T_lag' in PAR_names else None
+
+
+def lag_bounds(C_model, Texp, bounds):
+    """
+    C_model - a model function from DD_basic_models
+    Texp - an 1-D np.array of the experimental times
+    bounds - a list of (min, max) pairs, one for every model parameter
+
+    Returns bounds with the upper bound of T_lag lowered to the last experimental time. A lagged model releases
+    nothing before T_lag, so every T_lag beyond the last experimental time gives the same flat RSS, on which
+    neither the global nor the local search can make progress; no fit is lost by leaving it out.
+    """
+    lag = lag_index(C_model)
+    if lag is None:
+        return list(bounds)
+    bounds = list(bounds)
+    lo, hi = bounds[lag]
+    bounds[lag] = (lo, max(lo, min(hi, float(np.max(Texp)))))
+    return bounds
+
+
+def Find_PAR_lag_local(C_model, Texp, Cexp, bounds, x0, weights=None, tol=1e-10):
+    """
+    C_model, Texp, Cexp, bounds, x0, weights, tol - as in Find_PAR_local
+
+    The RSS of a lagged model has a kink wherever T_lag crosses an experimental time, where the local steps stall.
+    x0 is refined by Find_PAR_local within bounds, then again with T_lag kept between the consecutive experimental
+    times around the T_lag reached, and between those of each of the two neighbouring intervals, where the RSS is smooth;
+    the best fit is returned, with the evaluation counts of all the refinements. Models without a lag time are
+    refined by Find_PAR_local only.
+    """
+    Best = Find_PAR_local(C_model, Texp, Cexp, bounds, x0, weights, tol)
+    lag = lag_index(C_model)
+    if lag is None:
+        return Best
+    lo, hi = bounds[lag]
+    knots = np.unique(np.clip(np.concatenate(([lo, hi], np.asarray(Texp, dtype=float))), lo, hi))
+    if knots.size < 2:
+        return Best
+    x1 = Best.x
+    i = int(np.clip(np.searchsorted(knots, x1[lag], side='right') - 1, 0, knots.size - 2))
+    nfev, njev = Best.nfev, Best.njev
+    for j in range(max(i - 1, 0), min(i + 2, knots.size - 1)):
+        bracket = list(bounds)
+        bracket[lag] = (knots[j], knots[j+1])
+        Result = Find_PAR_local(C_model, Texp, Cexp, bracket, x1, weights, tol)
+        nfev, njev = nfev + Result.nfev, njev + Result.njev
+        if Result.fun < Best.fun:
+            Best = Result
+    Best.nfev, Best.njev, Best.nit = nfev, njev, njev
+    return Best
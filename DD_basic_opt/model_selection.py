@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+One-pass fitting of all registered DD models to a profile, ranked by information criteria.
+
+@author: edward
+"""
+
+import numpy as np
+from DD_basic_models.registry import MODELS, model_by_name
+from DD_basic_models.time_transforms import profile_transforms
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+
+def Fit_statistics(RSS, Cexp, n_PAR, weights=None):
+    """
+    RSS - the (weighted) residual sum of squares of a fit
+    Cexp - an 1-D np.array of the experimental drug concentrations
+    n_PAR - the number of fitted parameters
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+
+    Returns a dict with the RSS, the adjusted coefficient of determination R2_adj and the
+    Akaike and Bayesian information criteria AIC = n ln(RSS/n) + 2p and BIC = n ln(RSS/n) + p ln(n).
+
+    Zhang Y, Huo M, Zhou J, Zou A, Li W, Yao C et al. DDSolver: an add-in program for modeling and comparison
+    of drug dissolution profiles. AAPS J. 2010;12:263–71.
+
+    bibtexkey: zhang2010
+    """
+    Cexp = np.asarray(Cexp, dtype=float)
+    w = np.ones_like(Cexp) if weights is None else np.asarray(weights, dtype=float)
+    n = Cexp.size
+    C_mean = (w @ Cexp)/w.sum()
+    TSS = w @ (Cexp - C_mean)**2
+    R2 = 1 - RSS/TSS if TSS > 0 else np.nan
+    R2_adj = 1 - (1 - R2)*(n - 1)/(n - n_PAR) if n > n_PAR else np.nan
+    log_RSS = n*np.log(RSS/n) if RSS > 0 else -np.inf
+    return {'RSS': RSS, 'R2_adj': R2_adj, 'AIC': log_RSS + 2*n_PAR, 'BIC': log_RSS + n_PAR*np.log(n)}
+
+
+def rank_fits(Table, criterion='AIC'):
+    """
+    Table - a list of rows (dicts) of fits with the columns of Fit_statistics
+    criterion - the column ranking the fits: 'AIC', 'BIC' (lowest first) or 'R2_adj' (highest first)
+
+    Sorts Table in place by criterion, the rows where it is undefined (NaN) last, and returns it.
+    """
+    descending = criterion == 'R2_adj'
+    Table.sort(key=lambda Row: (np.isnan(Row[criterion]), -Row[criterion] if descending else Row[criterion]))
+    return Table
+
+
+def fit_all(Texp, Cexp, models=None, weights=None, seed=None, criterion='AIC', recorder=None):
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    models - names of the registered models to fit (see DD_basic_models.registry.MODELS), all of them by default
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - seed of the global search stage of the nonlinear models, for reproducible fits
+    criterion - the column ranking the models: 'AIC', 'BIC' (lowest first) or 'R2_adj' (highest first)
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting a record of every model fit
+
+    Every model is fitted with its default bounds by the fastest path of DD_basic_opt.hybrid_opt.Find_PAR.
+    The time transforms of the profile are computed once and shared by all the linear models.
+
+    Returns the table of fits as a list of rows (dicts) ranked by criterion, the rows where it is undefined (NaN,
+    e.g. R2_adj with no more points than parameters) last, with the keys
+    'model', 'PAR' (a dict of the fitted parameters), 'RSS', 'R2_adj', 'AIC', 'BIC' and 'nfev'.
+    """
+    Texp = np.asarray(Texp, dtype=float)
+    Cexp = np.asarray(Cexp, dtype=float)
+    transforms = profile_transforms(Texp)
+    if models is None:
+        models = list(MODELS)
+
+    Table = []
+    for name in models:
+        model = model_by_name(name)
+        Result = Find_PAR(model.C_model, Texp, Cexp, model.bounds, weights, seed, transforms, recorder)
+        Row = {'model': name, 'PAR': dict(zip(model.PAR_names, Result.x))}
+        Row.update(Fit_statistics(Result.fun, Cexp, len(model.PAR_names), weights))
+        Row['nfev'] = Result.nfev
+        Table.append(Row)
+
+    return rank_fits(Table, criterion)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Population-vectorized objective functions shared by the DD fitters.
+
+@author: edward
+"""
+
+import numpy as np
+
+DEv_vectorized_options = {'vectorized': True, 'updating': 'deferred'}
+
+
+def RSS_population(C_model, Texp, Cexp, weights=None, **C_kwargs):
+    """
+    C_model - a model function from DD_basic_models taking the model parameters followed by the time array
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    C_kwargs - shared time transforms passed on to C_model, e.g. sqrt_t for the Higuchi models
+
+    Returns the (weighted) residual sum of squares (RSS) objective of C_model for the whole population of candidates.
+    The objective takes an array X of shape (n_params, P) - as sent by differential_evolution
+    with vectorized=True - broadcasts the P candidates against Texp into a (P, T) surface
+    and returns the (P,) RSS values from a single NumPy reduction. A 1-D X of shape (n_params,)
+    is scored as a single candidate and gives a scalar RSS.
+    The (P, T) surface is written into a buffer kept between calls, so a fit does not allocate
+    a new surface per generation. Candidates for which the model is not defined get an infinite RSS.
+    The number of candidates scored so far is kept in the nfev attribute of the objective.
+    """
+    Texp = np.asarray(Texp, dtype=float)
+    Cexp = np.asarray(Cexp, dtype=float)
+    if weights is None:
+        weights = np.ones_like(Cexp)
+    buffers = {}
+
+    def RSS (X):
+        X = np.asarray(X, dtype=float)
+        PAR = X.reshape(X.shape[0], -1)
+        P = PAR.shape[1]
+        RSS.nfev += P
+        if P not in buffers:
+            buffers[P] = np.empty((P, Texp.size))
+        Res = C_model(*(par[:, np.newaxis] for par in PAR), Texp, out=buffers[P], **C_kwargs)
+        np.subtract(Res, Cexp, out=Res)
+        RSS_pop = np.einsum('pt,pt,t->p', Res, Res, weights)
+        RSS_pop[~np.isfinite(RSS_pop)] = np.inf
+        if X.ndim == 1:
+            return RSS_pop[0]
+        return RSS_pop
+
+    RSS.nfev = 0
+    return RSS
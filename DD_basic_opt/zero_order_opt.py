@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Aug  8 23:26:41 2017
+
+@author: edward
+"""
+
+from DD_basic_models.zero_order_model import C_zero_order, C_zero_order_T_lag, C_zero_order_F0
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+def Find_PAR_DEv_zero_order (Texp, Cexp, k_0min=0., k_0max=100., weights=None, seed=None, full_output=False, recorder=None):
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_0 - the optimal zero order model parameter
+    k_0min - an estimated minimal value of the k_0 parameter, which defines a boundary for the fit
+    k_0max - an estimated maximal value of the k_0 parameter, which defines a boundary for the fit
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+      The zero order model is linear in k_0, so the parameter minimizing the (weighted) residual sum of squares RSS
+    of experimentally estimated and theoretically calculated values of drug concentration is computed in closed form
+    by weighted least squares (see DD_basic_opt.linear_opt.Find_PAR_linear).
+
+    Reference to zero order model:
+    Gurny R, Doelker E, Peppas NA. Modelling of sustained release
+    of water-soluble drugs from porous, hydrophobic polymers. Biomaterials. 1982;3:27–32.
+
+    bibtexkey: gurny1982"""
+
+    k_0_bounds= [(k_0min, k_0max)]
+
+    Result_ZO = Find_PAR(C_zero_order, Texp, Cexp, k_0_bounds, weights, seed, recorder=recorder)
+    PAR_zero_order = {'k_0': Result_ZO.x[0]}
+    if full_output:
+        return PAR_zero_order, Result_ZO
+    return PAR_zero_order
+
+def Find_PAR_DEv_zero_order_T_lag (Texp, Cexp, k_0min=0., k_0max=10., T_lag_min = -10. , T_lag_max = 10., weights=None, seed=None, full_output=False, recorder=None):
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_0, T_lag - the optimal parameters for the zero order model with T_lag
+    k_0min - an estimated minimal value of the k_0 parameter, which defines a boundary for the fit
+    k_0max - an estimated maximal value of the k_0 parameter, which defines a boundary for the fit
+    T_lag_min - an estimated minimal value of the T_lag parameter, which defines a boundary for the fit
+    T_lag_max - an estimated maximal value of the T_lag parameter, which defines a boundary for the fit
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+      The model is linear in k_0, which is eliminated analytically (variable projection), and the (weighted) residual
+    sum of squares RSS of experimentally estimated and theoretically calculated values of drug concentration
+    is minimized over T_lag only (see DD_basic_opt.linear_opt.Find_PAR_varpro).
+
+    Reference to zero order with time lag model:
+    Borodkin S, Tucker FE. Linear drug release from laminated
+    hydroxypropyl cellulose-polyvinyl acetate films. J Pharm Sci.1975;64:1289–94.
+
+    bibtexkey: borodkin1975"""
+
+    k_0_T_lag_bounds = [(k_0min, k_0max) , (T_lag_min, T_lag_max)]
+
+    Result_ZO_T_lag = Find_PAR(C_zero_order_T_lag, Texp, Cexp, k_0_T_lag_bounds, weights, seed, recorder=recorder)
+    PAR_zero_order_T_lag = {'k_0': Result_ZO_T_lag.x[0], 'T_lag': Result_ZO_T_lag.x[1]}
+    if full_output:
+        return PAR_zero_order_T_lag, Result_ZO_T_lag
+    return PAR_zero_order_T_lag
+
+def Find_PAR_DEv_zero_order_F0 (Texp, Cexp, k_0min=0., k_0max=100., F_0_min=0., F_0_max=100., weights=None, seed=None, full_output=False, recorder=None):
+    """
+    Texp - an 1-D np.array of experimental data corresponding to the time elapsed from the beginning of the experiment.
+    Cexp - an 1-D np.array of experimental data corresponding to the drug concentration in the fixed moments defined by Texp.
+    k_0, F_0 - the optimal parameters for the zero order model with F_0
+    k_0min - an estimated minimal value of the k_0 parameter, which defines a boundary for the fit
+    k_0max - an estimated maximal value of the k_0 parameter, which defines a boundary for the fit
+    F_0_min - an estimated minimal value of the F_0 parameter, which defines a boundary for the fit
+    F_0_max - an estimated maximal value of the F_0 parameter, which defines a boundary for the fit
+    weights - an optional 1-D np.array of weights of the experimental points, all 1 by default
+    seed - an optional seed of the global search stage, for reproducible fits (the analytic fast paths are deterministic)
+    full_output - if True, the scipy OptimizeResult of the fit, with the RSS (fun), the iterations (nit) and the number of
+    objective evaluations (nfev), is returned together with the parameters
+    recorder - an optional DD_basic_opt.instrumentation.Fit_recorder collecting the evaluation counts, the convergence trace,
+    the wall time of every phase and the status of the fit
+
+      The model is linear in k_0 and F_0, so the parameters minimizing the (weighted) residual sum of squares RSS
+    of experimentally estimated and theoretically calculated values of drug concentration are computed in closed form
+    by weighted least squares (see DD_basic_opt.linear_opt.Find_PAR_linear).
+
+    Reference to zero order with F_0 model:
+    Costa P, Sousa Lobo JM. Modeling and comparison of dissolution profiles. Eur J Pharm Sci. 2001;13:123–33.
+
+    bibtexkey: costa2001"""
+
+    k_0_F_0_bounds = [(k_0min, k_0max) , (F_0_min, F_0_max)]
+
+    Result_ZO_F0 = Find_PAR(C_zero_order_F0, Texp, Cexp, k_0_F_0_bounds, weights, seed, recorder=recorder)
+    PAR_zero_order_F0 = {'k_0': Result_ZO_F0.x[0], 'F_0': Result_ZO_F0.x[1]}
+    if full_output:
+        return PAR_zero_order_F0, Result_ZO_F0
+    return PAR_zero_order_F0
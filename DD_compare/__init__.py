@@ -0,0 +1,3 @@
+"""
+Package for DD profile comparison methods
+"""
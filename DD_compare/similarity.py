@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model-independent (f1/f2 similarity factors) and model-dependent (fitted parameter distances)
+comparison of dissolution profiles, computed for all pairs of a profile collection at once.
+
+The profiles are given as a dict {name: (Texp, Cexp)}, e.g. io_local.profile_store.Load_profiles(...).as_dict(),
+with Cexp in percent dissolved.
+
+@author: edward
+"""
+
+import numpy as np
+from scipy.spatial.distance import cdist
+from DD_basic_models.registry import model_of
+from DD_basic_opt.hybrid_opt import Find_PAR
+
+
+def Common_grid(profiles):
+    """
+    profiles - a dict {name: (Texp, Cexp)}
+
+    Returns the common time grid of the profiles: their shared times if they are all sampled alike,
+    otherwise equally spaced times over the time range covered by all of them, as many as the points
+    of the most densely sampled profile.
+    """
+    Times = [np.asarray(Texp, dtype=float) for Texp, _ in profiles.values()]
+    if all(T.shape == Times[0].shape and np.array_equal(T, Times[0]) for T in Times):
+        return np.sort(Times[0])
+    t_min = max(T.min() for T in Times)
+    t_max = min(T.max() for T in Times)
+    return np.linspace(t_min, t_max, max(T.size for T in Times))
+
+
+def Interpolate_profiles(profiles, grid):
+    """
+    profiles - a dict {name: (Texp, Cexp)}
+    grid - an 1-D np.array of times
+
+    Returns the (N, G) matrix of the N profiles linearly interpolated on the G times of grid;
+    the values outside the time range of a profile are NaN (no extrapolation).
+    """
+    grid = np.asarray(grid, dtype=float)
+    Matrix = np.empty((len(profiles), grid.size))
+    for i, (Texp, Cexp) in enumerate(profiles.values()):
+        Texp = np.asarray(Texp, dtype=float)
+        order = np.argsort(Texp)
+        Matrix[i] = np.interp(grid, Texp[order], np.asarray(Cexp, dtype=float)[order], left=np.nan, right=np.nan)
+    return Matrix
+
+
+def Reference_points(grid, C_reference, cutoff=85.):
+    """
+    grid - an 1-D np.array of times
+    C_reference - the reference profile on grid
+    cutoff - the dissolution (in %) after which only one point is kept, None to keep all the points
+
+    Returns the boolean mask of the points used by the similarity factors: the times after 0
+    up to and including the first time at which the reference reaches cutoff.
+    """
+    grid = np.asarray(grid, dtype=float)
+    points = grid > 0
+    if cutoff is not None:
+        reached = np.flatnonzero(points & (np.asarray(C_reference) >= cutoff))
+        if reached.size:
+            points[reached[0]+1:] = False
+    return points
+
+
+def _f1_f2(L1, SS, R_sum, n_points):
+    """
+    Returns f1 and f2 from the summed absolute and squared differences of the profiles.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f1 = 100*L1/R_sum
+    f2 = 50*np.log10(100/np.sqrt(1 + SS/n_points))
+    return f1, f2
+
+
+def f1_f2_matrix(profiles, grid=None, points=None):
+    """
+    profiles - a dict {name: (Texp, Cexp)} of N profiles
+    grid - the common time grid, Common_grid(profiles) by default; profiles sampled differently are interpolated
+    points - an optional boolean mask (or index array) of the grid points to use, e.g. from Reference_points
+
+      The difference factor f1 = 100 sum|R - T| / sum R and the similarity factor
+    f2 = 50 log10(100/sqrt(1 + mean (R - T)^2)) are computed for all pairs at once from the pairwise
+    L1 and squared Euclidean distances of the interpolated profiles (scipy.spatial.distance.cdist).
+    Profiles are similar if f1 <= 15 and f2 >= 50.
+
+    Moore JW, Flanner HH. Mathematical comparison of dissolution profiles. Pharm Technol. 1996;20:64–74.
+
+    bibtexkey: moore1996
+
+    Returns a dict with the profile names, the grid, the points used, the (N, N) matrix f1 with the reference
+    in the rows (f1[i, j] compares profile j to the reference profile i) and the symmetric (N, N) matrix f2.
+    """
+    if grid is None:
+        grid = Common_grid(profiles)
+    grid = np.asarray(grid, dtype=float)
+    if points is None:
+        points = grid > 0
+    Matrix = Interpolate_profiles(profiles, grid[points])
+    L1 = cdist(Matrix, Matrix, 'cityblock')
+    SS = cdist(Matrix, Matrix, 'sqeuclidean')
+    f1, f2 = _f1_f2(L1, SS, Matrix.sum(axis=1)[:, np.newaxis], Matrix.shape[1])
+    return {'names': list(profiles), 'grid': grid, 'points': points, 'f1': f1, 'f2': f2}
+
+
+def Screen_f1_f2(reference, candidates, cutoff=85.):
+    """
+    reference - the (Texp, Cexp) reference profile
+    candidates - a dict {name: (Texp, Cexp)} of candidate batches
+    cutoff - see Reference_points
+
+    Compares every candidate to the reference at the reference times selected by Reference_points, the candidates
+    interpolated there. A candidate not covering these times gets NaN factors.
+
+    Returns a dict with the candidate names, the times used, the f1 and f2 arrays and the boolean array similar
+    (f1 <= 15 and f2 >= 50).
+    """
+    T_reference, C_reference = (np.asarray(data, dtype=float) for data in reference)
+    order = np.argsort(T_reference)
+    T_reference, C_reference = T_reference[order], C_reference[order]
+    points = Reference_points(T_reference, C_reference, cutoff)
+    R = C_reference[points]
+    Matrix = Interpolate_profiles(candidates, T_reference[points])
+    Difference = Matrix - R
+    f1, f2 = _f1_f2(np.abs(Difference).sum(axis=1), np.einsum('nt,nt->n', Difference, Difference), R.sum(), R.size)
+    return {'names': list(candidates), 'times': T_reference[points], 'f1': f1, 'f2': f2,
+            'similar': (f1 <= 15) & (f2 >= 50)}
+
+
+def Fit_parameters(profiles, C_model, bounds=None, seed=None):
+    """
+    profiles - a dict {name: (Texp, Cexp)} of N profiles
+    C_model - a model function from DD_basic_models registered in DD_basic_models.registry
+    bounds - a list of (min, max) pairs, one for every model parameter, the registry defaults by default
+    seed - the root seed; every profile gets its own seed spawned from it
+
+    Returns the (N, n_params) np.array of the parameters of C_model fitted to every profile by
+    DD_basic_opt.hybrid_opt.Find_PAR.
+    """
+    bounds = model_of(C_model).bounds if bounds is None else bounds
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(profiles))]
+    return np.array([Find_PAR(C_model, np.asarray(Texp, dtype=float), np.asarray(Cexp, dtype=float), bounds, seed=profile_seed).x
+                     for (Texp, Cexp), profile_seed in zip(profiles.values(), seeds)])
+
+
+def Parameter_distances(PAR, metric='mahalanobis', cov=None):
+    """
+    PAR - an (N, n_params) np.array of fitted parameters, e.g. from Fit_parameters
+    metric - 'mahalanobis', 'seuclidean' (Euclidean in units of the parameter standard deviations) or 'euclidean'
+    cov - the parameter covariance of the Mahalanobis distance, e.g. the cov of DD_basic_opt.bootstrap.Bootstrap_PAR
+    of the reference; by default the covariance of PAR across the profiles (its pseudo-inverse is used)
+
+    Returns the (N, N) matrix of the distances between the fitted parameters of all pairs of profiles.
+
+    Tsong Y, Hammerstrom T, Sathe P, Shah VP. Statistical assessment of mean differences between two dissolution data sets.
+    Drug Inf J. 1996;30:1105–12.
+
+    bibtexkey: tsong1996
+    """
+    PAR = np.atleast_2d(np.asarray(PAR, dtype=float))
+    if metric == 'mahalanobis':
+        if cov is None:
+            cov = np.cov(PAR, rowvar=False)
+        return cdist(PAR, PAR, 'mahalanobis', VI=np.linalg.pinv(np.atleast_2d(cov)))
+    if metric == 'seuclidean':
+        return cdist(PAR, PAR, 'seuclidean', V=PAR.var(axis=0, ddof=1))
+    if metric == 'euclidean':
+        return cdist(PAR, PAR, 'euclidean')
+    raise ValueError("metric has to be 'mahalanobis', 'seuclidean' or 'euclidean', not %r" % (metric,))
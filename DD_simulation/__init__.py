@@ -0,0 +1,3 @@
+"""
+Package for DD simulation methods
+"""
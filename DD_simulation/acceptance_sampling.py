@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo evaluation of multipoint dissolution specifications: virtual lots of tablets are sampled
+from fitted model parameters with between-unit (and between-lot) variability and tested by the staged
+USP <711> acceptance rules at every time point of the specification.
+
+@author: edward
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from DD_basic_models.registry import model_by_name, model_of
+
+# number of simulated values (lots x units x time points) generated at once
+chunk_elements = 1 << 22
+
+# units tested at the three stages, cumulated
+STAGE_UNITS = (6, 12, 24)
+
+# margins of the staged rules, in % of the label claim: at stage 1 every unit has to be within the limits tightened
+# by the first margin; at stage 2 the mean has to be within the limits and every unit within the limits widened by
+# the second margin; at stage 3 the mean has to be within the limits, at most 2 units outside the limits widened
+# by the second margin and none outside the limits widened by the third margin
+RULES = {'S': (5., 15., 25.),   # immediate release, Acceptance Table 1, the lower limit being Q
+         'L': (0., 10., 20.)}   # extended release, Acceptance Table 2
+
+
+def _stage_passes(Release, low, high, margins):
+    """
+    Release - the (L, 24, T) release of the 24 units of L lots at the T time points of the specification
+    low, high - the (T,) limits
+
+    Returns the three (L,) boolean arrays of the lots passing stage 1, 2 and 3 at all the time points.
+    """
+    m1, m2, m3 = margins
+    S1 = Release[:, :6]
+    pass_1 = np.all((S1 >= low + m1) & (S1 <= high - m1), axis=(1, 2))
+
+    S2 = Release[:, :12]
+    mean_2 = S2.mean(axis=1)
+    pass_2 = (np.all((mean_2 >= low) & (mean_2 <= high), axis=1)
+              & np.all((S2 >= low - m2) & (S2 <= high + m2), axis=(1, 2)))
+
+    mean_3 = Release.mean(axis=1)
+    outside_2 = np.sum((Release < low - m2) | (Release > high + m2), axis=1)
+    outside_3 = np.any((Release < low - m3) | (Release > high + m3), axis=1)
+    pass_3 = np.all((mean_3 >= low) & (mean_3 <= high) & (outside_2 <= 2) & ~outside_3, axis=1)
+    return pass_1, pass_2, pass_3
+
+
+def Simulate_units(C_model, PAR, times, n_lots, cv=0.1, lot_cv=0., cov=None, sd_assay=0., rng=None, n_units=24):
+    """
+    C_model - a model function from DD_basic_models
+    PAR - the (typical) model parameters, a sequence in the order of the model arguments
+    times - an 1-D np.array of the time points
+    n_lots - the number of lots
+    cv - the between-unit variability: the coefficient of variation of every parameter, a scalar or one value per parameter
+    lot_cv - the between-lot variability, in the same form
+    cov - optionally, instead of cv, the covariance matrix of the logarithms of the unit parameters (correlated variability)
+    sd_assay - the standard deviation of the additive analytical error of a measurement
+    rng - a np.random.Generator or a seed
+    n_units - the number of units of a lot
+
+    The parameters of a unit are lognormal around PAR: PAR*exp(lot effect + unit effect), with normal effects of
+    standard deviations sqrt(log(1 + cv^2)), so they keep the sign of PAR.
+
+    Returns the (n_lots, n_units, T) release of the virtual units at the times.
+    """
+    rng = np.random.default_rng(rng)
+    PAR = np.asarray(PAR, dtype=float)
+    n_PAR = PAR.size
+    sd_unit = np.sqrt(np.log1p(np.broadcast_to(np.asarray(cv, dtype=float)**2, (n_PAR,))))
+    sd_lot = np.sqrt(np.log1p(np.broadcast_to(np.asarray(lot_cv, dtype=float)**2, (n_PAR,))))
+
+    if cov is None:
+        log_units = rng.standard_normal((n_lots, n_units, n_PAR))*sd_unit
+    else:
+        log_units = rng.multivariate_normal(np.zeros(n_PAR), cov, size=(n_lots, n_units))
+    if np.any(sd_lot > 0):
+        log_units += rng.standard_normal((n_lots, 1, n_PAR))*sd_lot
+    PAR_units = PAR*np.exp(log_units.reshape(-1, n_PAR))
+
+    Release = C_model(*PAR_units.T, np.asarray(times, dtype=float))
+    if sd_assay > 0:
+        Release += rng.normal(0., sd_assay, Release.shape)
+    return Release.reshape(n_lots, n_units, -1)
+
+
+def _simulate_chunk(chunk):
+    """
+    Simulates and tests one chunk of lots, in a worker process with max_workers > 1; returns the counts of the lots
+    accepted at stage 1, 2 and 3.
+    """
+    C_model, PAR, times, low, high, margins, n_lots, variability, seed = chunk
+    Release = Simulate_units(C_model, PAR, times, n_lots, rng=np.random.default_rng(seed), **variability)
+    pass_1, pass_2, pass_3 = _stage_passes(Release, low, high, margins)
+    at_1 = pass_1
+    at_2 = ~at_1 & pass_2
+    at_3 = ~at_1 & ~at_2 & pass_3
+    return np.array([at_1.sum(), at_2.sum(), at_3.sum()])
+
+
+def Acceptance_probability(C_model, PAR, spec, rules='S', n_lots=100000, cv=0.1, lot_cv=0., cov=None, sd_assay=0.,
+                           seed=None, max_workers=1):
+    """
+    C_model - a model function from DD_basic_models or its registered name
+    PAR - the fitted parameters, a dict (e.g. from a Find_PAR_DEv_* fitter) or a sequence in the order of the model arguments
+    spec - the multipoint specification, a list of (time, low) or (time, low, high) limits in % of the label claim;
+    with rules='S' low is Q
+    rules - 'S' for the immediate release stages S1/S2/S3 or 'L' for the extended release stages L1/L2/L3 (see RULES)
+    n_lots - the number of simulated lots, each of 24 units
+    cv, lot_cv, cov, sd_assay - the variability of the units, see Simulate_units
+    seed - the root seed; every chunk of lots gets its own seed spawned from it, so the result does not depend on max_workers
+    max_workers - the chunks of lots are simulated on max_workers processes if max_workers > 1
+
+      The lots are generated in chunks of chunk_elements values. A lot is accepted at stage 1 if its first 6 units
+    pass the stage 1 rule at all the time points of spec, otherwise at stage 2 if its first 12 units pass the stage 2
+    rule, otherwise at stage 3 if its 24 units pass the stage 3 rule.
+
+    Tsong Y, Hammerstrom T, Chen JJ. Multipoint dissolution specification and acceptance sampling rule based on profile
+    modeling and principal component analysis. J Biopharm Stat. 1997;7:423–39.
+
+    bibtexkey: tsong1997
+
+    Returns a dict with the probabilities of acceptance at every stage ('S1', 'S2', 'S3' or 'L1', 'L2', 'L3'),
+    the overall probability of acceptance 'P_accept' and its Monte Carlo standard error 'SE', the expected number
+    of tested units 'units_tested', and the numbers of simulated lots 'n_lots' and units 'n_units'.
+    """
+    model = model_by_name(C_model) if isinstance(C_model, str) else model_of(C_model)
+    if isinstance(PAR, dict):
+        PAR = [PAR[name] for name in model.PAR_names]
+    spec = [tuple(limits) + (np.inf,)*(3 - len(limits)) for limits in spec]
+    times, low, high = (np.array(column, dtype=float) for column in zip(*spec))
+    variability = {'cv': cv, 'lot_cv': lot_cv, 'cov': cov, 'sd_assay': sd_assay}
+
+    lots_per_chunk = max(1, chunk_elements//(STAGE_UNITS[-1]*times.size))
+    sizes = [min(lots_per_chunk, n_lots - start) for start in range(0, n_lots, lots_per_chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    chunks = [(model.C_model, PAR, times, low, high, RULES[rules], size, variability, chunk_seed)
+              for size, chunk_seed in zip(sizes, seeds)]
+    if max_workers == 1 or len(chunks) == 1:
+        counts = sum(_simulate_chunk(chunk) for chunk in chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            counts = sum(executor.map(_simulate_chunk, chunks))
+
+    P_stage = counts/n_lots
+    P_accept = float(P_stage.sum())
+    Result = {'%s%d' % (rules, stage): float(P) for stage, P in enumerate(P_stage, start=1)}
+    Result.update({'P_accept': P_accept, 'SE': float(np.sqrt(P_accept*(1 - P_accept)/n_lots)),
+                   'units_tested': float(STAGE_UNITS[0]*P_stage[0] + STAGE_UNITS[1]*P_stage[1]
+                                         + STAGE_UNITS[2]*(1 - P_stage[0] - P_stage[1])),
+                   'n_lots': n_lots, 'n_units': n_lots*STAGE_UNITS[-1]})
+    return Result
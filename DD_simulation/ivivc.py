@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+In vitro - in vivo correlation: the plasma concentration predicted from a dissolution profile by
+the convolution of the release rate with the unit impulse response of a one-compartment model with
+biphasic first order absorption and first order elimination.
+
+The pharmacokinetic parameters are the ones of input.dat (see io_local.read_func.PK_Parameters_read):
+k_e - the elimination rate constant
+k_a1, k_a2 - the absorption rate constants of the two absorption phases
+frac - the fraction of the released drug absorbed in the first phase (with k_a1), 1 - frac in the second (with k_a2)
+T_lag - the delay of the second absorption phase after the release of the drug
+X0 - the dose
+V_val - the volume of distribution
+
+@author: edward
+"""
+
+import numpy as np
+from scipy.fft import rfft, irfft, next_fast_len
+
+# number of simulated values (profiles x parameter sets x time points) convolved at once
+chunk_elements = 1 << 24
+
+
+def _absorbed(k_a, k_e, u):
+    """
+    Returns the integral over [0, u] of the one-compartment response to a unit dose absorbed with k_a,
+    k_a/(k_a - k_e) (exp(-k_e s) - exp(-k_a s)), in closed form (also in the limit k_a = k_e).
+    """
+    equal = np.isclose(k_a, k_e)
+    k_a_safe = np.where(equal, 2*k_e + 1., k_a)
+    general = k_a_safe/(k_a_safe - k_e)*(-np.expm1(-k_e*u)/k_e + np.expm1(-k_a_safe*u)/k_a_safe)
+    limit = -(np.expm1(-k_e*u) + k_e*u*np.exp(-k_e*u))/k_e
+    return np.where(equal, limit, general)
+
+
+def _response(k_a, k_e, u):
+    """
+    Returns the one-compartment response to a unit dose absorbed with k_a, at the times u >= 0.
+    """
+    equal = np.isclose(k_a, k_e)
+    k_a_safe = np.where(equal, 2*k_e + 1., k_a)
+    general = k_a_safe/(k_a_safe - k_e)*(np.exp(-k_e*u) - np.exp(-k_a_safe*u))
+    return np.where(equal, k_e*u*np.exp(-k_e*u), general)
+
+
+def h_plasma(t, k_e, k_a1, k_a2, frac, V_val=1., T_lag=0.):
+    """
+    t - an 1-D np.array of the times elapsed since the release
+    k_e, k_a1, k_a2, frac, V_val, T_lag - pharmacokinetic parameters, scalars or arrays of P values
+
+    Returns the unit impulse response: the plasma concentration after the release of a unit amount of drug
+    at t = 0, of shape (T,) or (P, T).
+    """
+    k_e, k_a1, k_a2, frac, V_val, T_lag = (np.asarray(par, dtype=float)[..., np.newaxis] for par in (k_e, k_a1, k_a2, frac, V_val, T_lag))
+    t = np.asarray(t, dtype=float)
+    return (frac*_response(k_a1, k_e, t) + (1 - frac)*_response(k_a2, k_e, np.maximum(t - T_lag, 0.)))/V_val
+
+
+def H_plasma(t, k_e, k_a1, k_a2, frac, V_val=1., T_lag=0.):
+    """
+    t - an 1-D np.array of the times elapsed since the release
+    k_e, k_a1, k_a2, frac, V_val, T_lag - pharmacokinetic parameters, scalars or arrays of P values
+
+    Returns the integral of h_plasma from 0 to t, in closed form, of shape (T,) or (P, T).
+    """
+    k_e, k_a1, k_a2, frac, V_val, T_lag = (np.asarray(par, dtype=float)[..., np.newaxis] for par in (k_e, k_a1, k_a2, frac, V_val, T_lag))
+    t = np.asarray(t, dtype=float)
+    return (frac*_absorbed(k_a1, k_e, t) + (1 - frac)*_absorbed(k_a2, k_e, np.maximum(t - T_lag, 0.)))/V_val
+
+
+def C_plasma(t, F, k_e, k_a1, k_a2, frac, X0=1., V_val=1., T_lag=0., full_release=100.):
+    """
+    t - an 1-D np.array of equally spaced times, starting at the administration
+    F - the cumulative release at the times t, of shape (T,) or (N, T) for N profiles, e.g. a fitted model
+    C_model(*PAR, t) or a piecewise release DD_basic_models.piecewise_model.C_piecewise
+    k_e, k_a1, k_a2, frac, X0, V_val, T_lag - pharmacokinetic parameters (see the module description),
+    scalars or arrays of M values for M parameter sets; C_plasma(t, F, **PK_Parameters_read()) uses input.dat
+    full_release - the value of F corresponding to the release of the whole dose X0, 100 for F in percent
+
+      The plasma concentration is the convolution of the release rate with the unit impulse response h_plasma.
+    F is taken linear between the times t, i.e. the release rate constant on every time step, and the response
+    to every step is integrated exactly with the closed form integral H_plasma, so the result is exact for a
+    piecewise linear release and does not depend on an ODE step size; a release F[0] already at t[0] is a bolus.
+    The convolution of all the profiles with all the parameter sets is done by FFT, in chunks of chunk_elements values.
+
+    Returns the plasma concentration at the times t, of shape (N, M, T), without the N or M axis for a single
+    profile or parameter set.
+    """
+    t = np.asarray(t, dtype=float)
+    if t.ndim != 1 or t.size < 2:
+        raise ValueError('t has to be an 1-D array of at least 2 times')
+    dt = t[1] - t[0]
+    if dt <= 0 or not np.allclose(np.diff(t), dt, rtol=1e-9, atol=0.):
+        raise ValueError('t has to be equally spaced, interpolate the release on such a grid first')
+    F = np.asarray(F, dtype=float)
+    PK = np.broadcast_arrays(*(np.asarray(par, dtype=float) for par in (k_e, k_a1, k_a2, frac, X0, V_val, T_lag)))
+    PK_shape = PK[0].shape
+    k_e, k_a1, k_a2, frac, X0, V_val, T_lag = (par.reshape(-1) for par in PK)
+    F_2d = F.reshape(-1, t.size)
+    N, M, G = F_2d.shape[0], k_e.size, t.size
+
+    # release rate of every time step and the exact response of a unit rate step, lagging by j steps
+    Rate = np.diff(F_2d, axis=1)/(dt*full_release)
+    H = H_plasma(np.arange(G)*dt, k_e, k_a1, k_a2, frac, V_val, T_lag)
+    Step_response = np.diff(H, axis=1)
+    Bolus = F_2d[:, :1, np.newaxis]/full_release*h_plasma(t - t[0], k_e, k_a1, k_a2, frac, V_val, T_lag)
+
+    n_fft = next_fast_len(2*(G - 1))
+    Rate_fft = rfft(Rate, n=n_fft, axis=1)[:, np.newaxis, :]
+    Result = np.empty((N, M, G))
+    Result[:, :, 0] = 0.
+    M_chunk = max(1, chunk_elements//(N*n_fft))
+    for start in range(0, M, M_chunk):
+        part = slice(start, start+M_chunk)
+        Step_fft = rfft(Step_response[part], n=n_fft, axis=1)[np.newaxis]
+        Result[:, part, 1:] = irfft(Rate_fft*Step_fft, n=n_fft, axis=2)[:, :, :G-1]
+    Result += Bolus
+    Result *= X0[:, np.newaxis]
+    return Result.reshape(F.shape[:-1] + PK_shape + (G,))
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite of MoDDiss: model kernels, Find_PAR_DEv_* fitters, multi-model selection,
+batch fitting and the piecewise release engine, on the bundled Fasten profiles and on
+synthetic profiles of growing length and batch count.
+
+Usage (from the repository root):
+    python benchmarks/bench_moddiss.py run [--quick] [-o results.json]
+    python benchmarks/bench_moddiss.py compare old.json new.json [--threshold 1.25]
+
+'run' writes a JSON record of every case (wall time, objective evaluations, final RSS) with
+the commit and library versions; 'compare' flags the cases which became slower than threshold
+times the old wall time, or whose RSS got worse, and exits with status 1 if there is any.
+
+@author: edward
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import scipy
+from DD_basic_models.registry import MODELS
+from DD_basic_models.piecewise_model import C_piecewise
+from DD_basic_models.first_order_model import C_first_order_F_max_T_lag
+from DD_basic_opt import zero_order_opt, first_order_opt, Higuchi_models_opt, Weibull_opt, Korsmeyer_Peppas_opt, Hixson_Crowell_opt, Hopfenberg_opt
+from DD_basic_opt.model_selection import fit_all
+from DD_basic_opt.batch_opt import Batch_jobs, Fit_batch
+from io_local.profile_store import Load_profiles
+
+FITTERS = [getattr(module, name) for module in (zero_order_opt, first_order_opt, Higuchi_models_opt,
+                                                  Weibull_opt, Korsmeyer_Peppas_opt, Hixson_Crowell_opt, Hopfenberg_opt)
+           for name in sorted(dir(module)) if name.startswith('Find_PAR_DEv_')]
+
+
+def _timed(func, repeat):
+    """
+    Returns the best wall time of repeat calls of func and the value of the last call.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def synthetic_profile(n_points, seed=0, t_max=24.):
+    """
+    Returns a first order release profile with F_max and T_lag sampled at n_points times, with a Gaussian noise of standard deviation 1.
+    """
+    rng = np.random.default_rng(seed)
+    Texp = np.linspace(0., t_max, n_points)
+    Cexp = C_first_order_F_max_T_lag(0.3, 90., 0.5, Texp) + rng.normal(0., 1., n_points)
+    return Texp, Cexp
+
+
+def bench_kernels(sizes, batches, repeat):
+    rows = []
+    for name, model in MODELS.items():
+        PAR = [np.mean(bound) for bound in model.bounds]
+        for n_points in sizes:
+            t = np.linspace(0., 24., n_points)
+            for P in batches:
+                if P*n_points > 10**7:
+                    continue
+                PAR_P = [np.full(P, par) for par in PAR]
+                out = np.empty((P, n_points))
+                wall, _ = _timed(lambda: model.C_model(*PAR_P, t, out=out), repeat)
+                rows.append({'group': 'kernel', 'case': name, 'points': n_points, 'batch': P, 'wall_time': wall})
+    return rows
+
+
+def bench_fitters(profiles, repeat):
+    rows = []
+    for profile_name, (Texp, Cexp) in profiles.items():
+        for fitter in FITTERS:
+            wall, (PAR, Result) = _timed(lambda: fitter(Texp, Cexp, seed=0, full_output=True), repeat)
+            rows.append({'group': 'fitter', 'case': fitter.__name__, 'profile': profile_name, 'points': len(Texp),
+                         'wall_time': wall, 'nfev': int(Result.nfev), 'RSS': float(Result.fun)})
+    return rows
+
+
+def bench_fit_all(profiles, repeat):
+    rows = []
+    for profile_name, (Texp, Cexp) in profiles.items():
+        wall, Table = _timed(lambda: fit_all(Texp, Cexp, seed=0), repeat)
+        rows.append({'group': 'fit_all', 'case': 'fit_all', 'profile': profile_name, 'points': len(Texp),
+                     'wall_time': wall, 'nfev': int(sum(Row['nfev'] for Row in Table)),
+                     'RSS': float(Table[0]['RSS'])})
+    return rows
+
+
+def bench_batch(batch_counts, max_workers):
+    rows = []
+    for n_profiles in batch_counts:
+        profiles = {'synthetic-%d' % i: synthetic_profile(36, seed=i) for i in range(n_profiles)}
+        jobs = Batch_jobs(profiles, FITTERS)
+        start = time.perf_counter()
+        results = list(Fit_batch(jobs, max_workers=max_workers, seed=0))
+        wall = time.perf_counter() - start
+        rows.append({'group': 'batch', 'case': 'Fit_batch', 'batch': n_profiles, 'jobs': len(jobs), 'workers': max_workers,
+                     'wall_time': wall, 'nfev': int(sum(Result.nfev for _, _, Result in results))})
+    return rows
+
+
+def bench_piecewise(sizes, interval_counts, repeat):
+    rows = []
+    for n_intervals in interval_counts:
+        breakpoints = np.linspace(0., 48., n_intervals + 1)
+        kernels = [('zero_order', 'first_order_F_max')[i % 2] for i in range(n_intervals)]
+        PAR = [(1.,) if i % 2 == 0 else (0.5, 10.) for i in range(n_intervals)]
+        for n_points in sizes:
+            t = np.linspace(0., 48., n_points)
+            out = np.empty(n_points)
+            wall, _ = _timed(lambda: C_piecewise(t, breakpoints, kernels, PAR, out=out), repeat)
+            rows.append({'group': 'piecewise', 'case': 'C_piecewise', 'points': n_points, 'intervals': n_intervals,
+                         'wall_time': wall})
+    return rows
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(quick=False, max_workers=None):
+    """
+    Runs all the benchmark groups and returns the JSON-serializable record.
+    """
+    repeat = 1 if quick else 3
+    sizes = [10, 1000, 10**5] if quick else [10, 100, 1000, 10**4, 10**5, 10**6]
+    fit_sizes = [10, 100, 1000] if quick else [10, 100, 1000, 10**4]
+    profiles = Load_profiles(os.path.join(ROOT, 'Fasten-*.dat')).as_dict()
+    profiles.update({'synthetic-%d' % n: synthetic_profile(n) for n in fit_sizes})
+
+    rows = []
+    rows += bench_kernels(sizes, [1, 100], repeat)
+    rows += bench_fitters(profiles, repeat)
+    rows += bench_fit_all(profiles, repeat)
+    rows += bench_batch([1, 4] if quick else [1, 4, 16, 64], max_workers)
+    rows += bench_piecewise(sizes, [10, 1000], repeat)
+    return {'commit': _commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'scipy': scipy.__version__, 'machine': platform.machine(), 'quick': quick,
+            'results': rows}
+
+
+def _case_key(row):
+    return tuple(sorted((k, v) for k, v in row.items() if k not in ('wall_time', 'nfev', 'RSS')))
+
+
+def compare(old, new, threshold=1.25, rss_rtol=1e-6):
+    """
+    old, new - two records written by run
+    threshold - a case is a regression if its wall time grew by more than this factor
+    rss_rtol - a fit is a regression if its RSS grew by more than this relative tolerance
+
+    Returns the list of (case, message) regressions.
+    """
+    old_rows = {_case_key(row): row for row in old['results']}
+    regressions = []
+    for row in new['results']:
+        key = _case_key(row)
+        if key not in old_rows:
+            continue
+        before = old_rows[key]
+        ratio = row['wall_time']/before['wall_time'] if before['wall_time'] > 0 else 1.
+        if ratio > threshold:
+            regressions.append((dict(key), 'wall time %.3g s -> %.3g s (x%.2f)' % (before['wall_time'], row['wall_time'], ratio)))
+        if 'RSS' in row and row['RSS'] > before['RSS']*(1 + rss_rtol) + 1e-12:
+            regressions.append((dict(key), 'RSS %.6g -> %.6g' % (before['RSS'], row['RSS'])))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='MoDDiss benchmark suite')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks and write a JSON record')
+    run_parser.add_argument('--quick', action='store_true', help='smaller sizes and a single repetition')
+    run_parser.add_argument('--workers', type=int, default=None, help='worker processes of the batch benchmark')
+    run_parser.add_argument('-o', '--output', default=None, help='output file, bench-<commit>.json by default')
+    compare_parser = commands.add_parser('compare', help='flag regressions between two records')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        record = run(args.quick, args.workers)
+        output = args.output or 'bench-%s.json' % (record['commit'] or 'local')[:10]
+        with open(output, 'w') as output_file:
+            json.dump(record, output_file, indent=1)
+        print('%d cases written to %s' % (len(record['results']), output))
+        return 0
+
+    with open(args.old) as old_file, open(args.new) as new_file:
+        regressions = compare(json.load(old_file), json.load(new_file), args.threshold)
+    for case, message in regressions:
+        print('REGRESSION', json.dumps(case), message)
+    print('%d regression(s)' % len(regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar store of dissolution profiles read from the Fasten-like .dat files,
+with a memory-mapped binary cache.
+
+A profile file starts with the header 't in <time unit>,<profile name>' followed by 'time,value' rows.
+The store keeps all profiles in two flat arrays, time and values, and the offsets of every profile:
+profile i is time[offsets[i]:offsets[i+1]], values[offsets[i]:offsets[i+1]].
+
+@author: edward
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import numpy as np
+
+HEADER = re.compile(r'^\s*t\s+in\s+(?P<unit>[^,]+?)\s*,\s*(?P<name>.*?)\s*$')
+CACHE_VERSION = 1
+
+
+def Read_profile(file_name):
+    """
+    file_name - a profile file with the header 't in <unit>,<name>'
+
+    Returns (name, unit, Texp, Cexp), or None if the file does not start with a profile header.
+    """
+    with open(file_name) as input_file:
+        match = HEADER.match(input_file.readline())
+        if match is None:
+            return None
+        Data = np.loadtxt(input_file, delimiter=',', ndmin=2)
+    return match.group('name'), match.group('unit'), Data[:, 0].copy(), Data[:, 1].copy()
+
+
+class Profile_store:
+    """
+    names, units, files - the name, time unit and source file of every profile
+    time, values - the flat arrays of all the times and values (np.memmap when loaded from the cache)
+    offsets - the K+1 offsets of the K profiles in time and values
+    """
+
+    def __init__(self, names, units, files, time, values, offsets):
+        self.names, self.units, self.files = list(names), list(units), list(files)
+        self.time, self.values, self.offsets = time, values, offsets
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, key):
+        """
+        Returns (Texp, Cexp) of the profile with the index or the name key, as zero-copy views.
+        """
+        i = self._index[key] if isinstance(key, str) else key
+        start, stop = self.offsets[i], self.offsets[i+1]
+        return self.time[start:stop], self.values[start:stop]
+
+    def items(self):
+        return ((name, self[i]) for i, name in enumerate(self.names))
+
+    def as_dict(self):
+        """
+        Returns {profile name: (Texp, Cexp)}, e.g. for DD_basic_opt.batch_opt.Batch_jobs.
+        """
+        return dict(self.items())
+
+
+def _profile_files(source):
+    """
+    Returns the sorted absolute paths of the files of source, a directory (all its .dat files) or a glob pattern.
+    """
+    pattern = os.path.join(source, '*.dat') if os.path.isdir(source) else source
+    return sorted(os.path.abspath(f) for f in glob.glob(pattern) if os.path.isfile(f))
+
+
+def _file_hash(file_name):
+    with open(file_name, 'rb') as input_file:
+        return hashlib.sha1(input_file.read()).hexdigest()
+
+
+def _file_stats(files, with_hash):
+    stats = []
+    for f in files:
+        st = os.stat(f)
+        stats.append([f, st.st_size, st.st_mtime_ns, _file_hash(f) if with_hash else None])
+    return stats
+
+
+def _build_store(files):
+    names, units, sources, times, values = [], [], [], [], []
+    for f in files:
+        profile = Read_profile(f)
+        if profile is None:
+            continue
+        name, unit, Texp, Cexp = profile
+        names.append(name); units.append(unit); sources.append(f)
+        times.append(Texp); values.append(Cexp)
+    offsets = np.cumsum([0] + [len(Texp) for Texp in times], dtype=np.int64)
+    time = np.concatenate(times) if times else np.empty(0)
+    value = np.concatenate(values) if values else np.empty(0)
+    return Profile_store(names, units, sources, time, value, offsets)
+
+
+def _cache_is_valid(manifest, stats, verify_hash):
+    if manifest.get('version') != CACHE_VERSION or len(manifest['stats']) != len(stats):
+        return False
+    for (f, size, mtime, digest), (f_c, size_c, mtime_c, digest_c) in zip(stats, manifest['stats']):
+        if f != f_c or size != size_c:
+            return False
+        if mtime != mtime_c and not (verify_hash and _file_hash(f) == digest_c):
+            return False
+    return True
+
+
+def _read_cache(cache_path, manifest):
+    time = np.load(os.path.join(cache_path, 'time.npy'), mmap_mode='r')
+    values = np.load(os.path.join(cache_path, 'values.npy'), mmap_mode='r')
+    offsets = np.load(os.path.join(cache_path, 'offsets.npy'))
+    return Profile_store(manifest['names'], manifest['units'], manifest['files'], time, values, offsets)
+
+
+def _write_cache(cache_path, store, stats):
+    parent = os.path.dirname(cache_path)
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=parent)
+    np.save(os.path.join(tmp_path, 'time.npy'), store.time)
+    np.save(os.path.join(tmp_path, 'values.npy'), store.values)
+    np.save(os.path.join(tmp_path, 'offsets.npy'), store.offsets)
+    manifest = {'version': CACHE_VERSION, 'names': store.names, 'units': store.units,
+                'files': store.files, 'stats': stats}
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w') as output_file:
+        json.dump(manifest, output_file)
+    if os.path.isdir(cache_path):
+        shutil.rmtree(cache_path)
+    os.replace(tmp_path, cache_path)
+
+
+def Load_profiles(source, cache_dir=None, verify_hash=True):
+    """
+    source - a directory (all its .dat files are scanned) or a glob pattern of profile files;
+    files without the 't in <unit>,<name>' header (e.g. input.dat) are skipped
+    cache_dir - an optional directory of the binary cache; None disables caching
+    verify_hash - if True, a file whose modification time changed is still served from the cache
+    when its content hash is unchanged
+
+    Parses the profiles into a single columnar Profile_store. With a cache_dir, the store is saved as .npy files
+    and reloaded memory-mapped (zero-copy) as long as the set of files, their sizes and modification times
+    (or content hashes) are unchanged; otherwise the files are parsed again and the cache is rewritten.
+
+    Returns the Profile_store.
+    """
+    files = _profile_files(source)
+    if cache_dir is None:
+        return _build_store(files)
+
+    key = hashlib.sha1(json.dumps(files).encode()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, 'profiles-' + key)
+    manifest_file = os.path.join(cache_path, 'manifest.json')
+    stats = _file_stats(files, with_hash=False)
+    if os.path.isfile(manifest_file):
+        with open(manifest_file) as input_file:
+            manifest = json.load(input_file)
+        if _cache_is_valid(manifest, stats, verify_hash):
+            if any(stat[2] != stat_c[2] for stat, stat_c in zip(stats, manifest['stats'])):
+                for stat, stat_c in zip(stats, manifest['stats']):
+                    stat_c[2] = stat[2]
+                with open(manifest_file, 'w') as output_file:
+                    json.dump(manifest, output_file)
+            return _read_cache(cache_path, manifest)
+
+    store = _build_store(files)
+    _write_cache(cache_path, store, _file_stats(files, with_hash=verify_hash))
+    return _read_cache(cache_path, {'names': store.names, 'units': store.units, 'files': store.files})
@@ -3,17 +3,29 @@
 
 import json
 
-def Time_Intervals_read():
+def Time_Intervals_read(file_name='time_interval.dat'):
     """
+    file_name - the json file with the boundaries of the time intervals, time_interval.dat by default
+
     Read the intervals from json file. The intervals has to be ordered from low to high, include first and last point time
     """   
 
-    input_file = open('time_interval.dat')
-    input_str = input_file.read()
-    Param = json.loads(input_str)
-    list_of_periods = Param.values()
-    list_of_periods.sort()
+    with open(file_name) as input_file:
+        Param = json.load(input_file)
+    list_of_periods = sorted(Param.values())
     
     return list_of_periods
 
 
+def PK_Parameters_read(file_name='input.dat'):
+    """
+    file_name - the json file with the pharmacokinetic parameters, input.dat by default
+
+    Read the pharmacokinetic parameters of the in vivo simulation (k_e, k_a1, k_a2, frac, X0, V_val, T_lag)
+    from json file, see DD_simulation.ivivc.C_plasma
+    """
+
+    with open(file_name) as input_file:
+        Param = json.load(input_file)
+
+    return Param
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line interface of MoDDiss, headless and streaming:
+
+    python moddiss.py fit 'Fasten-*.dat' [--models first_order_F_max,Higuchi] [--workers 4] [--format jsonl|csv] [--plot DIR]
+    python moddiss.py piecewise [--intervals time_interval.dat] [--model zero_order] --par 1 3 2 5 [--t-max 48] [--n 100]
+    python moddiss.py simulate 'Fasten-*.dat' [--pk input.dat] [--dt 0.1] [--scale 100]
+
+(or python -m moddiss ...). The results are written to the output (standard output by default) as JSON lines or CSV
+rows, flushed as soon as every profile is done. NumPy, SciPy and the DD packages are imported by the subcommand
+which needs them and matplotlib only with --plot (with the non-interactive Agg backend), so the start-up of a batch
+invocation does not pay for the unused parts.
+
+@author: edward
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+FIT_FIELDS = ['profile', 'rank', 'model', 'PAR', 'RSS', 'R2_adj', 'AIC', 'BIC', 'nfev']
+
+
+def _number(value):
+    """
+    Returns value with the NumPy numbers and arrays (also within dicts) converted to Python numbers and lists.
+    """
+    if isinstance(value, dict):
+        return {key: _number(item) for key, item in value.items()}
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+class Row_writer:
+    """
+    stream - the output text stream
+    format - 'jsonl' (one JSON object per line) or 'csv'
+    fields - the columns of the CSV output; the other keys of a row are dropped, dicts and lists are written as JSON
+
+    Writes the rows one by one, flushing the stream after every batch so that the consumer sees the results
+    of a profile as soon as it is done.
+    """
+
+    def __init__(self, stream, format='jsonl', fields=None):
+        self.stream = stream
+        self.format = format
+        if format == 'csv':
+            self._csv = csv.DictWriter(stream, fieldnames=fields, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            row = {key: _number(value) for key, value in row.items()}
+            if self.format == 'csv':
+                self._csv.writerow({key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                                    for key, value in row.items()})
+            else:
+                self.stream.write(json.dumps(row) + '\n')
+        self.stream.flush()
+
+
+def _load_profiles(sources, scale):
+    """
+    Returns the {name: (Texp, Cexp)} profiles of all the sources (directories or glob patterns), Cexp times scale.
+    """
+    from io_local.profile_store import Load_profiles
+    profiles = {}
+    for source in sources:
+        for name, (Texp, Cexp) in Load_profiles(source).items():
+            profiles[name] = (Texp, Cexp*scale)
+    if not profiles:
+        raise SystemExit('moddiss: no profile found in %s' % ', '.join(sources))
+    return profiles
+
+
+def _fit_profile(job):
+    """
+    Fits all the requested models to one profile; runs in a worker process with --workers > 1.
+    """
+    from DD_basic_opt.model_selection import fit_all
+    name, Texp, Cexp, models, seed, criterion = job
+    Table = fit_all(Texp, Cexp, models, seed=seed, criterion=criterion)
+    return name, [dict(Row, profile=name, rank=rank) for rank, Row in enumerate(Table, start=1)]
+
+
+def _plot_fit(directory, name, Texp, Cexp, Best):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy as np
+    from DD_basic_models.registry import model_by_name
+    model = model_by_name(Best['model'])
+    t = np.linspace(0., Texp.max(), 200)
+    figure, axes = plt.subplots()
+    axes.plot(Texp, Cexp, 'x', label=name)
+    axes.plot(t, model.C_model(*Best['PAR'].values(), t), '-', label=Best['model'])
+    axes.set_xlabel('t')
+    axes.legend()
+    figure.savefig(os.path.join(directory, '%s.png' % name.replace(os.sep, '_')))
+    plt.close(figure)
+
+
+def command_fit(args, writer):
+    import numpy as np
+    profiles = _load_profiles(args.profiles, args.scale)
+    models = args.models.split(',') if args.models else None
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(args.seed).spawn(len(profiles))]
+    jobs = [(name, np.asarray(Texp), np.asarray(Cexp), models, seed, args.criterion)
+            for (name, (Texp, Cexp)), seed in zip(profiles.items(), seeds)]
+
+    def write(results):
+        for name, Rows in results:
+            writer.write(Rows)
+            if args.plot:
+                os.makedirs(args.plot, exist_ok=True)
+                _plot_fit(args.plot, name, *profiles[name], Rows[0])
+
+    if args.workers == 1:
+        write(map(_fit_profile, jobs))
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        try:
+            write(future.result() for future in as_completed([executor.submit(_fit_profile, job) for job in jobs]))
+        except BaseException:
+            # a failed fit or a closed output: do not wait for the fits still queued
+            executor.shutdown(cancel_futures=True)
+            raise
+
+
+def command_piecewise(args, writer):
+    import numpy as np
+    from io_local.read_func import Time_Intervals_read
+    from DD_basic_models.piecewise_model import C_piecewise
+    breakpoints = Time_Intervals_read(args.intervals)
+    PAR = [tuple(float(par) for par in interval.split(',')) for interval in args.par]
+    t = np.linspace(0., args.t_max, args.n)
+    C = C_piecewise(t, breakpoints, args.model, PAR, continuous=args.continuous)
+    writer.write({'t': t_i, 'C': C_i} for t_i, C_i in zip(t.tolist(), C.tolist()))
+    if args.plot:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        figure, axes = plt.subplots()
+        axes.plot(t, C, '-x')
+        figure.savefig(args.plot)
+        plt.close(figure)
+
+
+def command_simulate(args, writer):
+    import numpy as np
+    from io_local.read_func import PK_Parameters_read
+    from DD_simulation.ivivc import C_plasma
+    PK = PK_Parameters_read(args.pk)
+    for name, (Texp, Cexp) in _load_profiles(args.profiles, args.scale).items():
+        t = np.arange(0., (args.t_max or Texp.max()) + args.dt/2, args.dt)
+        order = np.argsort(Texp)
+        F = np.interp(t, Texp[order], Cexp[order])
+        C = C_plasma(t, F, **PK)
+        if writer.format == 'csv':
+            writer.write({'profile': name, 't': t_i, 'C_plasma': C_i} for t_i, C_i in zip(t.tolist(), C.tolist()))
+        else:
+            writer.write([{'profile': name, 't': t, 'C_plasma': C}])
+
+
+def main(argv=None):
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('-o', '--output', default='-', help='output file, the standard output by default')
+    output.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl', help='JSON lines (default) or CSV rows')
+    parser = argparse.ArgumentParser(prog='moddiss', description='Method of drug dissolution: fitting and simulation of dissolution profiles')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fit = commands.add_parser('fit', parents=[output], help='fit the DD models to dissolution profiles and rank them')
+    fit.add_argument('profiles', nargs='+', help='profile files: directories or glob patterns of Fasten-like .dat files')
+    fit.add_argument('--models', help='comma separated names of registered models, all of them by default')
+    fit.add_argument('--criterion', choices=['AIC', 'BIC', 'R2_adj'], default='AIC')
+    fit.add_argument('--seed', type=int, default=None)
+    fit.add_argument('--scale', type=float, default=1., help='factor applied to the profile values, e.g. 100 for fractions')
+    fit.add_argument('--workers', type=int, default=1, help='worker processes, profiles are fitted in parallel if > 1')
+    fit.add_argument('--plot', metavar='DIR', help='save a plot of the best fit of every profile in DIR')
+
+    piecewise = commands.add_parser('piecewise', parents=[output], help='evaluate a piecewise release on the intervals of a time_interval.dat file')
+    piecewise.add_argument('--intervals', default='time_interval.dat')
+    piecewise.add_argument('--model', default='zero_order', help='registered model name used on every interval')
+    piecewise.add_argument('--par', nargs='+', required=True, help='the parameters of every interval, comma separated within an interval')
+    piecewise.add_argument('--t-max', type=float, default=48.)
+    piecewise.add_argument('--n', type=int, default=100, help='number of time points')
+    piecewise.add_argument('--continuous', action='store_true', help='continuous release across the intervals')
+    piecewise.add_argument('--plot', metavar='FILE', help='save a plot of the release in FILE')
+
+    simulate = commands.add_parser('simulate', parents=[output], help='predict the plasma concentration of dissolution profiles')
+    simulate.add_argument('profiles', nargs='+', help='profile files: directories or glob patterns of Fasten-like .dat files')
+    simulate.add_argument('--pk', default='input.dat', help='json file of the pharmacokinetic parameters')
+    simulate.add_argument('--dt', type=float, default=0.1, help='time step of the simulation')
+    simulate.add_argument('--t-max', type=float, default=None, help='end of the simulation, the last sample by default')
+    simulate.add_argument('--scale', type=float, default=1., help='factor applied to the profile values, e.g. 100 for fractions')
+
+    args = parser.parse_args(argv)
+    fields = {'fit': FIT_FIELDS, 'piecewise': ['t', 'C'], 'simulate': ['profile', 't', 'C_plasma']}[args.command]
+    stream = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        writer = Row_writer(stream, args.format, fields)
+        {'fit': command_fit, 'piecewise': command_piecewise, 'simulate': command_simulate}[args.command](args, writer)
+    except BrokenPipeError:
+        # the consumer (e.g. head) stopped reading: stop quietly
+        sys.stdout = open(os.devnull, 'w')
+        return 1
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
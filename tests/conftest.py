@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures of the MoDDiss tests: the bundled Fasten dissolution profiles.
+
+@author: edward
+"""
+
+import os
+import numpy as np
+import pytest
+from io_local.profile_store import Load_profiles
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def fasten_profiles():
+    """
+    The {name: (Texp, Cexp)} profiles of the Fasten-*.dat files, as float arrays.
+    """
+    return {name: (np.asarray(Texp, dtype=float), np.asarray(Cexp, dtype=float))
+            for name, (Texp, Cexp) in Load_profiles(os.path.join(REPO_DIR, 'Fasten-*.dat')).items()}
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the content-addressed fit cache: hits, copies of the cached results and the eviction order.
+
+@author: edward
+"""
+
+import os
+import time
+import numpy as np
+from scipy.optimize import OptimizeResult
+from DD_basic_opt.fit_cache import Fit_cache, Cached_fit
+from DD_basic_opt.Higuchi_models_opt import Find_PAR_DEv_Higuchi
+
+
+def test_cached_fit_is_served_from_the_cache(tmp_path, fasten_profiles):
+    Texp, Cexp = fasten_profiles['ROP-103-0318']
+    cache = Fit_cache(str(tmp_path))
+    PAR, Result = Cached_fit(cache, Find_PAR_DEv_Higuchi, Texp, Cexp, seed=0, full_output=True)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert Cached_fit(cache, Find_PAR_DEv_Higuchi, Texp, Cexp, seed=0) == PAR
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert Cached_fit(Fit_cache(str(tmp_path), hot_size=0), Find_PAR_DEv_Higuchi, Texp, Cexp, seed=0) == PAR
+
+
+def test_cached_results_are_copies(tmp_path):
+    cache = Fit_cache(str(tmp_path))
+    cache.put('ab' + 62*'0', {'k_H': 1.}, OptimizeResult(x=np.array([1.]), fun=2.))
+    Entry = cache.get('ab' + 62*'0')
+    Entry['Result'].x[0] = -1.
+    Entry['PAR']['k_H'] = -1.
+    Entry = cache.get('ab' + 62*'0')
+    assert Entry['Result'].x[0] == 1. and Entry['PAR']['k_H'] == 1.
+
+
+def test_eviction_drops_the_least_recently_used_results(tmp_path):
+    keys = [2*c + 62*'0' for c in 'abcd']
+    Result = OptimizeResult(x=np.array([1.]), fun=2.)
+    probe = Fit_cache(str(tmp_path / 'probe'))
+    probe.put(keys[0], {'k_H': 1.}, Result)
+    cache = Fit_cache(str(tmp_path / 'cache'), max_bytes=3.5*probe._size)
+    for key in keys[:3]:
+        cache.put(key, {'k_H': 1.}, Result)
+    now = time.time()
+    for age, key in zip((30, 20, 10), keys[:3]):
+        os.utime(cache._path(key), (now - age, now - age))
+    assert cache.get(keys[0]) is not None    # a hit from the hot tier renews the oldest result
+    cache.put(keys[3], {'k_H': 1.}, Result)
+    assert [os.path.exists(cache._path(key)) for key in keys] == [True, False, True, True]
+    assert keys[1] not in cache.hot and keys[0] in cache.hot
+
+
+def test_fit_key_holds_the_default_bounds_of_the_fitter(fasten_profiles):
+    from DD_basic_opt.fit_cache import Fit_key
+    Texp, Cexp = fasten_profiles['ROP-103-0318']
+
+    def fitter(Texp, Cexp, k_min=0., k_max=100., weights=None, seed=None, full_output=False, recorder=None):
+        pass
+
+    def refitter(Texp, Cexp, k_min=0., k_max=50., weights=None, seed=None, full_output=False, recorder=None):
+        pass
+    refitter.__qualname__ = fitter.__qualname__
+
+    key = Fit_key(fitter, Texp, Cexp, 0)
+    assert Fit_key(fitter, Texp, Cexp, 0, k_max=100.) == key
+    assert Fit_key(fitter, Texp, Cexp, 0, recorder=object()) == key
+    assert Fit_key(refitter, Texp, Cexp, 0) != key
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fixed-seed RSS checks of the fitting engine on the bundled Fasten profiles.
+
+The reference RSS of every model is the best of long differential evolution runs (maxiter 3000, popsize 40,
+3 seeds, Nelder-Mead polish) within the default bounds of the registry; for first_order_T_lag and
+Hixson_Crowell_T_lag, whose optimum is at T_lag = 0 and which long runs miss, it is the RSS of the nested model without lag.
+
+@author: edward
+"""
+
+import numpy as np
+import pytest
+from DD_basic_models.registry import MODELS
+from DD_basic_opt.hybrid_opt import Find_PAR
+from DD_basic_opt.linear_opt import is_linear, is_separable
+
+REFERENCE_RSS = {
+    'ROP-103-0318': {'zero_order': 3.909879, 'zero_order_T_lag': 1.906410, 'zero_order_F0': 1.906410,
+                     'first_order': 3.789413, 'first_order_T_lag': 3.789413, 'first_order_F_max': 0.1173814,
+                     'first_order_F_max_T_lag': 0.1173814, 'Higuchi': 0.6254866, 'Higuchi_T_lag': 0.4494916,
+                     'Higuchi_F0': 0.6254866, 'Weibull': 27.64205, 'Weibull_T_lag': 27.64205,
+                     'Korsmeyer_Peppas': 0.4990224, 'Korsmeyer_Peppas_T_lag': 0.4334569, 'Korsmeyer_Peppas_F0': 0.4990224,
+                     'Hixson_Crowell': 3.829251, 'Hixson_Crowell_T_lag': 3.829251, 'Hopfenberg': 3.829251,
+                     'Hopfenberg_T_lag': 3.829251},
+    'RR2Pct01': {'zero_order': 5.690371, 'zero_order_T_lag': 2.626807, 'zero_order_F0': 2.626807,
+                 'first_order': 5.543611, 'first_order_T_lag': 5.543611, 'first_order_F_max': 0.1330866,
+                 'first_order_F_max_T_lag': 0.1330866, 'Higuchi': 0.6876977, 'Higuchi_T_lag': 0.6269570,
+                 'Higuchi_F0': 0.6876977, 'Weibull': 31.95594, 'Weibull_T_lag': 31.95594,
+                 'Korsmeyer_Peppas': 0.6875259, 'Korsmeyer_Peppas_T_lag': 0.5838565, 'Korsmeyer_Peppas_F0': 0.6875259,
+                 'Hixson_Crowell': 5.592205, 'Hixson_Crowell_T_lag': 5.592205, 'Hopfenberg': 5.592205,
+                 'Hopfenberg_T_lag': 5.592205},
+    'ReQuip CR': {'zero_order': 2.903007, 'zero_order_T_lag': 1.585226, 'zero_order_F0': 1.585226,
+                  'first_order': 2.802489, 'first_order_T_lag': 2.802489, 'first_order_F_max': 0.2071219,
+                  'first_order_F_max_T_lag': 0.2071219, 'Higuchi': 0.9617724, 'Higuchi_T_lag': 0.5877039,
+                  'Higuchi_F0': 0.9617724, 'Weibull': 24.70199, 'Weibull_T_lag': 24.70199,
+                  'Korsmeyer_Peppas': 0.5630786, 'Korsmeyer_Peppas_T_lag': 0.5333954, 'Korsmeyer_Peppas_F0': 0.5630786,
+                  'Hixson_Crowell': 2.835688, 'Hixson_Crowell_T_lag': 2.835688, 'Hopfenberg': 2.835688,
+                  'Hopfenberg_T_lag': 2.835688},
+}
+
+HYBRID_MODELS = [name for name, model in MODELS.items() if not (is_linear(model.C_model) or is_separable(model.C_model))]
+ANALYTIC_MODELS = [name for name in MODELS if name not in HYBRID_MODELS]
+
+
+def assert_reference_fit(profiles, profile, name, seed):
+    Texp, Cexp = profiles[profile]
+    model = MODELS[name]
+    Result = Find_PAR(model.C_model, Texp, Cexp, list(model.bounds), seed=seed)
+    assert np.all(Result.x >= np.array(model.bounds)[:, 0]) and np.all(Result.x <= np.array(model.bounds)[:, 1])
+    assert Result.fun <= REFERENCE_RSS[profile][name]*(1 + 1e-5)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('name', HYBRID_MODELS)
+@pytest.mark.parametrize('profile', sorted(REFERENCE_RSS))
+def test_hybrid_fit_reaches_reference_RSS(fasten_profiles, profile, name, seed):
+    assert_reference_fit(fasten_profiles, profile, name, seed)
+
+
+@pytest.mark.parametrize('name', ANALYTIC_MODELS)
+@pytest.mark.parametrize('profile', sorted(REFERENCE_RSS))
+def test_linear_and_varpro_fit_reaches_reference_RSS(fasten_profiles, profile, name):
+    assert_reference_fit(fasten_profiles, profile, name, None)
+
+
+@pytest.mark.parametrize('profile', sorted(REFERENCE_RSS))
+def test_lagged_fit_does_not_stop_on_the_no_release_plateau(fasten_profiles, profile):
+    from DD_basic_opt.first_order_opt import Find_PAR_DEv_first_order, Find_PAR_DEv_first_order_T_lag
+    Texp, Cexp = fasten_profiles[profile]
+    PAR, Result = Find_PAR_DEv_first_order_T_lag(Texp, Cexp, seed=0, full_output=True)
+    assert PAR['T_lag'] < Texp.max()
+    assert Result.success
+    assert Result.fun <= Find_PAR_DEv_first_order(Texp, Cexp, seed=0, full_output=True)[1].fun*(1 + 1e-6)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('name', ['Weibull_T_lag', 'Korsmeyer_Peppas_T_lag', 'Hixson_Crowell_T_lag', 'Hopfenberg_T_lag'])
+@pytest.mark.parametrize('profile', sorted(REFERENCE_RSS))
+def test_new_lagged_fitters_reach_reference_RSS(fasten_profiles, profile, name, seed):
+    from DD_basic_opt import Weibull_opt, Korsmeyer_Peppas_opt, Hixson_Crowell_opt, Hopfenberg_opt
+    modules = {'Weibull': Weibull_opt, 'Korsmeyer': Korsmeyer_Peppas_opt, 'Hixson': Hixson_Crowell_opt, 'Hopfenberg': Hopfenberg_opt}
+    fitter = getattr(modules[name.split('_')[0]], 'Find_PAR_DEv_' + name)
+    Texp, Cexp = fasten_profiles[profile]
+    PAR, Result = fitter(Texp, Cexp, seed=seed, full_output=True)
+    assert PAR['T_lag'] <= Texp.max()
+    assert Result.fun <= REFERENCE_RSS[profile][name]*(1 + 1e-5)
+
+
+TRUE_PAR = {'zero_order': [4.], 'zero_order_T_lag': [4., 0.7], 'zero_order_F0': [4., 5.], 'first_order': [0.2],
+            'first_order_T_lag': [0.2, 0.7], 'first_order_F_max': [0.2, 80.], 'first_order_F_max_T_lag': [0.2, 80., 0.7],
+            'Higuchi': [20.], 'Higuchi_T_lag': [20., 0.7], 'Higuchi_F0': [20., 5.], 'Weibull': [3., 0.8],
+            'Weibull_T_lag': [3., 1.4, 0.7], 'Korsmeyer_Peppas': [20., 0.45], 'Korsmeyer_Peppas_T_lag': [20., 0.6, 0.7],
+            'Korsmeyer_Peppas_F0': [15., 0.5, 8.], 'Hixson_Crowell': [0.03], 'Hixson_Crowell_T_lag': [0.03, 0.7],
+            'Hopfenberg': [0.03, 2.2], 'Hopfenberg_T_lag': [0.05, 1.7, 0.7]}
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+@pytest.mark.parametrize('noise', range(4))
+def test_fit_of_noisy_synthetic_profile_beats_the_true_parameters(name, noise):
+    model = MODELS[name]
+    Texp = np.array([0., 0.25, 0.5, 1., 2., 3., 4., 6., 8., 12., 16., 24.])
+    Cexp = model.C_model(*TRUE_PAR[name], Texp) + np.random.default_rng(noise).normal(0., 0.5, Texp.size)
+    RSS_true = np.sum((model.C_model(*TRUE_PAR[name], Texp) - Cexp)**2)
+    for seed in (0, 1):
+        assert Find_PAR(model.C_model, Texp, Cexp, list(model.bounds), seed=seed).fun <= RSS_true
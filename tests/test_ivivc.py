@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the convolution-based plasma simulation against the integration of the compartment ODEs.
+
+@author: edward
+"""
+
+import os
+import numpy as np
+from scipy.integrate import solve_ivp
+from DD_simulation.ivivc import C_plasma
+from io_local.read_func import PK_Parameters_read
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def C_plasma_ODE(t, F, k_e, k_a1, k_a2, frac, X0=1., V_val=1., T_lag=0., full_release=100.):
+    """
+    Integrates the drug amounts in the two absorption sites and in the central compartment, step by step of t,
+    with the release rate of every step constant and the input of the second site delayed by T_lag
+    (a multiple of the time step).
+    """
+    dt = t[1] - t[0]
+    Rate = X0*np.diff(F)/(dt*full_release)
+    lag_steps = int(round(T_lag/dt))
+    y = np.array([frac*X0*F[0]/full_release, 0., 0.])
+    Bolus_2 = (1 - frac)*X0*F[0]/full_release
+    C = [y[2]/V_val]
+    for step in range(t.size - 1):
+        if step == lag_steps:
+            y[1] += Bolus_2
+        r_1 = frac*Rate[step]
+        r_2 = (1 - frac)*Rate[step - lag_steps] if step >= lag_steps else 0.
+
+        def derivatives (s, y):
+            return [r_1 - k_a1*y[0], r_2 - k_a2*y[1], k_a1*y[0] + k_a2*y[1] - k_e*y[2]]
+
+        y = solve_ivp(derivatives, (t[step], t[step+1]), y, method='LSODA', rtol=1e-11, atol=1e-13).y[:, -1]
+        C.append(y[2]/V_val)
+    return np.array(C)
+
+
+def test_C_plasma_matches_the_ODE_integration():
+    PK = PK_Parameters_read(os.path.join(REPO_DIR, 'input.dat'))
+    t = np.arange(0., 48.25, 0.25)
+    F = np.stack((90*(1 - np.exp(-0.3*t)), 5. + 60*np.sqrt(t)/np.sqrt(48.)))
+    k_a2 = np.array([PK['k_a2'], PK['k_e']])
+    Plasma = C_plasma(t, F, PK['k_e'], PK['k_a1'], k_a2, PK['frac'], PK['X0'], PK['V_val'], PK['T_lag'])
+    assert Plasma.shape == (2, 2, t.size)
+    for n in range(2):
+        for m in range(2):
+            Reference = C_plasma_ODE(t, F[n], PK['k_e'], PK['k_a1'], k_a2[m], PK['frac'], PK['X0'], PK['V_val'], PK['T_lag'])
+            np.testing.assert_allclose(Plasma[n, m], Reference, rtol=1e-6, atol=1e-9*Reference.max())
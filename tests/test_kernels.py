@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the broadcasting model kernels of DD_basic_models.
+
+@author: edward
+"""
+
+import warnings
+import numpy as np
+import pytest
+from DD_basic_models.registry import MODELS
+
+T = np.array([0., 0.25, 0.5, 1., 2., 3., 4., 6., 8., 12., 16., 24.])
+
+
+def parameter_sets(model, P=4, seed=0):
+    """
+    Returns P parameter sets of model drawn between 5% and 50% of its default bounds, as a (n_params, P) array.
+    """
+    lo, hi = np.array(model.bounds, dtype=float).T
+    u = np.random.default_rng(seed).uniform(0.05, 0.5, (P, lo.size))
+    return (lo + (hi - lo)*u).T
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_kernel_broadcasts_parameter_arrays(name):
+    model = MODELS[name]
+    PAR = parameter_sets(model)
+    Surface = model.C_model(*PAR, T)
+    assert Surface.shape == (PAR.shape[1], T.size)
+    for p in range(PAR.shape[1]):
+        np.testing.assert_allclose(Surface[p], model.C_model(*PAR[:, p], T), rtol=1e-12, atol=1e-12)
+    Jac = model.Jac_model(*PAR, T)
+    assert Jac.shape == (PAR.shape[0], PAR.shape[1], T.size)
+    for p in range(PAR.shape[1]):
+        np.testing.assert_allclose(Jac[:, p], model.Jac_model(*PAR[:, p], T), rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_kernel_writes_into_out(name):
+    model = MODELS[name]
+    PAR = parameter_sets(model)
+    out = np.full((PAR.shape[1], T.size), np.nan)
+    assert model.C_model(*PAR[:, :, np.newaxis], T, out=out) is out
+    np.testing.assert_allclose(out, model.C_model(*PAR, T), rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_kernel_is_nan_free_before_the_release(name):
+    model = MODELS[name]
+    PAR = parameter_sets(model)
+    t = np.concatenate(([-2., -0.5], T))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert np.all(np.isfinite(model.C_model(*PAR, t)))
+        assert np.all(np.isfinite(model.Jac_model(*PAR, t)))
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_jacobian_matches_finite_differences(name):
+    model = MODELS[name]
+    for x in parameter_sets(model, P=3, seed=1).T:
+        Jac = model.Jac_model(*x, T)
+        for i in range(x.size):
+            h = 1e-6*max(1., abs(x[i]))
+            x_plus, x_minus = x.copy(), x.copy()
+            x_plus[i] += h
+            x_minus[i] -= h
+            dC = (model.C_model(*x_plus, T) - model.C_model(*x_minus, T))/(2*h)
+            np.testing.assert_allclose(Jac[i], dC, rtol=1e-5, atol=1e-6*max(1., np.abs(dC).max()),
+                                       err_msg='d%s/d%s at %s' % (name, model.PAR_names[i], x))
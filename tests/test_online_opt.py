@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the online refitting of a dissolution run.
+
+@author: edward
+"""
+
+import numpy as np
+from DD_basic_opt.online_opt import Online_fitter, DEFAULT_MODELS
+from DD_basic_opt.model_selection import fit_all
+
+
+def test_table_keeps_the_fits_with_an_undefined_criterion():
+    fitter = Online_fitter(criterion='R2_adj', seed=0)
+    for t in (0., 1., 2.):
+        Table = fitter.add(t, 0.)
+    assert np.isnan(Table[-1]['R2_adj'])
+    assert sorted(Row['model'] for Row in Table) == sorted(fitter.fits)
+
+
+def test_online_fits_match_fit_all(fasten_profiles):
+    Texp, Cexp = fasten_profiles['ReQuip CR']
+    fitter = Online_fitter(seed=0)
+    for t, C in zip(Texp, Cexp*100):
+        Table = fitter.add(t, C)
+    assert [Row['model'] for Row in Table][0] == fit_all(Texp, Cexp*100, DEFAULT_MODELS, seed=0)[0]['model']
+    for Row, Reference in zip(sorted(Table, key=lambda Row: Row['model']),
+                              sorted(fit_all(Texp, Cexp*100, DEFAULT_MODELS, seed=0), key=lambda Row: Row['model'])):
+        assert Row['RSS'] <= Reference['RSS']*(1 + 1e-4)
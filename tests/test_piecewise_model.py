@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests of the piecewise release engine against a plain loop over the time points.
+
+@author: edward
+"""
+
+import numpy as np
+import pytest
+import DD_basic_models.piecewise_model as piecewise_model
+from DD_basic_models.piecewise_model import C_piecewise
+from DD_basic_models.registry import model_by_name
+
+BREAKPOINTS = np.array([0., 5., 10., 15., 20.])
+MODELS = ['first_order_F_max', 'Higuchi', 'zero_order_F0', 'first_order_F_max']
+PAR = [(0.2, 40.), (3.,), (1., 2.), (0.5, 10.)]
+
+
+def C_loop(t, breakpoints, C_models, PAR, continuous=True, fill_value=0.):
+    C = np.empty(t.size)
+    for n, time in enumerate(t):
+        if time < breakpoints[0] or time > breakpoints[-1]:
+            C[n] = fill_value
+            continue
+        i = min(np.flatnonzero(breakpoints <= time)[-1], breakpoints.size - 2)
+        C_model = model_by_name(C_models[i]).C_model
+        if not continuous:
+            C[n] = C_model(*PAR[i], np.array([time]))[0]
+            continue
+        C[n] = sum(model_by_name(C_models[j]).C_model(*PAR[j], np.array([breakpoints[j+1] - breakpoints[j]]))[0]
+                   for j in range(i))
+        C[n] += C_model(*PAR[i], np.array([time - breakpoints[i]]))[0]
+    return C
+
+
+@pytest.mark.parametrize('continuous', [True, False])
+def test_piecewise_matches_the_loop(continuous, monkeypatch):
+    monkeypatch.setattr(piecewise_model, 'chunk_size', 64)
+    t = np.concatenate((np.random.default_rng(0).uniform(-2., 22., 500), BREAKPOINTS))
+    np.testing.assert_allclose(C_piecewise(t, BREAKPOINTS, MODELS, PAR, continuous, fill_value=-1.),
+                               C_loop(t, BREAKPOINTS, MODELS, PAR, continuous, fill_value=-1.), rtol=1e-12, atol=1e-12)
+
+
+def test_piecewise_with_a_single_model():
+    t = np.linspace(0., 20., 41)
+    PAR_K = np.array([[0.1, 50.], [0.3, 20.], [0.05, 80.], [1., 5.]])
+    np.testing.assert_allclose(C_piecewise(t, BREAKPOINTS, 'first_order_F_max', PAR_K),
+                               C_loop(t, BREAKPOINTS, ['first_order_F_max']*4, PAR_K), rtol=1e-12, atol=1e-12)
@@ -1,11 +1,12 @@
 import numpy as np
-import pandas as pd
-# import json
-import matplotlib.pyplot as plt
 from io_local.read_func import Time_Intervals_read
+from DD_basic_models.zero_order_model import C_zero_order
+from DD_basic_models.piecewise_model import C_piecewise
 
 """
 Test - unlimited picewise function
+
+Run as a script; the same evaluation is available headless as: python moddiss.py piecewise --par 1 3 2 5
 """
 #input_file = open('input.dat')
 #input_str = input_file.read()
@@ -15,40 +16,24 @@ Test - unlimited picewise function
 #print(time_lag)
 # time_lag = [0,5,10,15,20]
 
-df = pd.read_csv('Fasten-RR2Pct01.dat', sep=',',header=None)
-print(df.values)
-
-time_lag = Time_Intervals_read()
-arg_lag = [1,3,2,5,4]
-time_exp=np.linspace(0, 48, 100)
 
-def interval_conds(time_exp_local,time_lag_local):
-    conds_left = []
-    conds_right = []
-    for ind in time_lag_local:
-        conds_left.append((ind <= time_exp_local))
-        conds_right.append((time_exp_local < ind))
-        print(ind)
-    
-    del conds_left[-1]
-    del conds_right[0]
+def main():
+    import pandas as pd
+    import matplotlib.pyplot as plt
 
-    conds = np.logical_and(conds_left, conds_right)
-    return conds
+    df = pd.read_csv('Fasten-RR2Pct01.dat', sep=',',header=None)
+    print(df.values)
 
-def func_zero_order_on_interval(arg_lag_local, time_exp_local):
-    from DD_basic_models.zero_order_model import C_zero_order
-    funcs = []
-    for ind in arg_lag_local:
-        funcs.append(lambda time_exp_local: C_zero_order(ind,time_exp_local))
-    return funcs
+    time_lag = Time_Intervals_read()
+    arg_lag = [1,3,2,5,4]
+    time_exp=np.linspace(0, 48, 100)
 
-conds2 = interval_conds(time_exp,time_lag)
-funcs2 = func_zero_order_on_interval(arg_lag, time_exp)
+    con_exp2 = C_piecewise(time_exp, time_lag, C_zero_order, [(k_0,) for k_0 in arg_lag[:len(time_lag)-1]], continuous=False)
 
-con_exp2 = np.piecewise(time_exp,conds2, funcs2)
+    plt.plot(time_exp, con_exp2, '-x')
 
-plt.plot(time_exp, con_exp2, '-x')
+    np.savetxt('data.csv', np.transpose([time_exp, con_exp2]), fmt='%4.2g', delimiter=';  ')
 
-np.savetxt('data.csv', np.transpose([time_exp, con_exp2]), fmt='%4.2g', delimiter=';  ')
 
+if __name__ == '__main__':
+    main()